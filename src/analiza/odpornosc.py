@@ -0,0 +1,147 @@
+# src/analiza/odpornosc.py
+"""
+Zapasy odporności pętli (Ms, zapas wzmocnienia, zapas fazy) dla całych
+tablic nastaw jednym przebiegiem NumPy.
+
+Transmitancja pętli otwartej w dziedzinie z (z = e^(jω Ts)):
+    L(z) = C(z) P(z)
+    P(z) = C (zI - Ad)^-1 Bd          obiekt widziany przez regulator co Ts
+    C(z) = Kp + ki z^-1 / (1 - z^-1) + beta (1 - z^-1) / (1 - a z^-1)
+(tor od pomiaru y do sterowania u z przeciwnym znakiem, ki = Kp Ts / Ti,
+a, beta - filtr D jak w regulatorach). Wagi b i Kr działają tylko na
+wartość zadaną, więc nie wpływają na odporność.
+
+Dla n kandydatów i siatki m pulsacji liczona jest tablica L (n, m):
+    Ms   = max |1 / (1 + L)|                     (czułość maksymalna)
+    GM   = 1 / max |L| w przejściach fazy przez -180° (inf - brak przejścia)
+    PM   = min (180° + arg L) w przejściach |L| przez 1  (inf - brak przejścia)
+Zapasy mają sens tylko dla stabilnej pętli - maska `stabilne` pochodzi
+z analiza.stabilnosc (ten sam model dyskretny).
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from src.analiza.stabilnosc import obiekt_probkowany, stabilne, wektor_nastaw
+from src.regulatory.regulator_bazowy import wspolczynniki_pid
+
+# Kandydaci liczeni w paczkach - tablice (paczka, liczba pulsacji) zespolone
+_PACZKA = 2048
+
+
+@dataclass
+class Marginesy:
+    """Zapasy odporności dla n zestawów nastaw (tablice (n,))."""
+    Ms: np.ndarray
+    zapas_wzmocnienia: np.ndarray  # krotność
+    zapas_fazy: np.ndarray  # [°]
+    stabilne: np.ndarray
+
+    @property
+    def zapas_wzmocnienia_db(self) -> np.ndarray:
+        return 20.0 * np.log10(self.zapas_wzmocnienia)
+
+
+def siatka_czestotliwosci(model, czas_probkowania: Optional[float] = None,
+                          liczba: int = 400) -> np.ndarray:
+    """
+    Logarytmiczna siatka pulsacji [rad/s]: od 1e-3 / (suma stałych czasowych
+    modelu) do częstotliwości Nyquista π / Ts.
+    """
+    Ts = float(czas_probkowania or model.dt)
+    try:
+        tau = float(sum(model.stale_czasowe()))
+    except NotImplementedError:
+        tau = 100.0 * Ts
+    return np.logspace(np.log10(1e-3 / tau), np.log10(np.pi / Ts), liczba)
+
+
+def odpowiedz_obiektu(model, omega: np.ndarray,
+                      czas_probkowania: Optional[float] = None) -> Optional[np.ndarray]:
+    """P(e^(jω Ts)) obiektu próbkowanego co Ts (None dla modelu bez postaci liniowej)."""
+    obiekt = obiekt_probkowany(model, czas_probkowania)
+    if obiekt is None:
+        return None
+    Ad, Bd, C = obiekt
+    Ts = float(czas_probkowania or model.dt)
+    z = np.exp(1j * np.asarray(omega, dtype=float) * Ts)
+    M = z[:, None, None] * np.eye(Ad.shape[0]) - Ad
+    X = np.linalg.solve(M, np.broadcast_to(Bd.astype(complex), (len(z),) + Bd.shape))
+    return (C @ X)[:, 0, 0]
+
+
+def odpowiedz_regulatora(omega: np.ndarray, Ts: float, Kp, Ti=None, Td=0.0,
+                         N=10.0) -> np.ndarray:
+    """C(e^(jω Ts)) toru y -> -u dla tablic nastaw: tablica (n, len(omega))."""
+    Kp = wektor_nastaw(Kp)
+    n = len(Kp)
+    Ti, Td, N = wektor_nastaw(Ti, n), wektor_nastaw(Td, n), wektor_nastaw(N, n)
+    q = np.exp(-1j * np.asarray(omega, dtype=float) * Ts)[None, :]  # z^-1
+    C = np.broadcast_to(Kp[:, None], (n, q.shape[1])).astype(complex)
+    ki, a, beta = wspolczynniki_pid(Kp, Ti, Td, N, Ts)
+    if (~np.isnan(Ti)).any():
+        C = C + (ki * Ts)[:, None] * q / (1.0 - q)
+    if (Td > 0.0).any():
+        C = C + beta[:, None] * (1.0 - q) / (1.0 - a[:, None] * q)
+    return C
+
+
+def _zapasy(L: np.ndarray):
+    """(Ms, GM, PM[°]) z odpowiedzi pętli L (n, m) na rosnącej siatce pulsacji."""
+    Ms = np.max(np.abs(1.0 / (1.0 + L)), axis=1)
+    faza = np.unwrap(np.angle(L), axis=1)
+    log_mod = np.log(np.abs(L))
+
+    # Przejścia fazy przez -180° (+ k 360°): zmiana numeru pasa (faza + π) / 2π
+    pas = np.floor((faza + np.pi) / (2.0 * np.pi))
+    przejscie = pas[:, 1:] != pas[:, :-1]
+    linia = -np.pi + 2.0 * np.pi * np.maximum(pas[:, 1:], pas[:, :-1])
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        t = (linia - faza[:, :-1]) / (faza[:, 1:] - faza[:, :-1])
+        mod_przejscia = np.exp(log_mod[:, :-1] + t * (log_mod[:, 1:] - log_mod[:, :-1]))
+        maks = np.max(np.where(przejscie, mod_przejscia, 0.0), axis=1)
+        GM = np.where(maks > 0.0, 1.0 / maks, np.inf)
+
+        # Przejścia |L| przez 1 (log |L| zmienia znak)
+        przejscie = np.signbit(log_mod[:, 1:]) != np.signbit(log_mod[:, :-1])
+        t = -log_mod[:, :-1] / (log_mod[:, 1:] - log_mod[:, :-1])
+        faza_przejscia = faza[:, :-1] + t * (faza[:, 1:] - faza[:, :-1])
+    zapas = np.degrees(np.mod(faza_przejscia + 2.0 * np.pi, 2.0 * np.pi) - np.pi)
+    PM = np.min(np.where(przejscie, zapas, np.inf), axis=1)
+    return Ms, GM, PM
+
+
+def marginesy(model, Kp, Ti=None, Td=0.0, N=10.0, czas_probkowania: Optional[float] = None,
+              omega: Optional[np.ndarray] = None) -> Marginesy:
+    """
+    Ms, zapas wzmocnienia i fazy dla tablic nastaw (jak w analiza.stabilnosc:
+    Ti = None / NaN - bez członu I, Td = 0 - bez członu D).
+
+    Args:
+        model: instancja modelu (model_dyskretny() i dt)
+        czas_probkowania: okres próbkowania regulatora Ts (None = krok modelu)
+        omega: siatka pulsacji [rad/s] (None = siatka_czestotliwosci())
+
+    Returns:
+        Marginesy; dla modelu bez postaci liniowej wszystkie zapasy NaN
+    """
+    Kp = wektor_nastaw(Kp)
+    n = len(Kp)
+    Ti, Td, N = wektor_nastaw(Ti, n), wektor_nastaw(Td, n), wektor_nastaw(N, n)
+    Ts = float(czas_probkowania or model.dt)
+    if omega is None:
+        omega = siatka_czestotliwosci(model, Ts)
+    P = odpowiedz_obiektu(model, omega, Ts)
+    maska = stabilne(model, Kp, Ti, Td, N, czas_probkowania=Ts)
+    if P is None:
+        brak = np.full(n, np.nan)
+        return Marginesy(Ms=brak, zapas_wzmocnienia=brak.copy(), zapas_fazy=brak.copy(),
+                         stabilne=maska)
+
+    Ms, GM, PM = np.empty(n), np.empty(n), np.empty(n)
+    for k0 in range(0, n, _PACZKA):
+        k1 = min(n, k0 + _PACZKA)
+        L = odpowiedz_regulatora(omega, Ts, Kp[k0:k1], Ti[k0:k1], Td[k0:k1], N[k0:k1]) * P
+        Ms[k0:k1], GM[k0:k1], PM[k0:k1] = _zapasy(L)
+    return Marginesy(Ms=Ms, zapas_wzmocnienia=GM, zapas_fazy=PM, stabilne=maska)
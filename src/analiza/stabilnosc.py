@@ -0,0 +1,124 @@
+# src/analiza/stabilnosc.py
+"""
+Analityczny test stabilności zamkniętej pętli dla całych tablic nastaw.
+
+Pętla bez saturacji jest dyskretnym układem liniowym z[k+1] = A z[k]
+(model_dyskretny() obiektu + postać stanowa regulatora, jak w
+symulacja.uklad_liniowy). Jest asymptotycznie stabilna, gdy wszystkie
+bieguny (wartości własne A) leżą wewnątrz okręgu jednostkowego - to
+dyskretny odpowiednik warunków Routha-Hurwitza, dokładny także dla
+próbkowania. Macierze A dla wszystkich kandydatów budowane są naraz
+(tablica (n, nz, nz)) i rozkładane jednym wywołaniem np.linalg.eigvals,
+więc test kosztuje mikrosekundy na kandydata zamiast pełnej symulacji.
+
+Przy regulatorze próbkującym co Ts = m * dt (ZOH na u) pętla w chwilach
+próbkowania ma obiekt Ad^m, sum Ad^i Bd - stabilność jest ta sama.
+"""
+from typing import Optional
+
+import numpy as np
+
+from src.regulatory.regulator_bazowy import wspolczynniki_pid
+from src.symulacja.silnik import krok_regulatora
+
+
+def wektor_nastaw(wartosc, n: Optional[int] = None) -> np.ndarray:
+    """Skalar lub sekwencja (None = NaN) jako wektor float."""
+    wektor = np.atleast_1d(np.array(wartosc, dtype=float))
+    return wektor if n is None else np.broadcast_to(wektor, (n,))
+
+
+def obiekt_probkowany(model, czas_probkowania: Optional[float]):
+    """(Ad, Bd, C) obiektu widzianego przez regulator co Ts (None, gdy model nieliniowy)."""
+    postac = model.model_dyskretny()
+    if postac is None:
+        return None
+    Ad, Bd, C = postac
+    m = krok_regulatora(model.dt, czas_probkowania or model.dt)
+    Am = np.eye(Ad.shape[0])
+    Bm = np.zeros_like(Bd)
+    for _ in range(m):
+        Bm = Bm + Am @ Bd
+        Am = Ad @ Am
+    return Am, Bm, C
+
+
+def macierze_petli(model, Kp, Ti=None, Td=0.0, N=10.0,
+                   czas_probkowania: Optional[float] = None) -> Optional[np.ndarray]:
+    """
+    Macierze stanu A zamkniętych pętli (bez saturacji) dla tablic nastaw.
+
+    Args:
+        model: instancja modelu (używany model_dyskretny() i dt)
+        Kp, Ti, Td, N: skalary lub sekwencje długości n; Ti = None / NaN - bez
+            członu I, Td = 0 - bez członu D (jak w BankRegulatorow)
+        czas_probkowania: okres próbkowania regulatora Ts (None = krok modelu)
+
+    Returns:
+        Tablica (n, nx + nc, nx + nc) lub None dla modelu bez postaci liniowej
+    """
+    obiekt = obiekt_probkowany(model, czas_probkowania)
+    if obiekt is None:
+        return None
+    Ad, Bd, C = obiekt
+    Ts = float(czas_probkowania or model.dt)
+
+    Kp = wektor_nastaw(Kp)
+    n = len(Kp)
+    Ti, Td, N = wektor_nastaw(Ti, n), wektor_nastaw(Td, n), wektor_nastaw(N, n)
+    calkuje = ~np.isnan(Ti)
+    rozniczkuje = Td > 0.0
+
+    # Stany regulatora jak w RegulatorBazowy.model_stanowy_dyskretny(): [ui], [vd, y_prev];
+    # pętle bez danego członu mają jego stany odłączone (biegun w 0)
+    czlon_i, czlon_d = bool(calkuje.any()), bool(rozniczkuje.any())
+    nx, nc = Ad.shape[0], int(czlon_i) + 2 * int(czlon_d)
+    Ac = np.zeros((n, nc, nc))
+    bcy = np.zeros((n, nc))
+    Cc = np.zeros((n, nc))
+    dy = -Kp.copy()
+    ki, a, beta = wspolczynniki_pid(Kp, Ti, Td, N, Ts)
+    if czlon_i:
+        Ac[:, 0, 0] = calkuje
+        bcy[:, 0] = -ki * Ts
+        Cc[:, 0] = calkuje
+    if czlon_d:
+        iv, ip = int(czlon_i), int(czlon_i) + 1
+        Ac[:, iv, iv] = a
+        Ac[:, iv, ip] = beta
+        bcy[:, iv] = -beta
+        bcy[:, ip] = rozniczkuje
+        Cc[:, iv] = a
+        Cc[:, ip] = beta
+        dy -= beta
+
+    # u = Cc c + dy y;  x+ = Ad x + Bd u;  c+ = Ac c + bcy y,  y = C x
+    A = np.empty((n, nx + nc, nx + nc))
+    A[:, :nx, :nx] = Ad + dy[:, None, None] * (Bd @ C)
+    A[:, :nx, nx:] = Bd[None, :, :] * Cc[:, None, :]
+    A[:, nx:, :nx] = bcy[:, :, None] * C[None, :, :]
+    A[:, nx:, nx:] = Ac
+    return A
+
+
+def promien_spektralny(model, Kp, Ti=None, Td=0.0, N=10.0,
+                       czas_probkowania: Optional[float] = None) -> np.ndarray:
+    """
+    max |biegun| zamkniętej pętli dla każdego zestawu nastaw (< 1 - stabilna).
+    Dla modelu bez postaci liniowej - NaN (stabilność nieznana).
+    """
+    A = macierze_petli(model, Kp, Ti, Td, N, czas_probkowania)
+    if A is None:
+        return np.full(len(wektor_nastaw(Kp)), np.nan)
+    return np.max(np.abs(np.linalg.eigvals(A)), axis=-1)
+
+
+def stabilne(model, Kp, Ti=None, Td=0.0, N=10.0, czas_probkowania: Optional[float] = None,
+             zapas: float = 0.0) -> np.ndarray:
+    """
+    Maska nastaw dających asymptotycznie stabilną pętlę liniową:
+    promień spektralny < 1 - zapas. Model bez postaci liniowej - wszystkie True
+    (o odrzuceniu decyduje wtedy symulacja).
+    """
+    promien = promien_spektralny(model, Kp, Ti, Td, N, czas_probkowania)
+    return ~(promien >= 1.0 - zapas)
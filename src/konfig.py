@@ -7,7 +7,7 @@ import os
 import yaml
 import logging
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 # Domyślna konfiguracja jako fallback
 DOMYSLNA_KONFIGURACJA = {
@@ -35,6 +35,9 @@ DOMYSLNA_KONFIGURACJA = {
         'faza_gruba': {'gestosc_mnoznik': 0.3},
         'faza_dokladna': {'margines_procent': 0.2, 'gestosc_mnoznik': 1.5}
     },
+    'kandydaci_siatki': {
+        'zbieraj': False
+    },
     'optymalizacja': {
         'punkty_startowe': {
             'uzyj_ziegler_nichols': True,
@@ -43,10 +46,56 @@ DOMYSLNA_KONFIGURACJA = {
             'maxiter': 500
         }
     },
+    'eksperyment_przekaznikowy': {
+        'amplituda': 1.0,
+        'histereza': None,
+        'histereza_wzgledna': 0.1,
+        'krotnosc_szumu': 3.0,
+        'tolerancja': 0.02,
+        'cykle': 3,
+        'maks_czas': 600.0,
+        'plik_wynikow': 'wyniki/eksperyment_przekaznikowy.json'
+    },
     'rownolegle': {
         'enabled': True,
         'n_jobs': -1
     },
+    'symulacja': {
+        'wsadowa': {
+            'default': True,
+            'wahadlo_odwrocone': False
+        },
+        'paczki': {
+            'budzet_pamieci_mb': 256,
+            'precyzja': 'float64',
+            'zbior_referencyjny': 16
+        },
+        'dyskretyzacja': 'euler',
+        'dt_strojenia': None,
+        'tryb': 'auto',
+        'czas_probkowania': {
+            'default': None
+        },
+        'wczesne_zakonczenie': {
+            'wlaczone': True,
+            'pasmo': 1e-5,
+            'okno': 5.0
+        },
+        'horyzont': {
+            'automatyczny': False,
+            'krotnosc': 10.0,
+            'minimum': 20.0,
+            'maksimum': 300.0
+        },
+        'przerywanie': {
+            'obwiednia': 100.0,
+            'ograniczenie_kosztu': True,
+            'filtr_stabilnosci': True,
+            'ms_max': None,
+            'czas_bloku': 5.0,
+            'zapas': 0.5
+        }
+    },
     'logowanie': {
         'poziom': 'INFO',
         'plik_log': 'wyniki/strojenie.log',
@@ -157,10 +206,18 @@ class Konfiguracja:
         """Pobiera konfigurację adaptacyjnego przeszukiwania."""
         return self.config['adaptacyjne_przeszukiwanie']
     
+    def czy_zbierac_kandydatow(self) -> bool:
+        """Sprawdza czy przeszukiwanie siatki zapisuje front Pareto i archiwum kandydatów."""
+        return self.config['kandydaci_siatki']['zbieraj']
+
     def pobierz_config_optymalizacji(self) -> Dict[str, Any]:
         """Pobiera konfigurację optymalizacji numerycznej."""
         return self.config['optymalizacja']
     
+    def pobierz_config_przekaznika(self) -> Dict[str, Any]:
+        """Eksperyment przekaźnikowy dla Zieglera-Nicholsa (amplituda, histereza, histereza_wzgledna, krotnosc_szumu, tolerancja, cykle, maks_czas, plik_wynikow)."""
+        return self.config['eksperyment_przekaznikowy']
+    
     def czy_rownolegle(self) -> bool:
         """Sprawdza czy włączone jest równoległe wykonywanie."""
         return self.config['rownolegle']['enabled']
@@ -169,6 +226,49 @@ class Konfiguracja:
         """Pobiera liczbę procesów dla równoległego wykonywania."""
         return self.config['rownolegle']['n_jobs']
     
+    def pobierz_config_symulacji(self) -> Dict[str, Any]:
+        """Pobiera konfigurację silnika symulacji."""
+        return self.config['symulacja']
+    
+    def czy_symulacja_wsadowa(self, model: str = None) -> bool:
+        """
+        Sprawdza czy przeszukiwanie siatki ma używać symulacji wsadowej dla modelu
+        (nadpisanie per model lub 'default'; pojedyncza wartość - dla wszystkich modeli).
+        """
+        wsadowa = self.config['symulacja']['wsadowa']
+        if isinstance(wsadowa, dict):
+            wsadowa = wsadowa.get(model, wsadowa.get('default', True))
+        return bool(wsadowa)
+
+    def pobierz_config_paczek(self) -> Dict[str, Any]:
+        """Symulacja wsadowa w paczkach (budzet_pamieci_mb, precyzja, zbior_referencyjny)."""
+        return self.config['symulacja']['paczki']
+
+    def pobierz_tryb_symulacji(self) -> str:
+        """Tryb silnika symulacji pętli (auto | zdarzeniowy | krokowy)."""
+        return self.config['symulacja']['tryb']
+
+    def pobierz_czas_probkowania(self, model: str) -> Optional[float]:
+        """
+        Okres próbkowania regulatora Ts dla modelu (nadpisanie per model lub 'default').
+        None = krok całkowania modelu.
+        """
+        czasy = self.config['symulacja'].get('czas_probkowania') or {}
+        Ts = czasy.get(model, czasy.get('default'))
+        return float(Ts) if Ts else None
+
+    def pobierz_wczesne_zakonczenie(self) -> Dict[str, Any]:
+        """Ustawienia wczesnego zakończenia symulacji (wlaczone, pasmo, okno)."""
+        return self.config['symulacja']['wczesne_zakonczenie']
+
+    def pobierz_config_horyzontu(self) -> Dict[str, Any]:
+        """Automatyczny horyzont symulacji (automatyczny, krotnosc, minimum, maksimum)."""
+        return self.config['symulacja']['horyzont']
+
+    def pobierz_config_przerywania(self) -> Dict[str, Any]:
+        """Przerywanie symulacji w strojeniu (obwiednia, ograniczenie_kosztu, filtr_stabilnosci, ms_max, czas_bloku, zapas)."""
+        return self.config['symulacja']['przerywanie']
+    
     def pobierz_config_logowania(self) -> Dict[str, Any]:
         """Pobiera konfigurację logowania."""
         return self.config['logowanie']
@@ -10,16 +10,58 @@ class Metryki:
     czas_ustalania: float   # [s]
     czas_narastania: float  # [s]
 
+def _czasy_przeciec(t, y, level, rising=True):
+    """
+    Czasy pierwszego przecięcia poziomów level (N,) przez wiersze y (N, T),
+    liniowa interpolacja między próbkami; NaN - brak przecięcia.
+    """
+    if rising:
+        przeciecie = (y[:, :-1] < level[:, None]) & (level[:, None] <= y[:, 1:])
+    else:
+        przeciecie = (y[:, :-1] > level[:, None]) & (level[:, None] >= y[:, 1:])
+    jest = przeciecie.any(axis=1)
+    i = np.argmax(przeciecie, axis=1) + 1
+    wiersze = np.arange(y.shape[0])
+    a, b = y[wiersze, i - 1], y[wiersze, i]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if rising:
+            czas = t[i-1] + (t[i]-t[i-1]) * (level - a) / (b - a)
+        else:
+            czas = t[i-1] + (t[i]-t[i-1]) * (a - level) / (a - b)
+    return np.where(jest, czas, np.nan)
+
+
 def _first_crossing_time(t, y, level, rising=True):
     """Liniowa interpolacja czasu pierwszego przekroczenia 'level'."""
-    for i in range(1, len(t)):
-        if rising and (y[i-1] < level <= y[i]):
-            a, b = y[i-1], y[i]
-            return t[i-1] + (t[i]-t[i-1]) * (level - a) / (b - a)
-        if (not rising) and (y[i-1] > level >= y[i]):
-            a, b = y[i-1], y[i]
-            return t[i-1] + (t[i]-t[i-1]) * (a - level) / (a - b)
-    return None  # brak przecięcia
+    t = np.asarray(t)
+    y = np.asarray(y)
+    if len(t) < 2:
+        return None
+    czas = _czasy_przeciec(t, y[None, :], np.asarray([level]), rising)[0]
+    return None if np.isnan(czas) else czas  # brak przecięcia
+
+def przeregulowanie_z_ekstremow(y0, y_max, y_min, r_koncowe, r_poczatkowe):
+    """
+    Przeregulowanie [%] jak w oblicz_metryki, wyznaczone z y[0] i ekstremów y.
+    Niemalejące względem ekstremów, więc z części trajektorii daje dolne ograniczenie.
+    Działa na skalarach i wektorach (y0, y_max, y_min dla N trajektorii).
+    """
+    y0 = np.asarray(y0, dtype=float)
+    steady_state = r_koncowe
+    step_amp = np.maximum(abs(r_koncowe - r_poczatkowe), np.abs(steady_state - y0))
+    step_dir = np.where(np.sign(steady_state - y0) == 0, 1.0, np.sign(steady_state - y0))
+
+    # Zadanie stabilizacji (r≈0, mały step_amp): maksymalne odchylenie bezwzględne
+    max_abs_dev = np.maximum(y_max - steady_state, steady_state - y_min)
+    ref_amp = np.maximum(np.abs(y0 - steady_state), 0.1)
+    mp_stab = np.maximum(0.0, 100.0 * (max_abs_dev - np.abs(y0 - steady_state)) / ref_amp)
+    # Klasyczne przeregulowanie dla skoków setpoint
+    peak_dev = np.where(step_dir > 0, y_max - steady_state, steady_state - y_min)
+    mp_skok = np.maximum(0.0, 100.0 * peak_dev / np.where(step_amp > 1e-12, step_amp, 1.0))
+
+    wynik = np.where(step_amp < 0.1, mp_stab, mp_skok)
+    return float(wynik) if wynik.ndim == 0 else wynik
+
 
 def oblicz_metryki(t, r, y, u=None, settle_band=0.02, hold_time=0.0):
     """
@@ -43,19 +85,11 @@ def oblicz_metryki(t, r, y, u=None, settle_band=0.02, hold_time=0.0):
     step_amp_r = abs(r[-1] - r[0])                    # amplituda skoku zadania
     step_amp_y = abs(steady_state - y0)               # amplituda odpowiedzi
     step_amp = max(step_amp_r, step_amp_y)            # <= KLUCZOWE
-    step_dir = np.sign(steady_state - y0) or 1.0
 
     # --- przeregulowanie [%] ---
-    # Dla zadania stabilizacji (r≈0, mały step_amp) użyj maksymalnego odchylenia bezwzględnego
-    if step_amp < 0.1:  # próg dla zadań stabilizacji (wahadło, itp.)
-        max_abs_dev = np.max(np.abs(y - steady_state))
-        # Normalizuj względem początkowego odchylenia lub stałej referencyjnej
-        ref_amp = max(abs(y0 - steady_state), 0.1)
-        przeregulowanie = max(0.0, 100.0 * (max_abs_dev - abs(y0 - steady_state)) / ref_amp)
-    else:
-        # Klasyczne przeregulowanie dla skoków setpoint
-        peak_dev = np.max(step_dir * (y - steady_state))  # dodatnie tylko powyżej stanu ustalonego
-        przeregulowanie = max(0.0, 100.0 * peak_dev / (step_amp if step_amp > 1e-12 else 1.0))
+    # Dla zadania stabilizacji (r≈0, mały step_amp) maksymalne odchylenie bezwzględne,
+    # dla skoków setpoint klasyczne
+    przeregulowanie = przeregulowanie_z_ekstremow(y0, np.max(y), np.min(y), r[-1], r[0])
 
     # --- Czas ustalania [s] ---
     band_ref = step_amp if step_amp > 1e-9 else np.max(np.abs(y - steady_state))
@@ -108,3 +142,295 @@ def oblicz_metryki(t, r, y, u=None, settle_band=0.02, hold_time=0.0):
         czas_ustalania=czas_ustalania,
         czas_narastania=czas_narastania
     )
+
+
+@dataclass
+class MetrykiWsadowe:
+    """Metryki N trajektorii - pola jak w Metryki, tablice (N,)."""
+    IAE: np.ndarray
+    ISE: np.ndarray
+    ITAE: np.ndarray
+    przeregulowanie: np.ndarray  # [%]
+    czas_ustalania: np.ndarray   # [s]
+    czas_narastania: np.ndarray  # [s]
+
+    def __len__(self):
+        return len(self.IAE)
+
+    def __getitem__(self, i) -> Metryki:
+        return Metryki(IAE=self.IAE[i], ISE=self.ISE[i], ITAE=self.ITAE[i],
+                       przeregulowanie=self.przeregulowanie[i],
+                       czas_ustalania=self.czas_ustalania[i],
+                       czas_narastania=self.czas_narastania[i])
+
+
+def _ostatnia_prawda(maska):
+    """Indeks ostatniego True w każdym wierszu (N, T); -1 gdy brak."""
+    ostatnia = maska.shape[1] - 1 - np.argmax(maska[:, ::-1], axis=1)
+    return np.where(maska.any(axis=1), ostatnia, -1)
+
+
+def _pierwsza_prawda(maska):
+    """Indeks pierwszego True w każdym wierszu (N, T); -1 gdy brak."""
+    return np.where(maska.any(axis=1), np.argmax(maska, axis=1), -1)
+
+
+def oblicz_metryki_wsadowo(t, r, y, u=None, settle_band=0.02, hold_time=0.0) -> MetrykiWsadowe:
+    """
+    oblicz_metryki dla N trajektorii naraz: y (N, T), r (T,) wspólne lub (N, T).
+    Te same przypadki szczególne (r≈0, hold_time) i wyniki co wersja skalarna
+    dla każdego wiersza; przecięcia poziomów przez argmax na całej tablicy.
+    u - jak w oblicz_metryki (nieużywane).
+    """
+    t = np.asarray(t); y = np.atleast_2d(np.asarray(y))
+    r = np.broadcast_to(np.asarray(r), y.shape)
+    n, kroki = y.shape
+
+    e = r - y
+    IAE  = np.trapz(np.abs(e), t, axis=1)
+    ISE  = np.trapz(e**2, t, axis=1)
+    ITAE = np.trapz(t * np.abs(e), t, axis=1)
+
+    steady_state = r[:, -1]
+    y0 = y[:, 0]
+
+    # --- amplituda i kierunek skoku ---
+    step_amp = np.maximum(np.abs(r[:, -1] - r[:, 0]), np.abs(steady_state - y0))
+    skok = step_amp > 1e-9
+
+    # --- przeregulowanie [%] ---
+    przeregulowanie = przeregulowanie_z_ekstremow(y0, np.max(y, axis=1), np.min(y, axis=1),
+                                                  r[:, -1], r[:, 0])
+
+    # --- Czas ustalania [s] ---
+    odchylka = np.abs(y - steady_state[:, None])
+    band_ref = np.where(skok, step_amp, np.max(odchylka, axis=1))
+    tol = settle_band * np.where(band_ref > 1e-12, band_ref, 1.0)
+
+    within = odchylka <= tol[:, None]
+    if hold_time and kroki > 1:
+        dt = np.mean(np.diff(t))
+        n_hold = max(1, int(round(hold_time / dt)))
+    else:
+        n_hold = 1
+
+    if n_hold == 1:
+        last_bad = _ostatnia_prawda(~within)
+    else:
+        # np.convolve(good, ones(n_hold), mode='same'): suma good w oknie
+        # [i + (n_hold-1)//2 - n_hold + 1, i + (n_hold-1)//2] obciętym do trajektorii
+        sumy = np.zeros((n, kroki + 1), dtype=np.int64)
+        np.cumsum(within, axis=1, out=sumy[:, 1:])
+        i = np.arange(kroki)
+        gora = np.minimum(i + (n_hold - 1) // 2, kroki - 1)
+        dol = np.maximum(i + (n_hold - 1) // 2 - n_hold + 1, 0)
+        consec = (sumy[:, gora + 1] - sumy[:, dol]) >= n_hold
+        last_bad = _ostatnia_prawda(~consec)
+    czas_ustalania = np.where(last_bad >= 0, t[np.minimum(last_bad + 1, kroki - 1)], t[0])
+
+    # --- Czas narastania [s] ---
+    czas_narastania = np.full(n, t[-1], dtype=float)
+    if skok.any():
+        ys, y0s, sss = y[skok], y0[skok], steady_state[skok]
+        rising = sss > y0s
+        t10 = np.full(len(ys), np.nan)
+        t90 = np.full(len(ys), np.nan)
+        for kierunek in (True, False):
+            w = rising == kierunek
+            if w.any() and kroki > 1:
+                t10[w] = _czasy_przeciec(t, ys[w], y0s[w] + 0.10 * (sss[w] - y0s[w]), kierunek)
+                t90[w] = _czasy_przeciec(t, ys[w], y0s[w] + 0.90 * (sss[w] - y0s[w]), kierunek)
+        with np.errstate(invalid="ignore"):
+            poprawne = ~np.isnan(t10) & ~np.isnan(t90) & (t90 >= t10)
+        czas_narastania[skok] = np.where(poprawne, t90 - t10, t[-1])
+    # brak skoku zadania → czas zaniku |y-ss| z 90% do 10% wartości początkowej
+    d0 = np.abs(y0 - steady_state)
+    zanik = ~skok & (d0 > 1e-12)
+    if zanik.any():
+        mag = odchylka[zanik]
+        idx90 = _pierwsza_prawda(mag <= 0.9 * d0[zanik, None])
+        idx10 = _pierwsza_prawda(mag <= 0.1 * d0[zanik, None])
+        czas_narastania[zanik] = np.where((idx90 >= 0) & (idx10 >= 0), t[idx10] - t[idx90], t[-1])
+    czas_narastania[~skok & ~(d0 > 1e-12)] = 0.0
+
+    return MetrykiWsadowe(
+        IAE=IAE, ISE=ISE, ITAE=ITAE,
+        przeregulowanie=np.asarray(przeregulowanie, dtype=float).reshape(n),
+        czas_ustalania=czas_ustalania,
+        czas_narastania=czas_narastania
+    )
+
+
+def _pierwsze_przeciecie(t, y, t_pop, y_pop, level, rising=True):
+    """_first_crossing_time dla bloku próbek poprzedzonego próbką (t_pop, y_pop)."""
+    if t_pop is not None:
+        t = np.concatenate(([t_pop], t))
+        y = np.concatenate(([y_pop], y))
+    return _first_crossing_time(t, y, level, rising)
+
+
+class AkumulatorMetryk:
+    """
+    Metryki oblicz_metryki (hold_time=0) liczone przyrostowo z próbek podawanych
+    pojedynczo lub blokami - bez przechowywania trajektorii.
+
+    Wartość zadana na końcu (r_koncowe) musi być znana z góry: wyznacza pasmo
+    ustalania i poziomy 10/90% czasu narastania. Stan to kilka liczb: całki
+    trapezami od ostatniej próbki, ekstrema y, ostatnie wyjście z pasma
+    i pierwsze przecięcia poziomów. Wyjątek: gdy skok jest zerowy (r = y0),
+    pasmo ustalania zależy od całej odpowiedzi (max |y - r|) - wtedy trzymane są
+    kandydatki na ostatnie wyjście z pasma (malejące odchyłki powyżej
+    settle_band * bieżące max), zwykle kilka wartości.
+    """
+
+    def __init__(self, r_koncowe: float, settle_band: float = 0.02):
+        self.r_koncowe = float(r_koncowe)
+        self.settle_band = settle_band
+        self.liczba_probek = 0
+        self.IAE = self.ISE = self.ITAE = 0.0
+        self.y0 = self.r0 = None
+        self.y_max, self.y_min = -np.inf, np.inf
+        # Ostatnia próbka (początek następnego trapezu / przecięcia)
+        self._t_pop = self._y_pop = self._r_pop = None
+        self._t_start = None
+        # Czas ustalania: pasmo stałe (skok) - indeks i czas po ostatniej próbce poza pasmem;
+        # pasmo z całej odpowiedzi - kandydatki [(odchyłka, czas następnej próbki)]
+        self._tol = None
+        self.indeks_poza_pasmem = -1
+        self._t_po_wyjsciu = None
+        self._max_odchylka = 0.0
+        self._kandydatki = []
+        # Czas narastania: czasy przecięć 10% / 90% (lub zaniku 90% / 10%)
+        self._t10 = self._t90 = None
+
+    def _inicjalizuj(self, t0, r0, y0):
+        self._t_start, self.r0, self.y0 = t0, r0, y0
+        ss = self.r_koncowe
+        self._step_amp = max(abs(ss - r0), abs(ss - y0))
+        if self._step_amp > 1e-9:
+            self._tol = self.settle_band * self._step_amp
+
+    def dodaj(self, t, r, y):
+        """Dokłada próbkę lub blok próbek (t, r, y) w kolejności czasu."""
+        t = np.atleast_1d(np.asarray(t, dtype=float))
+        r = np.atleast_1d(np.asarray(r, dtype=float))
+        y = np.atleast_1d(np.asarray(y, dtype=float))
+        if not t.size:
+            return
+        if self.liczba_probek == 0:
+            self._inicjalizuj(float(t[0]), float(r[0]), float(y[0]))
+        ss = self.r_koncowe
+
+        # Całki trapezami od ostatniej próbki poprzedniego bloku
+        e = r - y
+        if self._t_pop is None:
+            tt, ee = t, e
+        else:
+            tt = np.concatenate(([self._t_pop], t))
+            ee = np.concatenate(([self._r_pop - self._y_pop], e))
+        self.IAE += np.trapz(np.abs(ee), tt)
+        self.ISE += np.trapz(ee**2, tt)
+        self.ITAE += np.trapz(tt * np.abs(ee), tt)
+
+        self.y_max = max(self.y_max, np.max(y))
+        self.y_min = min(self.y_min, np.min(y))
+
+        odchylka = np.abs(y - ss)
+        if self._tol is not None:
+            self._ustalanie_pasmo_stale(t, odchylka)
+        else:
+            self._ustalanie_pasmo_z_odpowiedzi(t, odchylka)
+        self._narastanie(t, y, odchylka)
+
+        self.liczba_probek += t.size
+        self._t_pop, self._r_pop, self._y_pop = float(t[-1]), float(r[-1]), float(y[-1])
+
+    def _ustalanie_pasmo_stale(self, t, odchylka):
+        if self._t_po_wyjsciu is None and self.indeks_poza_pasmem >= 0:
+            self._t_po_wyjsciu = float(t[0])
+        poza = np.flatnonzero(~(odchylka <= self._tol))
+        if poza.size:
+            i = int(poza[-1])
+            self.indeks_poza_pasmem = self.liczba_probek + i
+            self._t_po_wyjsciu = float(t[i + 1]) if i + 1 < t.size else None
+
+    def _ustalanie_pasmo_z_odpowiedzi(self, t, odchylka):
+        kandydatki = self._kandydatki
+        if kandydatki and kandydatki[-1][1] is None:
+            kandydatki[-1] = (kandydatki[-1][0], float(t[0]))
+        # Próbki większe od wszystkich późniejszych w bloku
+        maks_dalej = np.append(np.maximum.accumulate(odchylka[::-1])[::-1][1:], -np.inf)
+        nowe = np.flatnonzero(odchylka > maks_dalej)
+        maks_bloku = float(odchylka[nowe[0]]) if nowe.size else -np.inf
+        while kandydatki and kandydatki[-1][0] <= maks_bloku:
+            kandydatki.pop()
+        for i in nowe:
+            kandydatki.append((float(odchylka[i]), float(t[i + 1]) if i + 1 < t.size else None))
+        self._max_odchylka = max(self._max_odchylka, float(np.max(odchylka)))
+        # Odchyłki nie większe od settle_band * max nigdy nie wyjdą poza końcowe pasmo
+        prog = self.settle_band * self._max_odchylka
+        while kandydatki and kandydatki[-1][0] <= prog:
+            kandydatki.pop()
+
+    def _narastanie(self, t, y, odchylka):
+        ss, y0 = self.r_koncowe, self.y0
+        if self._step_amp > 1e-9:
+            rising = (ss > y0)
+            if self._t10 is None:
+                self._t10 = _pierwsze_przeciecie(t, y, self._t_pop, self._y_pop,
+                                                 y0 + 0.10 * (ss - y0), rising)
+            if self._t90 is None:
+                self._t90 = _pierwsze_przeciecie(t, y, self._t_pop, self._y_pop,
+                                                 y0 + 0.90 * (ss - y0), rising)
+        elif abs(y0 - ss) > 1e-12:
+            # Zanik |y - ss| z 90% do 10% wartości początkowej (pierwsze próbki)
+            d0 = abs(y0 - ss)
+            if self._t90 is None and (odchylka <= 0.9 * d0).any():
+                self._t90 = float(t[np.argmax(odchylka <= 0.9 * d0)])
+            if self._t10 is None and (odchylka <= 0.1 * d0).any():
+                self._t10 = float(t[np.argmax(odchylka <= 0.1 * d0)])
+
+    def metryki(self) -> Metryki:
+        """Metryki z dotychczasowych próbek (jak oblicz_metryki na całej trajektorii)."""
+        if self.liczba_probek == 0:
+            raise ValueError("Brak próbek w akumulatorze metryk.")
+        if self._r_pop != self.r_koncowe:
+            raise ValueError(f"Ostatnia wartość zadana ({self._r_pop}) różni się od "
+                             f"r_koncowe ({self.r_koncowe}).")
+        t_koniec = self._t_pop
+        przeregulowanie = przeregulowanie_z_ekstremow(self.y0, self.y_max, self.y_min,
+                                                      self.r_koncowe, self.r0)
+
+        if self._tol is not None:
+            if self.indeks_poza_pasmem < 0:
+                czas_ustalania = self._t_start
+            else:
+                czas_ustalania = self._t_po_wyjsciu if self._t_po_wyjsciu is not None else t_koniec
+        else:
+            band_ref = self._max_odchylka
+            tol = self.settle_band * (band_ref if band_ref > 1e-12 else 1.0)
+            czas_ustalania = self._t_start
+            for odchylka, t_po in reversed(self._kandydatki):
+                if odchylka > tol:
+                    czas_ustalania = t_po if t_po is not None else t_koniec
+                    break
+
+        if self._step_amp > 1e-9:
+            if self._t10 is not None and self._t90 is not None and self._t90 >= self._t10:
+                czas_narastania = self._t90 - self._t10
+            else:
+                czas_narastania = t_koniec
+        elif abs(self.y0 - self.r_koncowe) > 1e-12:
+            if self._t10 is not None and self._t90 is not None:
+                czas_narastania = self._t10 - self._t90
+            else:
+                czas_narastania = t_koniec
+        else:
+            czas_narastania = 0.0
+
+        return Metryki(
+            IAE=self.IAE, ISE=self.ISE, ITAE=self.ITAE,
+            przeregulowanie=przeregulowanie,
+            czas_ustalania=czas_ustalania,
+            czas_narastania=czas_narastania
+        )
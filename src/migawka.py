@@ -0,0 +1,44 @@
+# src/migawka.py
+"""
+Migawka stanu modelu lub regulatora (snapshot/restore).
+
+Model i regulator deklarują swoje pola stanu w `_pola_stanu`; migawka
+przechowuje tylko ich wartości (krotka w obiekcie z __slots__), więc
+zapis i odtworzenie kosztują tyle, co skopiowanie kilku liczb. Pozwala to
+zatrzymać symulację, zapamiętać stan i kontynuować ją kilka razy z różnymi
+wejściami bez ponownego liczenia wspólnego początku.
+"""
+import numpy as np
+
+
+def _kopia(wartosc):
+    # Stan wsadowy (symulacja wsadowa) to tablice - kopiowane, by migawka była niezależna
+    return wartosc.copy() if isinstance(wartosc, np.ndarray) else wartosc
+
+
+class Migawka:
+    __slots__ = ("typ", "wartosci")
+
+    def __init__(self, typ: type, wartosci: tuple):
+        self.typ = typ
+        self.wartosci = wartosci
+
+    def __repr__(self):
+        return f"Migawka({self.typ.__name__}, {self.wartosci})"
+
+
+class ZMigawka:
+    """Domieszka: snapshot()/restore() dla klas z krotką `_pola_stanu`."""
+    _pola_stanu = ()
+
+    def snapshot(self) -> Migawka:
+        """Migawka bieżącego stanu (pola `_pola_stanu`)."""
+        return Migawka(type(self), tuple(_kopia(getattr(self, pole)) for pole in self._pola_stanu))
+
+    def restore(self, migawka: Migawka):
+        """Przywraca stan z migawki tego samego typu (migawkę można odtwarzać wielokrotnie)."""
+        if migawka.typ is not type(self):
+            raise ValueError(f"Migawka typu {migawka.typ.__name__} nie pasuje do "
+                             f"{type(self).__name__}")
+        for pole, wartosc in zip(self._pola_stanu, migawka.wartosci):
+            setattr(self, pole, _kopia(wartosc))
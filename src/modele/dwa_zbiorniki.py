@@ -1,19 +1,74 @@
 # src/modele/dwa_zbiorniki.py
+import numpy as np
+
 from src.modele.model_bazowy import ModelBazowy
+from src.modele.dyskretyzacja import dyskretyzuj_zoh
 
 class Dwa_zbiorniki(ModelBazowy):
     """
     Model dwóch zbiorników w kaskadzie.
+
+    dyskretyzacja: "euler" (domyślnie) lub "zoh" — dokładna dyskretyzacja
+    z ekstrapolatorem zerowego rzędu, pozwala na większy krok dt.
     """
-    def __init__(self, K=1.0, tau1=8.0, tau2=4.0, dt=0.05):
+    _pola_stanu = ("y", "y1", "y2")
+
+    def __init__(self, K=1.0, tau1=8.0, tau2=4.0, dt=0.05, dyskretyzacja="euler"):
         super().__init__(dt)
         self.K = K
         self.tau1 = tau1
         self.tau2 = tau2
         self.y1 = 0.0
         self.y2 = 0.0
+        if dyskretyzacja not in ("euler", "zoh"):
+            raise ValueError(f"Nieznana metoda dyskretyzacji: {dyskretyzacja}")
+        self.dyskretyzacja = dyskretyzacja
+        if dyskretyzacja == "zoh":
+            Ad, Bd = dyskretyzuj_zoh(*self.model_stanowy()[:2], self.dt)
+            (self._a11, self._a12), (self._a21, self._a22) = Ad.tolist()
+            self._b1, self._b2 = Bd[:, 0].tolist()
+
+    def model_stanowy(self):
+        """Ciągły model (A, B, C) w przestrzeni stanów, x = [y1, y2]."""
+        A = np.array([[-1.0 / self.tau1, 0.0],
+                      [1.0 / self.tau2, -1.0 / self.tau2]])
+        B = np.array([[self.K / self.tau1],
+                      [0.0]])
+        C = np.array([[0.0, 1.0]])
+        return A, B, C
+
+    def model_dyskretny(self):
+        """Dyskretny model (Ad, Bd, C) zgodny z metodą step() (Euler lub ZOH)."""
+        if self.dyskretyzacja == "zoh":
+            Ad = np.array([[self._a11, self._a12], [self._a21, self._a22]])
+            Bd = np.array([[self._b1], [self._b2]])
+        else:
+            # Euler sekwencyjny: y2 korzysta z już zaktualizowanego y1
+            a1 = 1.0 - self.dt / self.tau1
+            b1 = self.dt * self.K / self.tau1
+            c = self.dt / self.tau2
+            a2 = 1.0 - c
+            Ad = np.array([[a1, 0.0], [c * a1, a2]])
+            Bd = np.array([[b1], [c * b1]])
+        return Ad, Bd, np.array([[0.0, 1.0]])
+
+    def stale_czasowe(self):
+        return tuple(sorted((self.tau1, self.tau2), reverse=True))
+
+    def wektor_stanu(self):
+        return np.array([self.y1, self.y2], dtype=float)
+
+    def ustaw_wektor_stanu(self, x):
+        self.y1, self.y2 = float(x[0]), float(x[1])
+        self.y = self.y2
 
     def step(self, u):
+        if self.dyskretyzacja == "zoh":
+            y1 = self._a11 * self.y1 + self._a12 * self.y2 + self._b1 * u
+            self.y2 = self._a21 * self.y1 + self._a22 * self.y2 + self._b2 * u
+            self.y1 = y1
+            self.y = self.y2
+            return self.y
         dy1 = (-self.y1 + self.K * u) / self.tau1
         self.y1 += self.dt * dy1
         dy2 = (-self.y2 + self.y1) / self.tau2
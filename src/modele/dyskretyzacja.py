@@ -0,0 +1,44 @@
+# src/modele/dyskretyzacja.py
+"""
+Dyskretyzacja liniowych modeli w przestrzeni stanów.
+
+ZOH (zero-order hold): przy sterowaniu stałym w obrębie kroku dt rozwiązanie
+x' = A x + B u jest dokładne:
+    x[k+1] = Ad x[k] + Bd u[k],   Ad = e^(A dt),   Bd = ∫0^dt e^(A s) ds B
+Obie macierze liczone są jedną eksponentą macierzy rozszerzonej [[A, B], [0, 0]].
+"""
+from functools import lru_cache
+
+import numpy as np
+from scipy.linalg import expm
+
+
+@lru_cache(maxsize=256)
+def _zoh(A_krotka: tuple, B_krotka: tuple, dt: float):
+    A = np.array(A_krotka, dtype=float)
+    B = np.array(B_krotka, dtype=float)
+    n, m = A.shape[0], B.shape[1]
+
+    M = np.zeros((n + m, n + m))
+    M[:n, :n] = A * dt
+    M[:n, n:] = B * dt
+    E = expm(M)
+    return E[:n, :n], E[:n, n:]
+
+
+def dyskretyzuj_zoh(A, B, dt: float):
+    """
+    Dyskretyzacja ZOH z buforowaniem wyniku.
+
+    Macierze A, B wynikają wprost z parametrów modelu (np. K, tau),
+    więc bufor działa per (parametry modelu, dt).
+
+    Returns:
+        (Ad, Bd) jako kopie tablic NumPy
+    """
+    A = np.atleast_2d(np.asarray(A, dtype=float))
+    B = np.asarray(B, dtype=float).reshape(A.shape[0], -1)
+    if dt <= 0:
+        raise ValueError("dt musi być > 0")
+    Ad, Bd = _zoh(tuple(map(tuple, A)), tuple(map(tuple, B)), float(dt))
+    return Ad.copy(), Bd.copy()
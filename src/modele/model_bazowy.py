@@ -2,9 +2,32 @@
 """
 Klasa bazowa dla wszystkich modeli procesów.
 Każdy model powinien dziedziczyć po BaseModel i implementować metodę step(u).
+
+Modele liniowe (lub linearyzowane w punkcie pracy) udostępniają ciągły model
+stanowy, z którego wynikają transmitancja G(s) i odpowiedź częstotliwościowa
+- wstępna ocena i strojenie w dziedzinie częstotliwości bez symulacji w czasie.
 """
+import numpy as np
+from scipy.signal import ss2tf
+
+from src.migawka import ZMigawka
+
+
+def _wielomiany(A, B, C):
+    """(num, den) transmitancji C (sI - A)^-1 B (malejące potęgi, bez zer wiodących licznika)."""
+    num, den = ss2tf(A, B, C, np.zeros((1, 1)))
+    num = num[0]
+    # ss2tf zwraca licznik stopnia den - zera wiodące usuwane względem skali licznika
+    wiodace = np.abs(num) <= 1e-12 * np.max(np.abs(num), initial=0.0)
+    return (num[np.argmin(wiodace):] if not wiodace.all() else num[-1:]), den
+
+
+class ModelBazowy(ZMigawka):
+    # Atrybuty przechowujące stan modelu (używane m.in. przez symulację wsadową,
+    # która zastępuje je wektorami NumPy i prowadzi wiele symulacji naraz,
+    # oraz przez snapshot()/restore())
+    _pola_stanu = ("y",)
 
-class ModelBazowy:
     def __init__(self, dt: float = 0.05):
         """
         :param dt: krok czasowy symulacji [s]
@@ -16,6 +39,69 @@ class ModelBazowy:
         """Resetuje stan modelu."""
         self.y = y0
 
+    def model_stanowy(self):
+        """
+        Ciągły model liniowy (A, B, C) w punkcie pracy: x' = A x + B u, y = C x
+        (stan jak w wektor_stanu()).
+        """
+        raise NotImplementedError("Model nie udostępnia postaci liniowej.")
+
+    def transmitancja(self):
+        """
+        Transmitancja G(s) = num(s) / den(s) z model_stanowy().
+
+        Returns:
+            (num, den) - współczynniki wielomianów w s (malejące potęgi), den[0] = 1
+        """
+        return _wielomiany(*self.model_stanowy())
+
+    def odpowiedz_czestotliwosciowa(self, omega, dyskretna: bool = False) -> np.ndarray:
+        """
+        Odpowiedź częstotliwościowa G(jω) dla tablicy pulsacji omega [rad/s].
+
+        dyskretna=True: model zgodny ze step() (model_dyskretny()) w z = e^(jω dt),
+        czyli obiekt widziany przez regulator próbkujący co dt.
+
+        Liczona z wielomianów transmitancji (np.polyval na całej tablicy naraz).
+
+        Returns:
+            Tablica zespolona o kształcie omega
+        """
+        omega = np.asarray(omega, dtype=float)
+        if dyskretna:
+            postac = self.model_dyskretny()
+            if postac is None:
+                raise NotImplementedError("Model nie udostępnia postaci liniowej.")
+            num, den = _wielomiany(*postac)
+            s = np.exp(1j * omega * self.dt)
+        else:
+            num, den = self.transmitancja()
+            s = 1j * omega
+        return np.polyval(num, s) / np.polyval(den, s)
+
+    def model_dyskretny(self):
+        """
+        Dyskretny model liniowy (Ad, Bd, C) odpowiadający dokładnie metodzie step():
+            x[k+1] = Ad x[k] + Bd u[k],  y = C x
+        Zwraca None dla modeli, których step() nie jest liniowy.
+        """
+        return None
+
+    def stale_czasowe(self):
+        """
+        Dominujące stałe czasowe obiektu [s] (malejąco). Służą do doboru
+        horyzontu symulacji (silnik.Horyzont) - suma to efektywny czas odpowiedzi.
+        """
+        raise NotImplementedError("Model nie udostępnia stałych czasowych.")
+
+    def wektor_stanu(self):
+        """Aktualny stan x (w kolejności zgodnej z model_dyskretny())."""
+        raise NotImplementedError("Model nie udostępnia postaci liniowej.")
+
+    def ustaw_wektor_stanu(self, x):
+        """Ustawia stan z wektora x (odwrotność wektor_stanu(), razem z wyjściem y)."""
+        raise NotImplementedError("Model nie udostępnia postaci liniowej.")
+
     def step(self, u: float) -> float:
         """
         Jeden krok symulacji.
@@ -1,8 +1,11 @@
 # src/modele/wahadlo_odwrocone.py
 from src.modele.model_bazowy import ModelBazowy
 import math
+import numpy as np
 
 class Wahadlo_odwrocone(ModelBazowy):
+    _pola_stanu = ("y", "theta", "omega")
+
     def __init__(self, m=0.2, l=0.5, g=9.81, d=1.2, dt=0.01):
         super().__init__(dt)
         self.m = m
@@ -13,6 +16,51 @@ class Wahadlo_odwrocone(ModelBazowy):
         self.omega = 0.0
         self.y = self.theta
 
+    def model_stanowy(self):
+        """
+        Ciągły model (A, B, C), x = [theta, omega], linearyzacja wokół theta = 0.
+        Równania step() są liniowe w theta, więc linearyzacja jest dokładna.
+        """
+        A = np.array([[0.0, 1.0],
+                      [-self.g / self.l, -self.d]])
+        B = np.array([[0.0],
+                      [1.0 / (self.m * self.l ** 2)]])
+        C = np.array([[1.0, 0.0]])
+        return A, B, C
+
+    def model_dyskretny(self):
+        """
+        Dyskretny model (Ad, Bd, C) zgodny z metodą step(), x = [theta, omega].
+        Równania są liniowe w theta, więc postać jest dokładna (semi-implicit Euler).
+        """
+        dt = self.dt
+        g_l = self.g / self.l
+        b = 1.0 / (self.m * self.l ** 2)
+        Ad = np.array([[1.0 - dt * dt * g_l, dt * (1.0 - dt * self.d)],
+                       [-dt * g_l, 1.0 - dt * self.d]])
+        Bd = np.array([[dt * dt * b], [dt * b]])
+        return Ad, Bd, np.array([[1.0, 0.0]])
+
+    def stale_czasowe(self):
+        """
+        theta'' + d theta' + (g/l) theta = ...: dla tłumienia podkrytycznego stała
+        czasowa obwiedni 2/d, w przeciwnym razie 1/|s| dla obu biegunów rzeczywistych.
+        """
+        g_l = self.g / self.l
+        delta = self.d ** 2 / 4.0 - g_l
+        if delta < 0.0:
+            return (2.0 / self.d,)
+        pierwiastek = math.sqrt(delta)
+        bieguny = (self.d / 2.0 - pierwiastek, self.d / 2.0 + pierwiastek)
+        return tuple(sorted((1.0 / s for s in bieguny if s > 0.0), reverse=True))
+
+    def wektor_stanu(self):
+        return np.array([self.theta, self.omega], dtype=float)
+
+    def ustaw_wektor_stanu(self, x):
+        self.theta, self.omega = float(x[0]), float(x[1])
+        self.y = self.theta
+
     def step(self, u):
         d2theta = -(self.g / self.l) * self.theta + u / (self.m * self.l ** 2) - self.d * self.omega
         self.omega += d2theta * self.dt
@@ -1,16 +1,58 @@
 # src/modele/zbiornik_1rz.py
+import numpy as np
+
 from src.modele.model_bazowy import ModelBazowy
+from src.modele.dyskretyzacja import dyskretyzuj_zoh
 
 class Zbiornik_1rz(ModelBazowy):
     """
     Model pierwszego rzędu: G(s) = K / (τs + 1)
+
+    dyskretyzacja: "euler" (domyślnie) lub "zoh" — dokładna dyskretyzacja
+    z ekstrapolatorem zerowego rzędu, pozwala na większy krok dt.
     """
-    def __init__(self, K=1.0, tau=10.0, dt=0.05):
+    def __init__(self, K=1.0, tau=10.0, dt=0.05, dyskretyzacja="euler"):
         super().__init__(dt)
         self.K = K
         self.tau = tau
+        if dyskretyzacja not in ("euler", "zoh"):
+            raise ValueError(f"Nieznana metoda dyskretyzacji: {dyskretyzacja}")
+        self.dyskretyzacja = dyskretyzacja
+        if dyskretyzacja == "zoh":
+            Ad, Bd = dyskretyzuj_zoh(*self.model_stanowy()[:2], self.dt)
+            self._ad = float(Ad[0, 0])
+            self._bd = float(Bd[0, 0])
+
+    def model_stanowy(self):
+        """Ciągły model (A, B, C) w przestrzeni stanów, x = [y]."""
+        A = np.array([[-1.0 / self.tau]])
+        B = np.array([[self.K / self.tau]])
+        C = np.array([[1.0]])
+        return A, B, C
+
+    def model_dyskretny(self):
+        """Dyskretny model (Ad, Bd, C) zgodny z metodą step() (Euler lub ZOH)."""
+        if self.dyskretyzacja == "zoh":
+            Ad = np.array([[self._ad]])
+            Bd = np.array([[self._bd]])
+        else:
+            Ad = np.array([[1.0 - self.dt / self.tau]])
+            Bd = np.array([[self.dt * self.K / self.tau]])
+        return Ad, Bd, np.array([[1.0]])
+
+    def stale_czasowe(self):
+        return (self.tau,)
+
+    def wektor_stanu(self):
+        return np.array([self.y], dtype=float)
+
+    def ustaw_wektor_stanu(self, x):
+        self.y = float(x[0])
 
     def step(self, u):
+        if self.dyskretyzacja == "zoh":
+            self.y = self._ad * self.y + self._bd * u
+            return self.y
         dy = (-(self.y) + self.K * u) / self.tau
         self.y += self.dt * dy
         return self.y
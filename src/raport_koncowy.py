@@ -29,6 +29,54 @@ class GeneratorRaportuKoncowego:
         self.modele = ["zbiornik_1rz", "dwa_zbiorniki", "wahadlo_odwrocone"]
         self.metody = ["ziegler_nichols", "siatka", "optymalizacja"]
         
+    def zapasy_odpornosci(self, regulator, metoda, model, parametry, katalog):
+        """
+        Zapasy odporności nastaw z raportu: Ms, zapas wzmocnienia [dB] i fazy [°]
+        (src/analiza/odpornosc.py). Okres próbkowania z pliku parametrów etapu
+        strojenia, potem z konfiguracji, na końcu krok modelu.
+        Przy braku danych / modelu bez postaci liniowej / niestabilnej pętli
+        zamkniętej - wartości None (nie wchodzą do średnich Ms_mean, GM_mean, PM_mean).
+        """
+        brak = {"Ms": None, "GM_dB": None, "PM": None}
+        if not parametry or parametry.get("Kp") is None:
+            return brak
+        try:
+            from src import rejestr
+            from src.analiza.odpornosc import marginesy
+
+            czas_probkowania = None
+            for plik in (Path(katalog) / f"parametry_{regulator}_{metoda}_{model}.json",
+                         self.wyniki_dir / f"parametry_{regulator}_{metoda}_{model}.json"):
+                if plik.exists():
+                    with open(plik, "r", encoding="utf-8") as f:
+                        czas_probkowania = json.load(f).get("czas_probkowania")
+                    break
+            if czas_probkowania is None:
+                from src.konfig import pobierz_konfiguracje
+                czas_probkowania = pobierz_konfiguracje().pobierz_czas_probkowania(model)
+
+            klasa = rejestr.regulator(regulator).klasa
+            wynik = marginesy(
+                rejestr.model(model).utworz(),
+                Kp=parametry["Kp"],
+                Ti=parametry.get("Ti") if klasa._calkowanie else None,
+                Td=(parametry.get("Td") or 0.0) if klasa._rozniczkowanie else 0.0,
+                N=parametry.get("N") or 10.0,
+                czas_probkowania=czas_probkowania,
+            )
+        except Exception as e:
+            print(f"[UWAGA] Nie udało się obliczyć zapasów odporności ({regulator}, {metoda}, {model}): {e}")
+            return brak
+        if not wynik.stabilne[0]:
+            # Zapasy niestabilnej pętli nie są zapasami - nie mieszaj ich ze stabilnymi
+            print(f"[UWAGA] Niestabilna pętla zamknięta ({regulator}, {metoda}, {model}) - bez zapasów odporności")
+            return brak
+
+        # NaN (brak postaci liniowej) -> None; inf (brak przejścia) zostaje
+        return {klucz: None if np.isnan(x) else float(x)
+                for klucz, x in (("Ms", wynik.Ms[0]), ("GM_dB", wynik.zapas_wzmocnienia_db[0]),
+                                 ("PM", wynik.zapas_fazy[0]))}
+
     def zbierz_dane(self):
         """Zbiera wszystkie raporty walidacji z katalogu wyników."""
         print(" Zbieranie danych z raportów walidacji...")
@@ -107,7 +155,9 @@ class GeneratorRaportuKoncowego:
                         "PASS": procent_pass >= prog_pass,  # Pass: ≥50% dla zbiorników, ≥40% dla wahadła
                         "czas_obliczen": None,  # Brak w raportach rozszerzonych
                         "typ_walidacji": "rozszerzona",
-                        "plik": plik.name
+                        "plik": plik.name,
+                        **self.zapasy_odpornosci(regulator, metoda, model,
+                                                 raport.get("parametry"), plik.parent),
                     })
                 except Exception as e:
                     print(f"[UWAGA] Błąd przy przetwarzaniu danych z {plik.name}: {e}")
@@ -151,7 +201,9 @@ class GeneratorRaportuKoncowego:
                         "PASS": raport.get("PASS", False),  # PASS z podstawowej walidacji
                         "czas_obliczen": None,
                         "typ_walidacji": "podstawowa",
-                        "plik": plik.name
+                        "plik": plik.name,
+                        **self.zapasy_odpornosci(regulator, metoda, model,
+                                                 raport.get("parametry"), plik.parent),
                     })
                 except Exception as e:
                     print(f"[UWAGA] Błąd przy czytaniu {plik.name}: {e}")
@@ -197,10 +249,22 @@ class GeneratorRaportuKoncowego:
                     "Mp_std": df_metoda["Mp"].std() if not df_metoda["Mp"].isna().all() else None,
                     "ts_mean": df_metoda["ts"].mean() if not df_metoda["ts"].isna().all() else None,
                     "czas_obliczen_mean": df_metoda["czas_obliczen"].mean() if not df_metoda["czas_obliczen"].isna().all() else None,
+                    # Zapasy odporności: średnia tylko ze skończonych wartości (GM/PM = inf - brak przejścia)
+                    "Ms_mean": self._srednia_skonczona(df_metoda, "Ms"),
+                    "GM_mean": self._srednia_skonczona(df_metoda, "GM_dB"),
+                    "PM_mean": self._srednia_skonczona(df_metoda, "PM"),
                 }
         
         return wyniki
     
+    @staticmethod
+    def _srednia_skonczona(df, kolumna):
+        if kolumna not in df:
+            return None
+        wartosci = pd.to_numeric(df[kolumna], errors="coerce")
+        wartosci = wartosci[np.isfinite(wartosci)]
+        return wartosci.mean() if not wartosci.empty else None
+    
     def utworz_tabele_porownawcze(self, df, wyniki_stats):
         """Tworzy tabele porównawcze w formacie HTML."""
         print("\n📋 Tworzenie tabel porównawczych...")
@@ -216,7 +280,7 @@ class GeneratorRaportuKoncowego:
             html.append("<table border='1' style='border-collapse: collapse; width: 100%;'>")
             html.append("<tr style='background-color: #4CAF50; color: white;'>")
             html.append("<th>Metoda</th><th>Pass Rate</th><th>IAE (śr±std)</th>")
-            html.append("<th>Mp% (śr±std)</th><th>ts (śr)</th></tr>")
+            html.append("<th>Mp% (śr±std)</th><th>ts (śr)</th><th>Ms (śr)</th><th>GM (śr)</th><th>PM (śr)</th></tr>")
             
             for metoda in self.metody:
                 if metoda not in wyniki_stats[model]:
@@ -261,6 +325,20 @@ class GeneratorRaportuKoncowego:
                 else:
                     html.append("<td>-</td>")
                 
+                # Zapasy odporności
+                if stats["Ms_mean"] is not None:
+                    html.append(f"<td>{stats['Ms_mean']:.2f}</td>")
+                else:
+                    html.append("<td>-</td>")
+                if stats["GM_mean"] is not None:
+                    html.append(f"<td>{stats['GM_mean']:.1f} dB</td>")
+                else:
+                    html.append("<td>-</td>")
+                if stats["PM_mean"] is not None:
+                    html.append(f"<td>{stats['PM_mean']:.1f}°</td>")
+                else:
+                    html.append("<td>-</td>")
+                
                 html.append("</tr>")
             
             html.append("</table><br>")
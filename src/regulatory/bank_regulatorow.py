@@ -0,0 +1,232 @@
+# src/regulatory/bank_regulatorow.py
+"""
+Bank regulatorów: wiele pętli P/PI/PD/PID o wspólnym okresie próbkowania,
+aktualizowanych jednym wektorowym wywołaniem na takt.
+
+Nastawy (Kp, Ti, Td, N, b, Kr, Tt), limity i stany (całka, filtr D,
+poprzedni pomiar) przechowywane są jako wektory NumPy (struktura tablic),
+po jednym elemencie na pętlę. Prawo sterowania jest identyczne z klasami
+regulator_p / Regulator_PI / regulator_pd / Regulator_PID:
+    u_raw = Kp (b r - y) + ui + vd + Kr r,   u = sat(u_raw)
+    vd   <- a vd - beta (y - y_prev)                       (Td > 0)
+    ui   <- ui + (Kp/Ti) e dt + (1/Tt) (u - u_raw) dt      (Ti zadane)
+
+Pętla bez całkowania ma Ti = None (NaN w wektorze), bez różniczkowania Td = 0.
+
+Benchmark (pętle na sekundę dla 1, 100 i 10 000 pętli, także w README):
+    python -m src.regulatory.bank_regulatorow
+"""
+import numpy as np
+
+from src.regulatory.regulator_bazowy import wspolczynniki_pid
+
+# Parametry nastaw w kolejności konstruktora
+_NASTAWY = ("Kp", "Ti", "Td", "N", "b", "Kr", "Tt")
+# Wektory przycinane przez zawez() (nastawy, współczynniki i stan)
+_POLA_WEKTOROWE = _NASTAWY + ("umin", "umax", "_calkuje", "_kp_ti", "_odwr_tt",
+                              "_a_d", "_beta_d", "_ui", "_vd", "_y_prev", "u")
+
+
+def _wektor(wartosc, n: int, dtype, brak=np.nan) -> np.ndarray:
+    """Skalar lub sekwencja (None = brak) jako wektor długości n."""
+    if wartosc is None:
+        return np.full(n, brak, dtype=dtype)
+    if np.isscalar(wartosc):
+        return np.full(n, wartosc, dtype=dtype)
+    wektor = np.array([brak if w is None else w for w in wartosc], dtype=dtype)
+    if wektor.shape != (n,):
+        raise ValueError(f"Oczekiwano {n} wartości, otrzymano {wektor.shape}")
+    return wektor
+
+
+class BankRegulatorow:
+    """
+    Opłaca się dopiero przy wielu pętlach: narzut wywołań NumPy na takt jest stały,
+    więc dla 1 pętli bank jest ok. 10x wolniejszy od Regulator_PID, przy 100 pętlach
+    ok. 4-7x szybszy, przy 10 000 ok. 75x (benchmark()). Pojedynczy regulator -
+    klasy skalarne; bank - siatka kandydatów (symuluj_wsadowo).
+
+    Parametry (skalar wspólny dla wszystkich pętli lub sekwencja długości n):
+    - Kp: wzmocnienie proporcjonalne (wyznacza liczbę pętli n)
+    - Ti: stała całkowania [s]; None / NaN = pętla bez całkowania (P, PD)
+    - Td: stała różniczkowania [s]; 0 = bez członu D (P, PI)
+    - N: współczynnik filtra pochodnej (domyślnie 10.0)
+    - b, Kr: waga wartości zadanej i feedforward (domyślnie 1.0)
+    - Tt: stała anti-windup; None / NaN = Ti
+    - umin, umax: ograniczenia sygnału; None = brak
+    - dt: wspólny okres próbkowania
+    """
+
+    def __init__(self, Kp, Ti=None, Td=0.0, dt: float = 0.05, umin=None, umax=None,
+                 b=1.0, Kr=1.0, N=10.0, Tt=None, dtype=np.float64):
+        n = 1 if np.isscalar(Kp) else len(Kp)
+        self.n = n
+        self.dt = float(dt)
+        self.dtype = dtype
+        self.Kp = _wektor(Kp, n, dtype)
+        self.Ti = _wektor(Ti, n, dtype)
+        self.Td = _wektor(Td, n, dtype, brak=0.0)
+        self.N = _wektor(N, n, dtype)
+        self.b = _wektor(b, n, dtype)
+        self.Kr = _wektor(Kr, n, dtype)
+        Tt = _wektor(Tt, n, dtype)
+        self.Tt = np.where(np.isnan(Tt), self.Ti, Tt)
+        self.umin = _wektor(umin, n, dtype, brak=-np.inf)
+        self.umax = _wektor(umax, n, dtype, brak=np.inf)
+
+        # Walidacja jak w klasach skalarnych
+        if self.dt <= 0:
+            raise ValueError("dt musi być > 0")
+        self._calkuje = ~np.isnan(self.Ti)
+        if np.any(self.Ti[self._calkuje] <= 0):
+            raise ValueError("Ti musi być > 0")
+        if np.any(self.Tt[self._calkuje] <= 0):
+            raise ValueError("Tt musi być > 0")
+        if np.any(self.Td < 0):
+            raise ValueError("Td musi być >= 0")
+        if np.any(self.N[self.Td > 0] <= 0):
+            raise ValueError("N musi być > 0")
+
+        # Współczynniki: całka (0 dla pętli bez I) i filtr D (0 dla Td = 0)
+        ki, a, beta = wspolczynniki_pid(self.Kp, self.Ti, self.Td, self.N, self.dt)
+        self._kp_ti = ki.astype(dtype)
+        self._a_d = a.astype(dtype)
+        self._beta_d = beta.astype(dtype)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._odwr_tt = np.where(self._calkuje, 1.0 / self.Tt, 0.0).astype(dtype)
+        self._przelicz_flagi()
+
+        self._ui = np.zeros(n, dtype=dtype)
+        self._vd = np.zeros(n, dtype=dtype)
+        self._y_prev = np.full(n, np.nan, dtype=dtype)  # NaN = pierwszy pomiar
+        self.u = np.zeros(n, dtype=dtype)
+
+    @classmethod
+    def z_regulatorow(cls, regulatory, dtype=np.float64) -> "BankRegulatorow":
+        """Bank z listy obiektów regulatorów (nastawy i bieżący stan)."""
+        dt = {r.dt for r in regulatory}
+        if len(dt) != 1:
+            raise ValueError("Regulatory w banku muszą mieć wspólny okres próbkowania dt")
+
+        def pole(nazwa, domyslna=None):
+            return [getattr(r, nazwa, domyslna) for r in regulatory]
+
+        calkujace = [r._calkowanie for r in regulatory]
+        rozniczkujace = [r._rozniczkowanie for r in regulatory]
+        bank = cls(
+            Kp=pole("Kp"),
+            Ti=[r.Ti if c else None for r, c in zip(regulatory, calkujace)],
+            Td=[r.Td if d else 0.0 for r, d in zip(regulatory, rozniczkujace)],
+            dt=dt.pop(), umin=pole("umin"), umax=pole("umax"), b=pole("b"), Kr=pole("Kr"),
+            N=[r.N if d else 10.0 for r, d in zip(regulatory, rozniczkujace)],
+            Tt=[r.Tt if c else None for r, c in zip(regulatory, calkujace)],
+            dtype=dtype,
+        )
+        bank._ui[:] = [getattr(r, "_ui", 0.0) for r in regulatory]
+        bank._vd[:] = [getattr(r, "_vd", 0.0) for r in regulatory]
+        bank._y_prev[:] = [np.nan if getattr(r, "_y_prev", None) is None else r._y_prev
+                           for r in regulatory]
+        bank.u[:] = pole("u", 0.0)
+        return bank
+
+    def _przelicz_flagi(self):
+        self._czy_calkowanie = bool(self._calkuje.any())
+        self._wszystkie_calkuja = bool(self._calkuje.all())
+        rozniczkuje = self.Td > 0
+        self._czy_rozniczkowanie = bool(rozniczkuje.any())
+        self._wszystkie_rozniczkuja = bool(rozniczkuje.all())
+        self._rozniczkuje = rozniczkuje
+
+    def reset(self, maska=None):
+        """Zeruje stan wszystkich pętli lub tylko wskazanych maską."""
+        if maska is None:
+            maska = slice(None)
+        self._ui[maska] = 0.0
+        self._vd[maska] = 0.0
+        self._y_prev[maska] = np.nan
+        self.u[maska] = 0.0
+
+    def update(self, r, y) -> np.ndarray:
+        """
+        Jeden takt wszystkich pętli.
+
+        Args:
+            r: wartości zadane (skalar wspólny lub wektor (n,))
+            y: pomiary (n,)
+
+        Returns:
+            Sterowania u (n,)
+        """
+        y = np.asarray(y, dtype=self.dtype)
+        # Inicjalizacja poprzedniego pomiaru przy pierwszym takcie pętli
+        pierwsze = np.isnan(self._y_prev)
+        if pierwsze.any():
+            self._y_prev = np.where(pierwsze, y, self._y_prev)
+
+        # Część proporcjonalna (waga b)
+        u_p = self.Kp * (self.b * r - y)
+
+        # Część różniczkująca na pomiar (filtrowana)
+        if self._czy_rozniczkowanie:
+            vd = self._a_d * self._vd - self._beta_d * (y - self._y_prev)
+            self._vd = vd if self._wszystkie_rozniczkuja else np.where(self._rozniczkuje, vd, 0.0)
+        self._y_prev = np.array(y, dtype=self.dtype)
+
+        # Sygnał przed saturacją i saturacja
+        u_raw = u_p + self._ui + self._vd + self.Kr * r
+        u = np.minimum(self.umax, np.maximum(self.umin, u_raw))
+
+        # Anti-windup: back-calculation
+        if self._czy_calkowanie:
+            e = r - y
+            du = self._kp_ti * e * self.dt + self._odwr_tt * (u - u_raw) * self.dt
+            self._ui = self._ui + (du if self._wszystkie_calkuja
+                                   else np.where(self._calkuje, du, 0.0))
+
+        self.u = u
+        return u
+
+    def zawez(self, maska: np.ndarray):
+        """Zostawia tylko pętle wskazane maską (nastawy, limity i stan)."""
+        for pole in _POLA_WEKTOROWE:
+            setattr(self, pole, getattr(self, pole)[maska])
+        self.n = len(self.Kp)
+        self._przelicz_flagi()
+
+
+def benchmark(liczby_petli=(1, 100, 10_000), takty: int = 2000):
+    """Pętle na sekundę: bank vs osobne obiekty Regulator_PID."""
+    import time
+    from src.regulatory.regulator_pid import Regulator_PID
+
+    rng = np.random.default_rng(0)
+    print(f"{'pętle':>8} {'obiekty [pętli/s]':>20} {'bank [pętli/s]':>18} {'przyspieszenie':>15}")
+    for n in liczby_petli:
+        Kp = rng.uniform(0.5, 5.0, n)
+        Ti = rng.uniform(5.0, 50.0, n)
+        Td = rng.uniform(0.0, 3.0, n)
+        y = rng.normal(0.0, 0.1, (takty, n))
+
+        # Obiekty skalarne: ograniczona liczba taktów, żeby 10k pętli nie trwało minut
+        takty_obiekty = max(1, min(takty, 200_000 // n))
+        obiekty = [Regulator_PID(Kp=kp, Ti=ti, Td=td, dt=0.05, umin=-15.0, umax=15.0)
+                   for kp, ti, td in zip(Kp, Ti, Td)]
+        t0 = time.perf_counter()
+        for k in range(takty_obiekty):
+            y_k = y[k].tolist()
+            for regulator, y_i in zip(obiekty, y_k):
+                regulator.update(1.0, y_i)
+        czas_obiekty = (time.perf_counter() - t0) / takty_obiekty
+
+        bank = BankRegulatorow(Kp, Ti, Td, dt=0.05, umin=-15.0, umax=15.0)
+        t0 = time.perf_counter()
+        for k in range(takty):
+            bank.update(1.0, y[k])
+        czas_bank = (time.perf_counter() - t0) / takty
+
+        print(f"{n:>8} {n / czas_obiekty:>20,.0f} {n / czas_bank:>18,.0f} "
+              f"{czas_obiekty / czas_bank:>14.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
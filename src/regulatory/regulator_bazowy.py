@@ -2,9 +2,126 @@
 Klasa bazowa dla wszystkich regulatorów.
 Każdy regulator powinien implementować metodę update(r, y),
 gdzie r - wartość zadana, y - wartość zmierzona.
+
+update_block(r, y) przetwarza całe tablice (odtwarzanie zapisanych pomiarów
+w pętli otwartej) i zostawia regulator w tym samym stanie, co kolejne
+wywołania update().
+
+Regulatory P/PI/PD/PID udostępniają też swoje prawo sterowania bez saturacji
+jako dyskretny układ liniowy o wejściach [r, y] i wyjściu u:
+- model_stanowy_dyskretny(): (Ac, Bc, Cc, Dc), stan z wektor_stanu()
+- transmitancja_dyskretna(): (num_r, num_y, den) w potęgach z^-1 (jak lfilter)
+Współczynniki członów I i D (także dla tablic nastaw - BankRegulatorow,
+analiza stabilności i zapasów) liczy jedna funkcja wspolczynniki_pid().
 """
+import numpy as np
+from scipy.signal import lfilter
+
+from src.migawka import ZMigawka
+
+
+def filtr_d_blok(y: np.ndarray, y_prev: float, vd0: float, a: float, beta: float) -> np.ndarray:
+    """
+    Filtrowany człon D na pomiarze dla całego bloku jako filtr IIR:
+        vd[k] = a * vd[k-1] - beta * (y[k] - y[k-1]),  vd[-1] = vd0, y[-1] = y_prev
+    """
+    dy = np.diff(y, prepend=y_prev)
+    return lfilter([-beta], [1.0, -a], dy, zi=[a * vd0])[0]
+
+
+def wspolczynniki_pid(Kp, Ti, Td, N, dt):
+    """
+    Współczynniki dyskretnego PID dla skalarów lub tablic nastaw:
+        ki   = Kp / Ti                  ui += ki e dt  (0 bez członu I: Ti = None / NaN)
+        a    = Td / (Td + N dt)         vd[k] = a vd[k-1] - beta (y[k] - y[k-1])
+        beta = Kp Td N / (Td + N dt)    (a = beta = 0 bez członu D: Td = 0)
+
+    Returns:
+        (ki, a, beta) - tablice float64 o kształcie nastaw
+    """
+    Kp, Ti, Td, N = (np.asarray(np.nan if x is None else x, dtype=float) for x in (Kp, Ti, Td, N))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ki = np.where(np.isnan(Ti), 0.0, Kp / Ti)
+        denom = Td + N * dt
+        rozniczkuje = Td > 0.0
+        a = np.where(rozniczkuje, Td / denom, 0.0)
+        beta = np.where(rozniczkuje, Kp * Td * N / denom, 0.0)
+    return ki, a, beta
+
+
+def calkowanie_blok(v: np.ndarray, e: np.ndarray, ui0: float, ki_dt: float, kaw_dt: float,
+                    umin=None, umax=None, okno: int = 4096):
+    """
+    Człon całkujący z saturacją i anti-windup (back-calculation) dla bloku:
+        u_raw = v[k] + ui,  u = sat(u_raw),  ui += ki_dt * e[k] + kaw_dt * (u - u_raw)
+
+    Poza saturacją całka to skumulowana suma e (wektorowo, w oknach po
+    `okno` próbek); odcinki w saturacji liczone są w ciasnej pętli.
+
+    Returns:
+        (u, ui) - sterowanie dla bloku i stan całki po ostatniej próbce
+    """
+    n = len(v)
+    u = np.empty(n)
+    lo = -np.inf if umin is None else umin
+    hi = np.inf if umax is None else umax
+    calka = float(ui0)
+    v_l = e_l = None  # listy Pythona dla pętli (szybszy dostęp niż do elementów tablic)
+    k = 0
+    while k < n:
+        # Odcinek liniowy: całka na początku każdej próbki okna
+        k1 = min(n, k + okno)
+        ui = calka + ki_dt * np.concatenate(([0.0], np.cumsum(e[k:k1])))
+        u_raw = v[k:k1] + ui[:-1]
+        nasycone = np.flatnonzero((u_raw < lo) | (u_raw > hi))
+        if nasycone.size == 0:
+            u[k:k1] = u_raw
+            calka = float(ui[-1])
+            k = k1
+            continue
+        s = k + int(nasycone[0])
+        u[k:s] = u_raw[:s - k]
+        calka = float(ui[s - k])
+        # Saturacja: pętla do pierwszej próbki, w której sterowanie z niej wychodzi
+        if v_l is None:
+            v_l, e_l = v.tolist(), e.tolist()
+        odcinek = []
+        k = s
+        while k < n:
+            u_raw_k = v_l[k] + calka
+            u_k = min(hi, max(lo, u_raw_k))
+            calka += ki_dt * e_l[k] + kaw_dt * (u_k - u_raw_k)
+            odcinek.append(u_k)
+            k += 1
+            if u_k == u_raw_k:
+                break
+        u[s:k] = odcinek
+    return u, calka
+
+
+def _wielomian_z(*czynniki) -> np.ndarray:
+    """Iloczyn wielomianów w z^-1 (współczynniki rosnąco)."""
+    wynik = np.array([1.0])
+    for czynnik in czynniki:
+        wynik = np.convolve(wynik, czynnik)
+    return wynik
+
+
+def _suma_z(*wielomiany) -> np.ndarray:
+    """Suma wielomianów w z^-1 różnej długości."""
+    wynik = np.zeros(max(len(w) for w in wielomiany))
+    for w in wielomiany:
+        wynik[:len(w)] += w
+    return wynik
+
+
+class RegulatorBazowy(ZMigawka):
+    # Stan regulatora zapisywany przez snapshot()/restore()
+    _pola_stanu = ("u",)
+    # Człony obecne w prawie sterowania (postać liniowa: I - stan ui, D - stany vd, y_prev)
+    _calkowanie = False
+    _rozniczkowanie = False
 
-class RegulatorBazowy:
     def __init__(self, dt: float = 0.05, umin=None, umax=None):
         self.dt = float(dt)
         self.u = 0.0
@@ -21,5 +138,119 @@ class RegulatorBazowy:
             u = min(self.umax, u)
         return u
 
+    def _saturate_blok(self, u: np.ndarray) -> np.ndarray:
+        if self.umin is None and self.umax is None:
+            return u
+        return np.clip(u, self.umin, self.umax)
+
+    @staticmethod
+    def _tablice_bloku(r, y):
+        """r (skalar lub tablica) i y jako tablice float tej samej długości."""
+        y = np.asarray(y, dtype=float)
+        r = np.broadcast_to(np.asarray(r, dtype=float), y.shape)
+        return r, y
+
+    def _wspolczynniki_d(self):
+        """Współczynniki filtra D na pomiarze: vd[k] = a vd[k-1] - beta (y[k] - y[k-1])."""
+        _, a, beta = wspolczynniki_pid(self.Kp, None, self.Td, self.N, self.dt)
+        return float(a), float(beta)
+
+    def _czlon_d(self) -> bool:
+        return self._rozniczkowanie and self.Td > 0.0
+
+    def model_stanowy_dyskretny(self):
+        """
+        Prawo sterowania bez saturacji jako układ dyskretny, wejścia [r, y]:
+            c[k+1] = Ac c[k] + Bc [r, y],   u[k] = Cc c[k] + Dc [r, y]
+        Stany (wektor_stanu): ui (człon I), vd i y_prev (człon D) - tylko obecne.
+        W saturacji dochodzi korekta anti-windup wzmocnienie_antywindup() * (u - u_raw).
+        """
+        Kp, b, Kr, dt = self.Kp, self.b, self.Kr, self.dt
+        n = int(self._calkowanie) + 2 * int(self._czlon_d())
+        Ac = np.zeros((n, n))
+        Bc = np.zeros((n, 2))
+        Cc = np.zeros((1, n))
+        Dc = np.array([[Kp * b + Kr, -Kp]])
+
+        i = 0
+        if self._calkowanie:
+            # ui[k+1] = ui[k] + (Kp/Ti) dt (r - y)
+            ki = float(wspolczynniki_pid(Kp, self.Ti, 0.0, self.N, dt)[0]) * dt
+            Ac[i, i] = 1.0
+            Bc[i] = [ki, -ki]
+            Cc[0, i] = 1.0
+            i += 1
+        if self._czlon_d():
+            # vd[k] = a vd[k-1] - beta (y[k] - y_prev),  u zawiera vd[k]
+            a, beta = self._wspolczynniki_d()
+            iv, ip = i, i + 1
+            Ac[iv, iv] = a
+            Ac[iv, ip] = beta
+            Bc[iv, 1] = -beta
+            Bc[ip, 1] = 1.0
+            Cc[0, iv] = a
+            Cc[0, ip] = beta
+            Dc[0, 1] -= beta
+        return Ac, Bc, Cc, Dc
+
+    def wzmocnienie_antywindup(self) -> np.ndarray:
+        """Wzmocnienie korekty stanu (u - u_raw) w saturacji: dt/Tt na stanie ui."""
+        g_aw = np.zeros(int(self._calkowanie) + 2 * int(self._czlon_d()))
+        if self._calkowanie:
+            g_aw[0] = self.dt / self.Tt
+        return g_aw
+
+    def wektor_stanu(self) -> np.ndarray:
+        """Aktualny stan zgodny z model_stanowy_dyskretny(); y_prev = NaN przed pierwszym pomiarem."""
+        stan = []
+        if self._calkowanie:
+            stan.append(self._ui)
+        if self._czlon_d():
+            stan += [self._vd, np.nan if self._y_prev is None else self._y_prev]
+        return np.array(stan, dtype=float)
+
+    def ustaw_wektor_stanu(self, c):
+        """Ustawia stan z wektora c (odwrotność wektor_stanu())."""
+        stan = [float(v) for v in c]
+        if self._calkowanie:
+            self._ui = stan.pop(0)
+        if self._czlon_d():
+            self._vd, y_prev = stan
+            self._y_prev = None if np.isnan(y_prev) else y_prev
+
+    def transmitancja_dyskretna(self):
+        """
+        Transmitancje bez saturacji U(z) = [num_r R(z) + num_y Y(z)] / den,
+        współczynniki w rosnących potęgach z^-1 (gotowe dla scipy.signal.lfilter):
+            P:  Kp (b r - y) + Kr r
+            I:  (Kp/Ti) dt z^-1 / (1 - z^-1) * (r - y)
+            D:  -beta (1 - z^-1) / (1 - a z^-1) * y
+        """
+        Kp, b, Kr = self.Kp, self.b, self.Kr
+        calka = [1.0, -1.0] if self._calkowanie else [1.0]
+        filtr = [1.0]
+        if self._czlon_d():
+            a, beta = self._wspolczynniki_d()
+            filtr = [1.0, -a]
+        den = _wielomian_z(calka, filtr)
+        num_r = (Kp * b + Kr) * den
+        num_y = -Kp * den
+        if self._calkowanie:
+            ki = float(wspolczynniki_pid(Kp, self.Ti, 0.0, self.N, self.dt)[0]) * self.dt
+            czlon_i = _wielomian_z([0.0, ki], filtr)
+            num_r = _suma_z(num_r, czlon_i)
+            num_y = _suma_z(num_y, -czlon_i)
+        if self._czlon_d():
+            num_y = _suma_z(num_y, -beta * _wielomian_z([1.0, -1.0], calka))
+        return num_r, num_y, den
+
     def update(self, r: float, y: float) -> float:
         raise NotImplementedError("Metoda update() musi zostać zaimplementowana w klasie pochodnej.")
+
+    def update_block(self, r, y) -> np.ndarray:
+        """
+        Odtwarzanie w pętli otwartej: sterowanie u[k] dla zapisanych r[k], y[k].
+        Domyślnie kolejne wywołania update(); klasy pochodne liczą to wektorowo.
+        """
+        r, y = self._tablice_bloku(r, y)
+        return np.array([self.update(float(r_k), float(y_k)) for r_k, y_k in zip(r, y)])
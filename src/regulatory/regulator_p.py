@@ -1,3 +1,5 @@
+import numpy as np
+
 from src.regulatory.regulator_bazowy import RegulatorBazowy
 
 
@@ -60,3 +62,11 @@ class regulator_p(RegulatorBazowy):
         u = self._saturate(u)
         self.u = u
         return u
+
+    def update_block(self, r, y) -> np.ndarray:
+        """Odtwarzanie zapisanych r, y: prawo P jest bez pamięci, więc w całości wektorowe."""
+        r, y = self._tablice_bloku(r, y)
+        u = self._saturate_blok(self.Kp * (self.b * r - y) + self.Kr * r)
+        if u.size:
+            self.u = float(u[-1])
+        return u
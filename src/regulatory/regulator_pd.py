@@ -1,4 +1,6 @@
-from src.regulatory.regulator_bazowy import RegulatorBazowy
+import numpy as np
+
+from src.regulatory.regulator_bazowy import RegulatorBazowy, filtr_d_blok
 
 
 class regulator_pd(RegulatorBazowy):
@@ -25,6 +27,9 @@ class regulator_pd(RegulatorBazowy):
     - Ti, Tt (ignorowane)
     """
 
+    _rozniczkowanie = True
+    _pola_stanu = ("u", "_vd", "_y_prev")
+
     def __init__(
         self,
         Kp: float = 1.0,
@@ -52,10 +57,6 @@ class regulator_pd(RegulatorBazowy):
         # Stany wewnętrzne filtra D
         self._vd = 0.0
         self._y_prev = None  # typ: Optional[float]
-        # Buforowane współczynniki filtra D
-        self._a_d = 0.0
-        self._beta_d = 0.0
-        self._d_ready = False
 
     # Walidacja podstawowa
         if self.dt <= 0:
@@ -65,6 +66,9 @@ class regulator_pd(RegulatorBazowy):
         if self.N <= 0:
             raise ValueError("N musi być > 0")
 
+        # Współczynniki filtra D (vd = a_d vd - beta_d dy)
+        self._a_d, self._beta_d = self._wspolczynniki_d()
+
     def reset(self):
         super().reset()
         self._vd = 0.0
@@ -81,11 +85,6 @@ class regulator_pd(RegulatorBazowy):
 
         # Część różniczkująca na pomiar (bez pochodnej z r, brak "kopa")
         if self.Td > 0.0:
-            if not self._d_ready:
-                denom = (self.Td + self.N * self.dt)
-                self._a_d = self.Td / denom
-                self._beta_d = (self.Kp * self.Td * self.N) / denom
-                self._d_ready = True
             dy = y - self._y_prev
             self._vd = self._a_d * self._vd - self._beta_d * dy
         else:
@@ -100,3 +99,23 @@ class regulator_pd(RegulatorBazowy):
         u = self._saturate(u)
         self.u = u
         return u
+
+    def update_block(self, r, y) -> np.ndarray:
+        """Odtwarzanie zapisanych r, y: P wektorowo, filtrowane D jako filtr IIR."""
+        r, y = self._tablice_bloku(r, y)
+        if y.size == 0:
+            return np.empty(0)
+        if self._y_prev is None:
+            self._y_prev = float(y[0])
+
+        if self.Td > 0.0:
+            vd = filtr_d_blok(y, self._y_prev, self._vd, self._a_d, self._beta_d)
+            self._vd = float(vd[-1])
+        else:
+            vd = 0.0
+            self._vd = 0.0
+        self._y_prev = float(y[-1])
+
+        u = self._saturate_blok(self.Kp * (self.b * r - y) + vd + self.Kr * r)
+        self.u = float(u[-1])
+        return u
@@ -1,5 +1,7 @@
 # src/regulatory/regulator_pi.py
-from src.regulatory.regulator_bazowy import RegulatorBazowy
+import numpy as np
+
+from src.regulatory.regulator_bazowy import RegulatorBazowy, calkowanie_blok
 
 
 class Regulator_PI(RegulatorBazowy):
@@ -22,6 +24,9 @@ class Regulator_PI(RegulatorBazowy):
     - Td, N (ignorowane)
     """
 
+    _calkowanie = True
+    _pola_stanu = ("u", "_ui")
+
     def __init__(
         self,
         Kp: float = 1.0,
@@ -94,3 +99,17 @@ class Regulator_PI(RegulatorBazowy):
 
         self.u = u
         return u
+
+    def update_block(self, r, y) -> np.ndarray:
+        """
+        Odtwarzanie zapisanych r, y: P i feedforward wektorowo, całkowanie
+        z anti-windup w ciasnej pętli tylko od pierwszej saturacji.
+        """
+        r, y = self._tablice_bloku(r, y)
+        if y.size == 0:
+            return np.empty(0)
+        v = self.Kp * (self.b * r - y) + self.Kr * r
+        u, self._ui = calkowanie_blok(v, r - y, self._ui, (self.Kp / self.Ti) * self.dt,
+                                      (1.0 / self.Tt) * self.dt, self.umin, self.umax)
+        self.u = float(u[-1])
+        return u
@@ -1,5 +1,7 @@
 # src/regulatory/regulator_pid.py
-from src.regulatory.regulator_bazowy import RegulatorBazowy
+import numpy as np
+
+from src.regulatory.regulator_bazowy import RegulatorBazowy, calkowanie_blok, filtr_d_blok
 
 
 class Regulator_PID(RegulatorBazowy):
@@ -22,6 +24,10 @@ class Regulator_PID(RegulatorBazowy):
     - umin, umax: ograniczenia sygnału (domyślnie None — brak saturacji)
     """
 
+    _calkowanie = True
+    _rozniczkowanie = True
+    _pola_stanu = ("u", "_ui", "_vd", "_y_prev")
+
     def __init__(
         self,
         Kp: float = 1.0,
@@ -57,10 +63,6 @@ class Regulator_PID(RegulatorBazowy):
         self._ui = 0.0
         self._vd = 0.0
         self._y_prev = None
-        # Buforowane współczynniki filtra D
-        self._a_d = 0.0
-        self._beta_d = 0.0
-        self._d_ready = False
 
         # Walidacja
         if self.dt <= 0:
@@ -74,6 +76,9 @@ class Regulator_PID(RegulatorBazowy):
         if self.Tt <= 0:
             raise ValueError("Tt musi być > 0")
 
+        # Współczynniki filtra D (vd = a_d vd - beta_d dy)
+        self._a_d, self._beta_d = self._wspolczynniki_d()
+
     def reset(self):
         super().reset()
         self._ui = 0.0
@@ -97,12 +102,6 @@ class Regulator_PID(RegulatorBazowy):
 
         # Część różniczkująca na pomiar (filtrowana)
         if self.Td > 0.0:
-            if not self._d_ready:
-                # Prekomputacja współczynników filtra D
-                denom = (self.Td + self.N * self.dt)
-                self._a_d = self.Td / denom
-                self._beta_d = (self.Kp * self.Td * self.N) / denom
-                self._d_ready = True
             dy = y - self._y_prev
             self._vd = self._a_d * self._vd - self._beta_d * dy
         else:
@@ -122,3 +121,28 @@ class Regulator_PID(RegulatorBazowy):
 
         self.u = u
         return u
+
+    def update_block(self, r, y) -> np.ndarray:
+        """
+        Odtwarzanie zapisanych r, y: P, feedforward i filtrowane D (filtr IIR)
+        wektorowo, całkowanie z anti-windup w ciasnej pętli od pierwszej saturacji.
+        """
+        r, y = self._tablice_bloku(r, y)
+        if y.size == 0:
+            return np.empty(0)
+        if self._y_prev is None:
+            self._y_prev = float(y[0])
+
+        if self.Td > 0.0:
+            vd = filtr_d_blok(y, self._y_prev, self._vd, self._a_d, self._beta_d)
+            self._vd = float(vd[-1])
+        else:
+            vd = 0.0
+            self._vd = 0.0
+        self._y_prev = float(y[-1])
+
+        v = self.Kp * (self.b * r - y) + vd + self.Kr * r
+        u, self._ui = calkowanie_blok(v, r - y, self._ui, (self.Kp / self.Ti) * self.dt,
+                                      (1.0 / self.Tt) * self.dt, self.umin, self.umax)
+        self.u = float(u[-1])
+        return u
@@ -0,0 +1,75 @@
+# src/rejestr.py
+"""
+Rejestr modeli i regulatorów.
+
+Zastępuje dynamiczny import przy każdej symulacji: klasa, zbiór argumentów
+konstruktora i gotowa fabryka wyznaczane są raz na proces (importlib + dir()
++ inspect.signature), a potem pobierane z pamięci podręcznej. Strojenie
+(także w procesach joblib), walidacja i walidacja rozszerzona korzystają
+z tych samych wpisów.
+"""
+import importlib
+import inspect
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional
+
+
+@dataclass(frozen=True)
+class WpisRegulatora:
+    """Klasa regulatora z wyznaczonymi raz argumentami konstruktora."""
+    nazwa: str
+    klasa: type
+    argumenty: FrozenSet[str]
+
+    def filtruj(self, parametry: Dict) -> Dict:
+        """Parametry przyjmowane przez konstruktor (bez wartości None)."""
+        return {k: v for k, v in parametry.items() if k in self.argumenty and v is not None}
+
+    def utworz(self, parametry: Dict, dt: float, umin: Optional[float] = -15.0,
+               umax: Optional[float] = 15.0):
+        """Regulator z nastawami `parametry` i okresem próbkowania dt."""
+        return self.klasa(**self.filtruj(parametry), dt=dt, umin=umin, umax=umax)
+
+
+@dataclass(frozen=True)
+class WpisModelu:
+    """Klasa modelu procesu."""
+    nazwa: str
+    klasa: type
+
+    def utworz(self, **parametry_modelu):
+        return self.klasa(**parametry_modelu)
+
+
+def _importuj_klase(typ: str, nazwa: str) -> type:
+    """Klasa z modułu src.{typ}.{nazwa}: o nazwie równej (bez wielkości liter) nazwie modułu."""
+    modul = importlib.import_module(f"src.{typ}.{nazwa}")
+    for attr in dir(modul):
+        if attr.lower() == nazwa.lower():
+            return getattr(modul, attr)
+    # fallback – pierwsza klasa nieukryta
+    return getattr(modul, [a for a in dir(modul) if not a.startswith("_")][0])
+
+
+@lru_cache(maxsize=None)
+def _wpis_regulatora_klasy(klasa: type) -> WpisRegulatora:
+    argumenty = frozenset(inspect.signature(klasa.__init__).parameters) - {"self"}
+    return WpisRegulatora(nazwa=klasa.__name__.lower(), klasa=klasa, argumenty=argumenty)
+
+
+@lru_cache(maxsize=None)
+def regulator(nazwa: str) -> WpisRegulatora:
+    """Wpis regulatora po nazwie modułu (np. 'regulator_pid')."""
+    return _wpis_regulatora_klasy(_importuj_klase("regulatory", nazwa))
+
+
+def regulator_klasy(klasa: type) -> WpisRegulatora:
+    """Wpis dla już zaimportowanej klasy regulatora (strojenie przekazuje klasy)."""
+    return _wpis_regulatora_klasy(klasa)
+
+
+@lru_cache(maxsize=None)
+def model(nazwa: str) -> WpisModelu:
+    """Wpis modelu po nazwie modułu (np. 'dwa_zbiorniki')."""
+    return WpisModelu(nazwa=nazwa, klasa=_importuj_klase("modele", nazwa))
@@ -0,0 +1,138 @@
+# src/strojenie/archiwum_kandydatow.py
+"""
+Archiwum metryk wszystkich kandydatów przeszukiwania siatki.
+
+Metryki kandydata (IAE, Mp, t_s, ..., std(u)) zależą tylko od nastaw
+i ustawień symulacji, a nie od wag kary. Po jednym przebiegu siatki
+ranking dla nowych wag_kary to jedno wywołanie FunkcjaKary.wsadowo na
+tablicach z archiwum - bez ponownej symulacji.
+
+Plik kandydaci_{regulator}_{model}.json przechowuje kolumny (listy
+wartości, null = brak) oraz odcisk ustawień symulacji - archiwum
+z innym odciskiem (zmieniony model, Ts, horyzont, ...) jest nieaktualne.
+Kandydaci archiwum symulowani są bez przerywania ograniczeniem kosztu
+(próg zależy od wag kary), więc metryki ma każdy kandydat poza rozbieżnymi
+i odrzuconymi filtrem stabilności - ci mają w kolumnach metryk null.
+Obwiednia rozbieżności i ustawienia filtra są częścią odcisku.
+"""
+import json
+import os
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.metryki import Metryki
+
+PARAMETRY = ("Kp", "Ti", "Td")
+
+
+@dataclass
+class MetrykiKandydata(Metryki):
+    """Metryki kandydata strojenia razem z std(u) (kara za stałe sterowanie)."""
+    odchylenie_u: float = float("nan")
+
+
+POLA_METRYK = tuple(f.name for f in fields(MetrykiKandydata))
+# Metryki, od których zależy kara (czas narastania bywa NaN, np. dla r = 0)
+POLA_KARY = ("IAE", "przeregulowanie", "czas_ustalania", "odchylenie_u")
+
+
+def sciezka_archiwum(regulator: str, model: str, katalog: str = "wyniki") -> str:
+    return os.path.join(katalog, f"kandydaci_{regulator}_{model}.json")
+
+
+def _kolumna(wartosci) -> np.ndarray:
+    """Lista z null -> tablica z NaN."""
+    return np.array([np.nan if x is None else x for x in wartosci], dtype=float)
+
+
+def _lista(kolumna: np.ndarray) -> list:
+    """Tablica z NaN -> lista z None (poprawny JSON)."""
+    return [None if not np.isfinite(x) else float(x) for x in kolumna]
+
+
+@dataclass
+class ArchiwumKandydatow:
+    regulator: str
+    model: str
+    odcisk: str  # ustawienia symulacji, dla których policzono metryki
+    parametry: Dict[str, np.ndarray]  # Kp, Ti, Td (NaN - brak członu)
+    metryki: Dict[str, np.ndarray]  # POLA_METRYK (NaN - brak metryk)
+
+    def __len__(self):
+        return len(self.parametry["Kp"])
+
+    @property
+    def ocenione(self) -> np.ndarray:
+        """Maska kandydatów z metrykami potrzebnymi do kary."""
+        return np.all([np.isfinite(self.metryki[p]) for p in POLA_KARY], axis=0)
+
+    def kary(self, funkcja_kary) -> np.ndarray:
+        """Kary wszystkich kandydatów (inf dla kandydatów bez metryk)."""
+        kary = np.full(len(self), np.inf)
+        m = self.ocenione
+        if m.any():
+            kary[m] = funkcja_kary.wsadowo(
+                self.metryki["IAE"][m], self.metryki["przeregulowanie"][m],
+                self.metryki["czas_ustalania"][m], self.metryki["odchylenie_u"][m],
+                self.parametry["Kp"][m], self.parametry["Ti"][m], self.parametry["Td"][m])
+        return kary
+
+    def najlepszy(self, funkcja_kary) -> Optional[Tuple[Dict, float]]:
+        """(nastawy, kara) kandydata o najmniejszej karze lub None, gdy brak ocenionych."""
+        kary = self.kary(funkcja_kary)
+        if not np.isfinite(kary).any():
+            return None
+        i = int(np.argmin(kary))
+        nastawy = {k: (None if np.isnan(self.parametry[k][i]) else float(self.parametry[k][i]))
+                   for k in PARAMETRY}
+        return nastawy, float(kary[i])
+
+
+def zapisz_archiwum(kandydaci: List[Tuple[Dict, object]], regulator: str, model: str,
+                    odcisk: str, katalog: str = "wyniki") -> str:
+    """
+    Zapisuje listę (parametry, metryki) do kandydaci_{regulator}_{model}.json.
+    Metryki inne niż MetrykiKandydata (None, metryki zastępcze) zapisywane są jako brak.
+    """
+    parametry = {k: _kolumna([p.get(k) for p, _ in kandydaci]) for k in PARAMETRY}
+    metryki = {pole: np.full(len(kandydaci), np.nan) for pole in POLA_METRYK}
+    for i, (_, m) in enumerate(kandydaci):
+        if isinstance(m, MetrykiKandydata):
+            for pole in POLA_METRYK:
+                metryki[pole][i] = getattr(m, pole)
+
+    dane = {
+        "regulator": regulator,
+        "model": model,
+        "odcisk": odcisk,
+        "liczba_kandydatow": len(kandydaci),
+        "parametry": {k: _lista(v) for k, v in parametry.items()},
+        "metryki": {k: _lista(v) for k, v in metryki.items()},
+    }
+    os.makedirs(katalog, exist_ok=True)
+    sciezka = sciezka_archiwum(regulator, model, katalog)
+    with open(sciezka, "w", encoding="utf-8") as f:
+        json.dump(dane, f)
+    return sciezka
+
+
+def wczytaj_archiwum(regulator: str, model: str, katalog: str = "wyniki") -> Optional[ArchiwumKandydatow]:
+    """Archiwum zapisane przez zapisz_archiwum lub None, gdy brak (uszkodzonego) pliku."""
+    sciezka = sciezka_archiwum(regulator, model, katalog)
+    if not os.path.exists(sciezka):
+        return None
+    try:
+        with open(sciezka, "r", encoding="utf-8") as f:
+            dane = json.load(f)
+        return ArchiwumKandydatow(
+            regulator=dane["regulator"],
+            model=dane["model"],
+            odcisk=dane["odcisk"],
+            parametry={k: _kolumna(dane["parametry"][k]) for k in PARAMETRY},
+            metryki={k: _kolumna(dane["metryki"][k]) for k in POLA_METRYK},
+        )
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[UWAGA] Błąd wczytywania {sciezka}: {e}")
+        return None
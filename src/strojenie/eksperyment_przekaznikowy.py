@@ -0,0 +1,266 @@
+# src/strojenie/eksperyment_przekaznikowy.py
+"""
+Eksperyment przekaźnikowy (Åström–Hägglund): wyznaczenie wzmocnienia
+krytycznego Ku i okresu oscylacji Tu z cyklu granicznego pętli z przekaźnikiem.
+
+Regulator zastąpiony jest przekaźnikiem z histerezą ε co okres próbkowania Ts:
+    u = +h  gdy e = r - y >  ε
+    u = -h  gdy e < -ε      (w paśmie histerezy u bez zmian)
+Pętla wpada w cykl graniczny o amplitudzie a i okresie Tu; z funkcji
+opisującej przekaźnika z histerezą:
+    Ku = 4 h / (π sqrt(a² - ε²))
+Histereza przesuwa zidentyfikowany punkt charakterystyki Nyquista z osi
+-180° do fazy -180° + arcsin(ε / a) - przy a ≈ ε jest to punkt w pobliżu
+-90° i Ku, Tu nie opisują punktu krytycznego. Eksperyment kończy się, gdy
+średnia amplituda i okres z ostatnich cykli przestają się zmieniać
+względem poprzednich cykli (poniżej tolerancji).
+
+Histereza None (domyślnie) dobierana jest do obiektu: ε = max(krotność
+szumu y, histereza_wzgledna · a), gdzie a to amplituda próbnego przebiegu
+z ε równym samemu progowi szumu. Wynik z ε / a > PROG_HISTEREZY albo
+z okresem cyklu rzędu Ts (oscylacja wymuszona próbkowaniem, a nie
+dynamiką obiektu) albo bez ustalonego cyklu jest oznaczany jako
+niewiarygodny (powod_odrzucenia()).
+
+Wyniki zależą tylko od obiektu i ustawień eksperymentu, więc zapisywane są
+pod odciskiem obiektu (klasa + parametry + dt) - w pamięci procesu i w pliku
+JSON, żeby kolejne uruchomienia potoku nie powtarzały eksperymentu.
+"""
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.symulacja.silnik import krok_regulatora
+
+# Odcisk obiektu -> wynik (dict jak asdict(WynikPrzekaznika))
+_wyniki: Dict[str, dict] = {}
+
+# Wersja wzorów wyniku w odcisku - wyniki zapisane starszą wersją są liczone ponownie
+_WERSJA = 2
+# Maksymalne ε / a wiarygodnego wyniku (faza punktu -150°)
+PROG_HISTEREZY = 0.5
+# Minimalny okres cyklu granicznego w okresach próbkowania: opóźnienie o Ts daje
+# przy Tu opóźnienie fazy 360° Ts / Tu - przy krótszym okresie ponad 36° z 180°
+# pochodzi z próbkowania, a nie z dynamiki obiektu
+MIN_OKRES_TS = 10
+# Długość próbki wyjścia przy stałym sterowaniu do oszacowania szumu [okresy Ts]
+_PROBKI_SZUMU = 200
+
+
+@dataclass
+class WynikPrzekaznika:
+    Ku: float
+    Tu: float  # [s]
+    amplituda: float  # a - połowa rozpiętości y w cyklu
+    liczba_cykli: int
+    czas: float  # [s] czas trwania eksperymentu
+    zbiezny: bool  # False - przerwany po maks_czas, wynik z ostatnich cykli
+    histereza: float  # ε użyte w eksperymencie
+    faza: float  # [°] faza zidentyfikowanego punktu, -180 + arcsin(ε / a)
+    czas_probkowania: float  # [s] Ts przekaźnika
+
+    def powod_odrzucenia(self) -> Optional[str]:
+        """Opis, dlaczego Ku, Tu nie opisują punktu krytycznego, lub None."""
+        if self.histereza > PROG_HISTEREZY * self.amplituda:
+            return (f"amplituda a={self.amplituda:.4g} porównywalna z histerezą ε={self.histereza:.4g} "
+                    f"(faza punktu {self.faza:.0f}°)")
+        if self.Tu < MIN_OKRES_TS * self.czas_probkowania:
+            return f"okres cyklu Tu={self.Tu:.4g}s rzędu Ts={self.czas_probkowania:.4g}s (oscylacja próbkowania)"
+        if not self.zbiezny:
+            return f"cykl graniczny nieustalony w {self.czas:.0f}s"
+        return None
+
+
+def odcisk_obiektu(model, **ustawienia) -> str:
+    """
+    Odcisk obiektu: klasa i parametry (atrybuty poza polami stanu) razem
+    z dt, punktem pracy i ustawieniami eksperymentu przekazanymi w `ustawienia`.
+    """
+    parametry = {k: v for k, v in vars(model).items()
+                 if k not in model._pola_stanu and not k.startswith("_")}
+    opis = {
+        "wersja": _WERSJA,
+        "klasa": f"{type(model).__module__}.{type(model).__qualname__}",
+        "parametry": parametry,
+        "ustawienia": ustawienia,
+    }
+    tekst = json.dumps(opis, sort_keys=True, default=repr)
+    return hashlib.sha256(tekst.encode("utf-8")).hexdigest()[:16]
+
+
+def _cykle_graniczne(t_przelaczen: list, y_min: list, y_max: list):
+    """Okresy i amplitudy pełnych cykli (między kolejnymi przełączeniami w górę)."""
+    okresy = np.diff(t_przelaczen)
+    # Ostatni cykl dopiero się zaczął
+    amplitudy = 0.5 * (np.asarray(y_max[:-1]) - np.asarray(y_min[:-1]))
+    return okresy, amplitudy
+
+
+def _zbiezne(okresy: np.ndarray, amplitudy: np.ndarray, cykle: int, tolerancja: float) -> bool:
+    """
+    Średni okres i amplituda ostatnich `cykle` cykli różnią się od poprzednich
+    `cykle` cykli o mniej niż tolerancja (średnie, bo okres jest wielokrotnością
+    Ts i w cyklu dyskretnym może przeskakiwać o próbkę).
+    """
+    for x in (okresy, amplitudy):
+        ostatnie, poprzednie = np.mean(x[-cykle:]), np.mean(x[-2 * cykle:-cykle])
+        if abs(ostatnie - poprzednie) > tolerancja * abs(ostatnie):
+            return False
+    return True
+
+
+def _przebieg(model, h: float, eps: float, Ts: float, r: float, tolerancja: float,
+              cykle: int, maks_czas: float) -> Optional[WynikPrzekaznika]:
+    m = krok_regulatora(model.dt, Ts)
+    kroki = int(maks_czas / Ts)
+    u = h if r - model.y >= 0.0 else -h
+
+    # Cykl liczony od przełączenia u na +h; w cyklu śledzone ekstrema y
+    t_przelaczen, y_min, y_max = [], [], []
+    okresy = amplitudy = np.empty(0)
+    for k in range(kroki):
+        e = r - model.y
+        poprzednie = u
+        if e > eps:
+            u = h
+        elif e < -eps:
+            u = -h
+        if u > poprzednie:
+            t_przelaczen.append(k * Ts)
+            y_min.append(model.y)
+            y_max.append(model.y)
+            okresy, amplitudy = _cykle_graniczne(t_przelaczen, y_min, y_max)
+            if len(okresy) >= 2 * cykle and _zbiezne(okresy, amplitudy, cykle, tolerancja):
+                return _wynik(h, eps, Ts, okresy[-cykle:], amplitudy[-cykle:], len(okresy), k * Ts, True)
+
+        for _ in range(m):
+            y = model.step(u)
+            if not np.isfinite(y):
+                return None
+            if y_min:
+                y_min[-1] = min(y_min[-1], y)
+                y_max[-1] = max(y_max[-1], y)
+
+    if len(okresy) < 2:
+        return None
+    n = min(cykle, len(okresy))
+    return _wynik(h, eps, Ts, okresy[-n:], amplitudy[-n:], len(okresy), kroki * Ts, False)
+
+
+def _wynik(h, eps, Ts, okresy, amplitudy, liczba_cykli, czas, zbiezny) -> Optional[WynikPrzekaznika]:
+    a = float(np.mean(amplitudy))
+    if not a > eps:
+        return None
+    return WynikPrzekaznika(Ku=4.0 * h / (np.pi * np.sqrt(a * a - eps * eps)), Tu=float(np.mean(okresy)),
+                            amplituda=a, liczba_cykli=int(liczba_cykli), czas=float(czas),
+                            zbiezny=bool(zbiezny), histereza=float(eps),
+                            faza=float(np.degrees(np.arcsin(eps / a)) - 180.0), czas_probkowania=float(Ts))
+
+
+def _szum_wyjscia(model, Ts: float) -> float:
+    """
+    Odchylenie standardowe szumu y przy stałym sterowaniu u = 0 z drugich
+    różnic próbek (trend wolnozmienny się znosi; dla modeli deterministycznych ≈ 0).
+    """
+    m = krok_regulatora(model.dt, Ts)
+    y = np.empty(_PROBKI_SZUMU)
+    for k in range(_PROBKI_SZUMU):
+        for _ in range(m):
+            model.step(0.0)
+        y[k] = model.y
+    d2 = np.diff(y, 2)
+    return float(np.std(d2) / np.sqrt(6.0)) if np.all(np.isfinite(d2)) else 0.0
+
+
+def eksperyment_przekaznikowy(
+    model,
+    amplituda: float = 1.0,
+    histereza: Optional[float] = None,
+    czas_probkowania: Optional[float] = None,
+    r: Optional[float] = None,
+    tolerancja: float = 0.02,
+    cykle: int = 3,
+    maks_czas: float = 600.0,
+    histereza_wzgledna: float = 0.1,
+    krotnosc_szumu: float = 3.0,
+) -> Optional[WynikPrzekaznika]:
+    """
+    Eksperyment przekaźnikowy na dowolnym modelu (tylko step()).
+    Stan modelu po eksperymencie jest przywracany.
+
+    Args:
+        model: instancja ModelBazowy w punkcie pracy
+        amplituda: h - amplituda przekaźnika (u = ±h)
+        histereza: ε - pasmo histerezy na uchybie (None = dobierane do szumu i amplitudy)
+        czas_probkowania: okres próbkowania przekaźnika Ts (None = krok modelu)
+        r: wartość zadana (None = bieżące wyjście modelu)
+        tolerancja: względny rozrzut okresu i amplitudy w ostatnich cyklach
+        cykle: liczba pełnych cykli w oknie porównywanym z poprzednim oknem
+        maks_czas: [s] limit czasu eksperymentu
+        histereza_wzgledna: histereza=None: ε jako ułamek amplitudy próbnego przebiegu
+        krotnosc_szumu: histereza=None: ε co najmniej tyle odchyleń std szumu y
+
+    Returns:
+        WynikPrzekaznika lub None, gdy cykl graniczny nie powstał
+    """
+    Ts = float(czas_probkowania or model.dt)
+    stan = model.snapshot()
+    r = float(model.y if r is None else r)
+    ustawienia = (float(tolerancja), max(2, int(cykle)), float(maks_czas))
+    try:
+        if histereza is None:
+            eps = float(krotnosc_szumu) * _szum_wyjscia(model, Ts)
+            model.restore(stan)
+            proba = _przebieg(model, float(amplituda), eps, Ts, r, *ustawienia)
+            if proba is None:
+                return None
+            eps = max(eps, float(histereza_wzgledna) * proba.amplituda)
+            model.restore(stan)
+        else:
+            eps = float(histereza)
+        return _przebieg(model, float(amplituda), eps, Ts, r, *ustawienia)
+    finally:
+        model.restore(stan)
+
+
+def _wczytaj_plik(plik: str) -> dict:
+    if not plik or not os.path.exists(plik):
+        return {}
+    try:
+        with open(plik, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def wyznacz_ku_tu(model, plik: Optional[str] = None, **ustawienia) -> Optional[WynikPrzekaznika]:
+    """
+    Ku, Tu obiektu z eksperymentu przekaźnikowego, zapamiętane pod odciskiem
+    obiektu (w procesie oraz w pliku JSON `plik`, jeśli podany).
+
+    Args:
+        ustawienia: argumenty eksperyment_przekaznikowy() (część odcisku)
+    """
+    klucz = odcisk_obiektu(model, dt=model.dt, y0=model.y, **ustawienia)
+    if klucz not in _wyniki:
+        zapisane = _wczytaj_plik(plik).get(klucz)
+        if zapisane is not None:
+            _wyniki[klucz] = zapisane
+    if klucz in _wyniki:
+        return WynikPrzekaznika(**_wyniki[klucz])
+
+    wynik = eksperyment_przekaznikowy(model, **ustawienia)
+    if wynik is None:
+        return None
+    _wyniki[klucz] = asdict(wynik)
+    if plik:
+        zapisane = _wczytaj_plik(plik)
+        zapisane[klucz] = _wyniki[klucz]
+        os.makedirs(os.path.dirname(plik) or ".", exist_ok=True)
+        with open(plik, "w", encoding="utf-8") as f:
+            json.dump(zapisane, f, indent=2)
+    return wynik
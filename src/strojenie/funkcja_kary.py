@@ -0,0 +1,123 @@
+# src/strojenie/funkcja_kary.py
+"""
+Funkcja kary strojenia (niższa = lepsza), budowana raz na (model, regulator):
+
+    kara = IAE + w_mp * Mp + w_ts * t_s
+           + w_const                       gdy std(u) < 1e-4 (regulator nie reaguje)
+           + w_extreme * p^2               Kp / Ti powyżej 70% zakresu
+           + 2 * w_extreme * p^2           Td poniżej 20% zakresu (preferowane wyższe Td)
+
+p - względne przekroczenie progu (0..1 na końcu zakresu). Ta sama funkcja
+ocenia pojedynczy wynik (symulacja krokowa, optymalizacja) i całe tablice
+metryk i parametrów (symulacja wsadowa siatki) - jedną operacją NumPy.
+"""
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+Zakres = Optional[Tuple[float, float]]
+
+# Klucze sekcji 'wagi_kary' w config.yaml -> pola FunkcjaKary
+POLA_WAG = {
+    'przeregulowanie': 'w_mp',
+    'czas_ustalania': 'w_ts',
+    'sterowanie_stale': 'w_const',
+    'parametry_ekstremalne': 'w_extreme',
+}
+
+
+def _kolumna(lista_parametrow, klucz) -> np.ndarray:
+    """Wartości parametru z listy dict; brak / None -> NaN."""
+    return np.array([np.nan if p.get(klucz) is None else p[klucz] for p in lista_parametrow],
+                    dtype=float)
+
+
+@dataclass(frozen=True)
+class FunkcjaKary:
+    w_mp: float = 0.5
+    w_ts: float = 1.0
+    w_const: float = 1000.0
+    w_extreme: float = 50.0
+    # Zakresy parametrów (None = bez kary brzegowej dla parametru)
+    zakres_Kp: Zakres = None
+    zakres_Ti: Zakres = None
+    zakres_Td: Zakres = None
+    prog_stalego_u: float = 1e-4
+
+    @classmethod
+    def z_konfiguracji(cls, cfg, model_nazwa: str, RegulatorClass=None) -> "FunkcjaKary":
+        """
+        Wagi z sekcji 'wagi_kary' i zakresy parametrów modelu z config.yaml.
+        RegulatorClass (opcjonalnie) wyłącza kary brzegowe dla parametrów,
+        których regulator nie ma (Ti bez całkowania, Td bez różniczkowania).
+        """
+        zakresy = cfg.pobierz_zakresy(getattr(RegulatorClass, "__name__", "").lower(), model_nazwa)
+        calkowanie = getattr(RegulatorClass, "_calkowanie", True)
+        rozniczkowanie = getattr(RegulatorClass, "_rozniczkowanie", True)
+        return cls(
+            zakres_Kp=zakresy.get('Kp'),
+            zakres_Ti=zakresy.get('Ti') if calkowanie else None,
+            zakres_Td=zakresy.get('Td') if rozniczkowanie else None,
+        ).z_wagami(cfg.pobierz_wagi_kary())
+
+    def z_wagami(self, wagi: Dict[str, float]) -> "FunkcjaKary":
+        """Kopia z wagami nadpisanymi kluczami sekcji 'wagi_kary' (brakujące bez zmian)."""
+        return replace(self, **{POLA_WAG[k]: float(v) for k, v in wagi.items() if k in POLA_WAG})
+
+    def wsadowo(self, IAE, przeregulowanie, czas_ustalania, odchylenie_u,
+                Kp, Ti=None, Td=None) -> np.ndarray:
+        """
+        Kary dla tablic metryk i parametrów (N,) - Ti / Td równe None lub NaN
+        oznaczają brak członu (bez kary brzegowej).
+        """
+        IAE, przeregulowanie, czas_ustalania, odchylenie_u, Kp = (
+            np.asarray(x, dtype=float) for x in (IAE, przeregulowanie, czas_ustalania,
+                                                 odchylenie_u, Kp))
+        kara = IAE + self.w_mp * przeregulowanie + self.w_ts * czas_ustalania
+
+        # Dodatkowa kara za niestabilność (jeśli regulator nie reaguje)
+        kara = kara + np.where(odchylenie_u < self.prog_stalego_u, self.w_const, 0.0)
+
+        # Kara za parametry zbliżone do granic zakresu (preferuj wartości środkowe)
+        if self.zakres_Kp is not None:
+            kara = kara + self._gorna_granica(Kp, self.zakres_Kp)
+        if self.zakres_Ti is not None and Ti is not None:
+            kara = kara + self._gorna_granica(np.asarray(Ti, dtype=float), self.zakres_Ti)
+        if self.zakres_Td is not None and Td is not None:
+            kara = kara + self._dolna_granica(np.asarray(Td, dtype=float), self.zakres_Td)
+        return kara
+
+    def _gorna_granica(self, x, zakres) -> np.ndarray:
+        """Kara kwadratowa powyżej 70% zakresu; x = 0 / NaN bez kary."""
+        x_min, x_max = zakres
+        prog = x_min + 0.7 * (x_max - x_min)
+        with np.errstate(invalid="ignore"):
+            przekroczenie = (x - prog) / (0.3*(x_max - x_min))
+            return np.where((x != 0) & (x > prog),
+                            self.w_extreme * przekroczenie * przekroczenie, 0.0)
+
+    def _dolna_granica(self, x, zakres) -> np.ndarray:
+        """Podwójna kara kwadratowa poniżej 20% zakresu; x = 0 / NaN bez kary."""
+        x_min, x_max = zakres
+        prog = x_min + 0.2 * (x_max - x_min)
+        with np.errstate(invalid="ignore"):
+            przekroczenie = (prog - x) / (0.2*(x_max - x_min))
+            return np.where((x != 0) & (x < prog),
+                            2.0 * self.w_extreme * przekroczenie * przekroczenie, 0.0)
+
+    def dla_listy(self, metryki, lista_parametrow, odchylenie_u) -> np.ndarray:
+        """
+        Kary dla listy rekordów metryk (obiekty z IAE, przeregulowanie,
+        czas_ustalania) i listy dict parametrów.
+        """
+        return self.wsadowo(
+            [m.IAE for m in metryki], [m.przeregulowanie for m in metryki],
+            [m.czas_ustalania for m in metryki], odchylenie_u,
+            _kolumna(lista_parametrow, 'Kp'), _kolumna(lista_parametrow, 'Ti'),
+            _kolumna(lista_parametrow, 'Td'),
+        )
+
+    def __call__(self, metryki, parametry: dict, odchylenie_u: float) -> float:
+        """Kara dla jednego rekordu metryk i dict parametrów."""
+        return float(self.dla_listy([metryki], [parametry], [odchylenie_u])[0])
@@ -6,7 +6,10 @@ Używa scipy.optimize.minimize z prawdziwymi symulacjami jako funkcją celu.
 Ulepszenia v2.0:
 - Multi-start optymalizacja z losowych punktów
 - Użycie wyników Ziegler-Nichols jako punktu startowego
+- Ciepły start z najlepszego kandydata siatki (archiwum kandydatów, bez multi-startu)
 - Paski postępu dla multi-start
+- Przerywanie symulacji punktów wyraźnie gorszych od najlepszego znalezionego
+- Kara bez symulacji dla punktów z niestabilną pętlą liniową (analityczny test biegunów)
 - Konfiguracja z config.yaml
 """
 from typing import Sequence, Iterable, Dict, Optional, List, Tuple
@@ -63,8 +66,23 @@ def _optymalizuj_z_punktu_startowego(
         return None, float('inf'), []
 
 
+def _punkt_w_granicach(params: Dict, labels: List[str], granice: List[Tuple[float, float]]) -> List[float]:
+    """Wektor startowy z dict nastaw: wartości przycięte do granic, brakujące - środek zakresu."""
+    x0 = []
+    for label, (dolna, gorna) in zip(labels, granice):
+        val = params.get(label)
+        if val is not None:
+            # Ogranicz do zakresu
+            x0.append(max(dolna, min(gorna, val)))
+        else:
+            # Domyślna wartość jeśli brak
+            x0.append((dolna + gorna) / 2)
+    return x0
+
+
 def strojenie_optymalizacja(RegulatorClass, model_nazwa: str, typ_regulatora: str,
-                            funkcja_symulacji_testowej, params_zn: Dict = None):
+                            funkcja_symulacji_testowej, params_zn: Dict = None,
+                            funkcja_stabilnosci=None, punkt_startowy: Dict = None):
     """
     Optymalizacja numeryczna z prawdziwymi symulacjami.
     
@@ -80,6 +98,10 @@ def strojenie_optymalizacja(RegulatorClass, model_nazwa: str, typ_regulatora: st
         typ_regulatora: "regulator_p", "regulator_pi", "regulator_pd", "regulator_pid"
         funkcja_symulacji_testowej: funkcja (RegulatorClass, params, model_nazwa) -> (metryki, kara)
         params_zn: Parametry z Ziegler-Nichols (opcjonalne, użyte jako punkt startowy)
+        funkcja_stabilnosci: opcjonalna funkcja (RegulatorClass, lista_params, model_nazwa)
+            -> maska stabilnych; punkt niestabilny dostaje karę 999999 bez symulacji
+        punkt_startowy: nastawy ciepłego startu (np. najlepszy kandydat siatki przeliczony
+            dla bieżących wag); jeśli podane, optymalizacja startuje tylko z tego punktu
         
     Returns:
         dict: {"Kp": ..., "Ti": ..., "Td": ...}
@@ -98,15 +120,34 @@ def strojenie_optymalizacja(RegulatorClass, model_nazwa: str, typ_regulatora: st
     
     typ = typ_regulatora.lower()
     
+    # Próg przerywania symulacji: najlepsza kara ze wszystkich startów z zapasem,
+    # żeby otoczenie bieżącego punktu (różnice skończone) liczone było w pełni
+    cfg_przerywania = config.pobierz_config_przerywania()
+    czy_ograniczenie = cfg_przerywania.get('ograniczenie_kosztu', False)
+    zapas = float(cfg_przerywania.get('zapas', 0.5))
+    najlepsza_kara = [float('inf')]
+    pominiete = [0]
+    
+    def _ocen(params):
+        if funkcja_stabilnosci is not None and not funkcja_stabilnosci(RegulatorClass, [params],
+                                                                       model_nazwa)[0]:
+            pominiete[0] += 1
+            return 999999.0
+        kwargs = {}
+        if czy_ograniczenie and np.isfinite(najlepsza_kara[0]):
+            kwargs["ograniczenie_kosztu"] = najlepsza_kara[0] * (1.0 + zapas)
+        try:
+            _, kara = funkcja_symulacji_testowej(RegulatorClass, params, model_nazwa, **kwargs)
+        except Exception:
+            return 999999.0
+        najlepsza_kara[0] = min(najlepsza_kara[0], kara)
+        return kara
+    
     # Definicja funkcji celu i parametrów w zależności od typu regulatora
     if typ == "regulator_p":
         def funkcja_celu(x):
             params = {"Kp": x[0], "Ti": None, "Td": None}
-            try:
-                _, kara = funkcja_symulacji_testowej(RegulatorClass, params, model_nazwa)
-                return kara
-            except:
-                return 999999.0
+            return _ocen(params)
         
         granice = [(zakresy["Kp"][0], zakresy["Kp"][1])]
         labels = ["Kp"]
@@ -114,11 +155,7 @@ def strojenie_optymalizacja(RegulatorClass, model_nazwa: str, typ_regulatora: st
     elif typ == "regulator_pi":
         def funkcja_celu(x):
             params = {"Kp": x[0], "Ti": x[1], "Td": None}
-            try:
-                _, kara = funkcja_symulacji_testowej(RegulatorClass, params, model_nazwa)
-                return kara
-            except:
-                return 999999.0
+            return _ocen(params)
         
         granice = [(zakresy["Kp"][0], zakresy["Kp"][1]), 
                    (zakresy["Ti"][0], zakresy["Ti"][1])]
@@ -127,11 +164,7 @@ def strojenie_optymalizacja(RegulatorClass, model_nazwa: str, typ_regulatora: st
     elif typ == "regulator_pd":
         def funkcja_celu(x):
             params = {"Kp": x[0], "Ti": None, "Td": x[1]}
-            try:
-                _, kara = funkcja_symulacji_testowej(RegulatorClass, params, model_nazwa)
-                return kara
-            except:
-                return 999999.0
+            return _ocen(params)
         
         granice = [(zakresy["Kp"][0], zakresy["Kp"][1]), 
                    (zakresy["Td"][0], zakresy["Td"][1])]
@@ -140,11 +173,7 @@ def strojenie_optymalizacja(RegulatorClass, model_nazwa: str, typ_regulatora: st
     else:  # PID
         def funkcja_celu(x):
             params = {"Kp": x[0], "Ti": x[1], "Td": x[2]}
-            try:
-                _, kara = funkcja_symulacji_testowej(RegulatorClass, params, model_nazwa)
-                return kara
-            except:
-                return 999999.0
+            return _ocen(params)
         
         granice = [(zakresy["Kp"][0], zakresy["Kp"][1]), 
                    (zakresy["Ti"][0], zakresy["Ti"][1]),
@@ -154,50 +183,44 @@ def strojenie_optymalizacja(RegulatorClass, model_nazwa: str, typ_regulatora: st
     # Przygotuj punkty startowe
     punkty_startowe = []
     
+    # Ciepły start: jeden punkt zamiast multi-startu
+    if punkt_startowy is not None:
+        x0_cieply = _punkt_w_granicach(punkt_startowy, labels, granice)
+        punkty_startowe.append(("Ciepły start", x0_cieply))
+        print(f"  Punkt startowy: ciepły start {x0_cieply}")
+    
     # Punkt 1: Z Ziegler-Nichols (jeśli dostępne i włączone)
-    if uzyj_zn and params_zn is not None:
-        x0_zn = []
-        for label in labels:
-            val = params_zn.get(label)
-            if val is not None:
-                # Ogranicz do zakresu
-                idx = labels.index(label)
-                val = max(granice[idx][0], min(granice[idx][1], val))
-                x0_zn.append(val)
-            else:
-                # Domyślna wartość jeśli brak w ZN
-                idx = labels.index(label)
-                x0_zn.append((granice[idx][0] + granice[idx][1]) / 2)
-        
+    if punkt_startowy is None and uzyj_zn and params_zn is not None:
+        x0_zn = _punkt_w_granicach(params_zn, labels, granice)
         punkty_startowe.append(("Ziegler-Nichols", x0_zn))
         print(f"  Punkt startowy 1: Ziegler-Nichols {x0_zn}")
     
-    # Punkt 2: Domyślny (środek zakresu lub typowe wartości)
-    x0_default = []
-    for label in labels:
-        idx = labels.index(label)
-        if label == "Kp":
-            x0_default.append(2.0)  # Typowa wartość
-        elif label == "Ti":
-            x0_default.append(15.0)  # Typowa wartość
-        elif label == "Td":
-            x0_default.append(3.0)  # Typowa wartość
-    punkty_startowe.append(("Domyślny", x0_default))
-    print(f"  Punkt startowy 2: Domyślny {x0_default}")
-    
-    # Punkty 3+: Losowe punkty startowe
-    np.random.seed(42)  # Dla powtarzalności
-    for i in range(liczba_multi_start):
-        x0_losowy = []
-        for bound in granice:
-            # Losowa wartość z zakresu (log-uniform dla lepszego pokrycia)
-            if bound[0] > 0:
-                val = np.exp(np.random.uniform(np.log(bound[0]), np.log(bound[1])))
-            else:
-                val = np.random.uniform(bound[0], bound[1])
-            x0_losowy.append(val)
-        punkty_startowe.append((f"Losowy #{i+1}", x0_losowy))
-        print(f"  Punkt startowy {i+3}: Losowy {[f'{v:.2f}' for v in x0_losowy]}")
+    if punkt_startowy is None:
+        # Punkt 2: Domyślny (środek zakresu lub typowe wartości)
+        x0_default = []
+        for label in labels:
+            if label == "Kp":
+                x0_default.append(2.0)  # Typowa wartość
+            elif label == "Ti":
+                x0_default.append(15.0)  # Typowa wartość
+            elif label == "Td":
+                x0_default.append(3.0)  # Typowa wartość
+        punkty_startowe.append(("Domyślny", x0_default))
+        print(f"  Punkt startowy 2: Domyślny {x0_default}")
+        
+        # Punkty 3+: Losowe punkty startowe
+        np.random.seed(42)  # Dla powtarzalności
+        for i in range(liczba_multi_start):
+            x0_losowy = []
+            for bound in granice:
+                # Losowa wartość z zakresu (log-uniform dla lepszego pokrycia)
+                if bound[0] > 0:
+                    val = np.exp(np.random.uniform(np.log(bound[0]), np.log(bound[1])))
+                else:
+                    val = np.random.uniform(bound[0], bound[1])
+                x0_losowy.append(val)
+            punkty_startowe.append((f"Losowy #{i+1}", x0_losowy))
+            print(f"  Punkt startowy {i+3}: Losowy {[f'{v:.2f}' for v in x0_losowy]}")
     
     # Uruchom optymalizację z każdego punktu startowego
     print(f"\n[START] Uruchamiam {len(punkty_startowe)} optymalizacji (metoda={metoda}, maxiter={maxiter})...\n")
@@ -239,6 +262,10 @@ def strojenie_optymalizacja(RegulatorClass, model_nazwa: str, typ_regulatora: st
     print(f"   Parametry: Kp={best_params['Kp']}, Ti={best_params['Ti']}, Td={best_params['Td']}")
     print(f"   Wartość funkcji celu: {best_val:.2f}")
     print(f"   Łącznie iteracji: {len(wszystkie_historie)}")
+    if funkcja_stabilnosci is not None:
+        print(f"   Pominięte symulacje (niestabilna lub mało odporna pętla): {pominiete[0]}")
+        logging.info(f"Optymalizacja {typ_regulatora}/{model_nazwa}: pominięto {pominiete[0]} "
+                     f"symulacji niestabilnych punktów")
     
     # Porównaj wszystkie wyniki
     if len(wyniki) > 1:
@@ -0,0 +1,126 @@
+# src/strojenie/pareto.py
+"""
+Front Pareto kandydatów strojenia w przestrzeni metryk (IAE, Mp, t_s).
+
+Kara strojenia jest ważoną sumą tych metryk, więc najlepszy kandydat dla
+dowolnego wyboru wag_kary leży na froncie Pareto (dla kar brzegowych
+parametrów - w jego pobliżu). Front wyznaczony z jednego przebiegu siatki
+pokazuje kompromis IAE / przeregulowanie / czas ustalania bez ponownego
+strojenia dla każdej kombinacji wag.
+
+Kandydat a dominuje b, gdy a <= b we wszystkich kryteriach i a < b
+w co najmniej jednym. Front wyznaczany jest odsiewaniem: kandydat o
+najmniejszej sumie kryteriów spośród pozostałych jest niezdominowany,
+a wszyscy zdominowani przez niego odpadają jednym porównaniem tablic -
+liczba kroków równa jest liczności frontu, a nie liczbie kandydatów.
+
+Kandydaci zbierani do frontu (strojenie_siatka(..., zwroc_kandydatow=True))
+symulowani są bez przerywania ograniczeniem kosztu - próg zależy od wag kary,
+więc przerwani mogliby należeć do frontu. Bez metryk zostają tylko kandydaci
+rozbieżni i odrzuceni filtrem stabilności (niestabilni lub Ms > ms_max).
+Potok strojenia zbiera kandydatów tylko przy kandydaci_siatki.zbieraj: true.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.metryki import Metryki
+
+KRYTERIA = ("IAE", "przeregulowanie", "czas_ustalania")
+
+
+def wektory_metryk(metryki: Sequence, kryteria: Sequence[str] = KRYTERIA) -> np.ndarray:
+    """
+    Tablica (N, k) kryteriów z listy rekordów metryk; wiersze NaN dla
+    kandydatów bez metryk (None lub metryki zastępcze symulacji nieudanej).
+    """
+    F = np.full((len(metryki), len(kryteria)), np.nan)
+    for i, m in enumerate(metryki):
+        if isinstance(m, Metryki):
+            F[i] = [getattr(m, pole) for pole in kryteria]
+    return F
+
+
+def front_pareto(F) -> np.ndarray:
+    """
+    Maska kandydatów niezdominowanych (minimalizacja wszystkich kolumn F (N, k)).
+    Wiersze z NaN / inf nie należą do frontu i nie dominują innych.
+    """
+    F = np.asarray(F, dtype=float)
+    if F.ndim == 1:
+        F = F[:, None]
+    maska = np.zeros(len(F), dtype=bool)
+    indeksy = np.flatnonzero(np.all(np.isfinite(F), axis=1))
+    if indeksy.size == 0:
+        return maska
+
+    # Kolejność rosnącej sumy: pierwszy z pozostałych nie jest zdominowany przez nikogo
+    G = F[indeksy]
+    kolejnosc = np.argsort(G.sum(axis=1), kind="stable")
+    indeksy, G = indeksy[kolejnosc], G[kolejnosc]
+    niezdominowane = []
+    while len(G):
+        p = G[0]
+        niezdominowane.append(indeksy[0])
+        # p usuwa siebie i zdominowanych; identyczne kopie p zostają na froncie
+        zostaja = np.any(G < p, axis=1) | np.all(G == p, axis=1)
+        zostaja[0] = False
+        indeksy, G = indeksy[zostaja], G[zostaja]
+    maska[niezdominowane] = True
+    return maska
+
+
+def wyznacz_front(kandydaci: List[Tuple[Dict, object]],
+                  kryteria: Sequence[str] = KRYTERIA) -> List[Dict]:
+    """
+    Front Pareto listy (parametry, metryki): rekordy {"parametry": ..., kryteria...}
+    posortowane rosnąco po pierwszym kryterium.
+    """
+    F = wektory_metryk([m for _, m in kandydaci], kryteria)
+    indeksy = np.flatnonzero(front_pareto(F))
+    indeksy = indeksy[np.lexsort(F[indeksy].T[::-1])]
+    front = []
+    for i in indeksy:
+        rekord = {"parametry": dict(kandydaci[i][0])}
+        rekord.update({pole: float(x) for pole, x in zip(kryteria, F[i])})
+        front.append(rekord)
+    return front
+
+
+def sciezka_frontu(regulator: str, model: str, katalog: str = "wyniki") -> str:
+    return os.path.join(katalog, f"pareto_{regulator}_{model}.json")
+
+
+def zapisz_front_pareto(kandydaci: List[Tuple[Dict, object]], regulator: str, model: str,
+                        katalog: str = "wyniki") -> str:
+    """Zapisuje front Pareto kandydatów do pareto_{regulator}_{model}.json."""
+    front = wyznacz_front(kandydaci)
+    dane = {
+        "regulator": regulator,
+        "model": model,
+        "kryteria": list(KRYTERIA),
+        "liczba_kandydatow": len(kandydaci),
+        "liczba_ocenionych": int(np.all(np.isfinite(wektory_metryk([m for _, m in kandydaci])),
+                                        axis=1).sum()),
+        "front": front,
+    }
+    os.makedirs(katalog, exist_ok=True)
+    sciezka = sciezka_frontu(regulator, model, katalog)
+    with open(sciezka, "w", encoding="utf-8") as f:
+        json.dump(dane, f, indent=2)
+    return sciezka
+
+
+def wczytaj_front_pareto(regulator: str, model: str, katalog: str = "wyniki") -> Optional[dict]:
+    """Dane zapisane przez zapisz_front_pareto lub None, gdy brak pliku."""
+    sciezka = sciezka_frontu(regulator, model, katalog)
+    if not os.path.exists(sciezka):
+        return None
+    try:
+        with open(sciezka, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[UWAGA] Błąd wczytywania {sciezka}: {e}")
+        return None
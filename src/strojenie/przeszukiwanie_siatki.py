@@ -5,8 +5,12 @@ Testuje wszystkie kombinacje parametrów w siatce używając prawdziwych symulac
 
 Ulepszenia:
 - Równoległe wykonywanie testów (joblib)
+- Symulacja wsadowa całej siatki naraz (src/symulacja/wsadowa.py)
 - Paski postępu (tqdm)
 - Adaptacyjne zagęszczanie siatki (dwuetapowe: gruba -> dokładna)
+- Przerywanie symulacji kandydatów gorszych od najlepszej znanej kary (branch and bound)
+- Pomijanie kandydatów z niestabilną pętlą liniową (analityczny test biegunów, bez symulacji)
+- Metryki każdego kandydata do wyznaczenia frontu Pareto (src/strojenie/pareto.py)
 - Konfiguracja z pliku config.yaml
 """
 from itertools import product
@@ -23,22 +27,70 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from konfig import pobierz_konfiguracje
 
+# Kara kandydata odrzuconego jako niestabilny - jak dla symulacji rozbieżnej
+KARA_NIESTABILNOSCI = 999999.0
+
+
+def _kwargs_ograniczenia(ograniczenie_kosztu) -> Dict:
+    """Próg kary przekazywany do funkcji symulacji tylko, gdy jest znany."""
+    if ograniczenie_kosztu is None or not np.isfinite(ograniczenie_kosztu):
+        return {}
+    return {"ograniczenie_kosztu": ograniczenie_kosztu}
+
 
 def _testuj_kombinacje(RegulatorClass, params: Dict, model_nazwa: str, 
-                       funkcja_symulacji_testowej) -> Tuple[Dict, float]:
+                       funkcja_symulacji_testowej, ograniczenie_kosztu=None) -> Tuple[Dict, float, object]:
     """
     Pomocnicza funkcja do testowania pojedynczej kombinacji parametrów.
     Używana do równoległego wykonywania.
     
+    Args:
+        ograniczenie_kosztu: najlepsza znana kara - symulacje gorszych kandydatów są
+            przerywane i zwracają dolne ograniczenie kary (branch and bound)
+    
     Returns:
-        (params, kara) lub (None, inf) jeśli symulacja się nie powiodła
+        (params, kara, metryki) lub (None, inf, None) jeśli symulacja się nie powiodła
     """
     try:
-        _, kara = funkcja_symulacji_testowej(RegulatorClass, params, model_nazwa)
-        return (params.copy(), kara)
+        metryki, kara = funkcja_symulacji_testowej(RegulatorClass, params, model_nazwa,
+                                                   **_kwargs_ograniczenia(ograniczenie_kosztu))
+        return (params.copy(), kara, metryki)
     except Exception as e:
         logging.debug(f"Symulacja nieudana dla params={params}: {e}")
-        return (None, float('inf'))
+        return (None, float('inf'), None)
+
+
+def _testuj_wsadowo(RegulatorClass, kombinacje_params: List[Dict], model_nazwa: str,
+                    funkcja_symulacji_wsadowej, ograniczenie_kosztu=None) -> List[Tuple[Dict, float, object]]:
+    """
+    Testuje wszystkie kombinacje jednym wywołaniem symulacji wsadowej.
+    
+    Returns:
+        Lista (params, kara, metryki) w kolejności kombinacje_params
+    """
+    if not kombinacje_params:
+        return []
+    wyniki = funkcja_symulacji_wsadowej(RegulatorClass, kombinacje_params, model_nazwa,
+                                        **_kwargs_ograniczenia(ograniczenie_kosztu))
+    return [(params.copy(), kara, metryki) for params, (metryki, kara) in zip(kombinacje_params, wyniki)]
+
+
+def _odrzuc_niestabilne(RegulatorClass, kombinacje_params: List[Dict], model_nazwa: str,
+                        funkcja_stabilnosci) -> Tuple[List[Dict], List[Tuple[Dict, float, object]]]:
+    """
+    Dzieli kombinacje na stabilne (do symulacji) i odrzucone analitycznie.
+    
+    Returns:
+        (kombinacje stabilne, [(params, KARA_NIESTABILNOSCI, None), ...] dla odrzuconych)
+    """
+    if funkcja_stabilnosci is None or not kombinacje_params:
+        return kombinacje_params, []
+    maska = np.asarray(funkcja_stabilnosci(RegulatorClass, kombinacje_params, model_nazwa), dtype=bool)
+    stabilne = [p for p, s in zip(kombinacje_params, maska) if s]
+    odrzucone = [(p.copy(), KARA_NIESTABILNOSCI, None) for p, s in zip(kombinacje_params, maska) if not s]
+    print(f"  Filtr stabilności: pominięto {len(odrzucone)}/{len(kombinacje_params)} symulacji "
+          f"(niestabilna lub mało odporna pętla)")
+    return stabilne, odrzucone
 
 
 def _generuj_siatke(zakresy: Dict[str, Tuple[float, float]], 
@@ -119,7 +171,8 @@ def _zagesc_siatke_wokol_optimum(najlepsze_params: Dict,
 
 
 def strojenie_siatka(RegulatorClass, model_nazwa: str, typ_regulatora: str, 
-                     funkcja_symulacji_testowej):
+                     funkcja_symulacji_testowej, funkcja_symulacji_wsadowej=None,
+                     funkcja_stabilnosci=None, zwroc_kandydatow=False):
     """
     Przeszukiwanie siatki z prawdziwymi symulacjami.
     
@@ -134,9 +187,17 @@ def strojenie_siatka(RegulatorClass, model_nazwa: str, typ_regulatora: str,
         model_nazwa: nazwa modelu
         typ_regulatora: "regulator_p", "regulator_pi", "regulator_pd", "regulator_pid"
         funkcja_symulacji_testowej: funkcja (RegulatorClass, params, model_nazwa) -> (metryki, kara)
+        funkcja_symulacji_wsadowej: opcjonalna funkcja (RegulatorClass, lista_params, model_nazwa)
+            -> [(metryki, kara), ...]; jeśli podana, cała siatka liczona jest wsadowo
+        funkcja_stabilnosci: opcjonalna funkcja (RegulatorClass, lista_params, model_nazwa)
+            -> maska stabilnych; niestabilne kombinacje dostają KARA_NIESTABILNOSCI bez symulacji
+        zwroc_kandydatow: zwróć także listę (params, metryki) wszystkich kandydatów
+            obu faz (metryki None dla odrzuconych) - do frontu Pareto; symulacje
+            nie są wtedy przerywane ograniczeniem kosztu
         
     Returns:
         dict: {"Kp": ..., "Ti": ..., "Td": ...}
+        lub (dict, kandydaci) gdy zwroc_kandydatow=True
     """
     print(f"\n[SZUKANIE] Przeszukiwanie siatki dla {typ_regulatora} na modelu {model_nazwa}...")
     
@@ -150,6 +211,11 @@ def strojenie_siatka(RegulatorClass, model_nazwa: str, typ_regulatora: str,
     
     typ = typ_regulatora.lower()
     
+    # Front Pareto i archiwum kandydatów wymagają pełnych metryk każdego kandydata -
+    # bez przerywania symulacji ograniczeniem kosztu (próg zależy od bieżących wag kary)
+    def _prog(kara):
+        return None if zwroc_kandydatow else kara
+    
     # ========== FAZA 1: GRUBA SIATKA (jeśli adaptacyjne) ==========
     if czy_adaptacyjne:
         print("[ANALIZA] FAZA 1: Gruba siatka (szybkie przeszukanie)...")
@@ -181,6 +247,11 @@ def strojenie_siatka(RegulatorClass, model_nazwa: str, typ_regulatora: str,
             params["Td"] = None
         kombinacje_params.append(params)
     
+    kombinacje_params, odrzucone = _odrzuc_niestabilne(RegulatorClass, kombinacje_params, model_nazwa,
+                                                       funkcja_stabilnosci)
+    pominiete = len(odrzucone)
+    total_tests = len(kombinacje_params)
+    
     # Zabezpieczenie: wyłącz równoległość dla bardzo dużych siatek (unikaj crashy joblib na Windows)
     bezpieczny_limit_parallel = 500
     czy_rownolegle_bezpieczne = czy_rownolegle and n_jobs != 1 and total_tests <= bezpieczny_limit_parallel
@@ -188,25 +259,33 @@ def strojenie_siatka(RegulatorClass, model_nazwa: str, typ_regulatora: str,
     if not czy_rownolegle_bezpieczne and total_tests > bezpieczny_limit_parallel:
         logging.info(f"  [UWAGA] Duża siatka ({total_tests} kombinacji): wyłączono równoległość dla stabilności")
     
-    # Testuj równolegle lub sekwencyjnie
-    if czy_rownolegle_bezpieczne:
+    # Testuj wsadowo, równolegle lub sekwencyjnie
+    if funkcja_symulacji_wsadowej is not None:
+        wyniki = _testuj_wsadowo(RegulatorClass, kombinacje_params, model_nazwa, funkcja_symulacji_wsadowej)
+    elif czy_rownolegle_bezpieczne:
         # Równoległe wykonywanie
         wyniki = Parallel(n_jobs=n_jobs)(
             delayed(_testuj_kombinacje)(RegulatorClass, params, model_nazwa, funkcja_symulacji_testowej)
             for params in tqdm(kombinacje_params, desc="  Przeszukiwanie", unit="kombinacja")
         )
     else:
-        # Sekwencyjne wykonywanie
+        # Sekwencyjne wykonywanie - najlepsza dotychczasowa kara jako próg przerywania
         wyniki = []
+        najlepsza = float("inf")
         for params in tqdm(kombinacje_params, desc="  Przeszukiwanie", unit="kombinacja"):
-            wynik = _testuj_kombinacje(RegulatorClass, params, model_nazwa, funkcja_symulacji_testowej)
+            wynik = _testuj_kombinacje(RegulatorClass, params, model_nazwa, funkcja_symulacji_testowej,
+                                       ograniczenie_kosztu=_prog(najlepsza))
             wyniki.append(wynik)
+            if wynik[0] is not None:
+                najlepsza = min(najlepsza, wynik[1])
+    wyniki = list(wyniki) + odrzucone
+    kandydaci = [(params, metryki) for params, _, metryki in wyniki if params is not None]
     
     # Znajdź najlepszy wynik
     best_params_faza1 = None
     best_kara_faza1 = float("inf")
     
-    for params, kara in wyniki:
+    for params, kara, _ in wyniki:
         if params is not None and kara < best_kara_faza1:
             best_kara_faza1 = kara
             best_params_faza1 = params
@@ -250,29 +329,45 @@ def strojenie_siatka(RegulatorClass, model_nazwa: str, typ_regulatora: str,
                 params["Td"] = None
             kombinacje_params_faza2.append(params)
         
+        kombinacje_params_faza2, odrzucone_faza2 = _odrzuc_niestabilne(
+            RegulatorClass, kombinacje_params_faza2, model_nazwa, funkcja_stabilnosci)
+        pominiete += len(odrzucone_faza2)
+        total_tests_faza2 = len(kombinacje_params_faza2)
+        
         # Zabezpieczenie: wyłącz równoległość dla bardzo dużych siatek
         czy_rownolegle_faza2 = czy_rownolegle and n_jobs != 1 and total_tests_faza2 <= bezpieczny_limit_parallel
         
         if not czy_rownolegle_faza2 and total_tests_faza2 > bezpieczny_limit_parallel:
             logging.info(f"  [UWAGA] Duża siatka faza 2 ({total_tests_faza2} kombinacji): wyłączono równoległość")
         
-        # Testuj równolegle lub sekwencyjnie
-        if czy_rownolegle_faza2:
+        # Testuj wsadowo, równolegle lub sekwencyjnie; kara z fazy 1 jest progiem przerywania
+        if funkcja_symulacji_wsadowej is not None:
+            wyniki_faza2 = _testuj_wsadowo(RegulatorClass, kombinacje_params_faza2, model_nazwa,
+                                           funkcja_symulacji_wsadowej,
+                                           ograniczenie_kosztu=_prog(best_kara_faza1))
+        elif czy_rownolegle_faza2:
             wyniki_faza2 = Parallel(n_jobs=n_jobs)(
-                delayed(_testuj_kombinacje)(RegulatorClass, params, model_nazwa, funkcja_symulacji_testowej)
+                delayed(_testuj_kombinacje)(RegulatorClass, params, model_nazwa, funkcja_symulacji_testowej,
+                                            ograniczenie_kosztu=_prog(best_kara_faza1))
                 for params in tqdm(kombinacje_params_faza2, desc="  Zagęszczanie", unit="kombinacja")
             )
         else:
             wyniki_faza2 = []
+            najlepsza = best_kara_faza1
             for params in tqdm(kombinacje_params_faza2, desc="  Zagęszczanie", unit="kombinacja"):
-                wynik = _testuj_kombinacje(RegulatorClass, params, model_nazwa, funkcja_symulacji_testowej)
+                wynik = _testuj_kombinacje(RegulatorClass, params, model_nazwa, funkcja_symulacji_testowej,
+                                           ograniczenie_kosztu=_prog(najlepsza))
                 wyniki_faza2.append(wynik)
+                if wynik[0] is not None:
+                    najlepsza = min(najlepsza, wynik[1])
+        wyniki_faza2 = list(wyniki_faza2) + odrzucone_faza2
+        kandydaci += [(params, metryki) for params, _, metryki in wyniki_faza2 if params is not None]
         
         # Znajdź najlepszy wynik z fazy 2
         best_params = best_params_faza1
         best_kara = best_kara_faza1
         
-        for params, kara in wyniki_faza2:
+        for params, kara, _ in wyniki_faza2:
             if params is not None and kara < best_kara:
                 best_kara = kara
                 best_params = params
@@ -292,7 +387,13 @@ def strojenie_siatka(RegulatorClass, model_nazwa: str, typ_regulatora: str,
         val = best_params.get(k)
         result[k] = round(val, 4) if val is not None else None
     
+    if funkcja_stabilnosci is not None:
+        print(f"[INFO] Filtr stabilności: łącznie pominięto {pominiete} symulacji")
+        logging.info(f"Przeszukiwanie siatki {typ_regulatora}/{model_nazwa}: pominięto {pominiete} "
+                     f"symulacji niestabilnych kandydatów")
     print(f"\n[OK] Najlepsze parametry (kara={best_kara:.2f}): Kp={result['Kp']}, Ti={result['Ti']}, Td={result['Td']}")
+    if zwroc_kandydatow:
+        return result, kandydaci
     return result
 
 
@@ -58,6 +58,67 @@ def wczytaj_wyniki_strojenia(regulator: str, model: str, katalog_wyniki="wyniki"
     return wyniki
 
 
+def _sekcja_pareto(regulator: str, model: str, katalog_wyniki: str, config_raport: Dict[str, Any]) -> List[str]:
+    """
+    Wykres i tabela frontu Pareto (IAE, przeregulowanie, czas ustalania)
+    z przeszukiwania siatki - pusta lista, gdy brak pliku pareto_*.json.
+    """
+    try:
+        from src.strojenie.pareto import wczytaj_front_pareto
+    except ImportError:
+        return []
+    dane = wczytaj_front_pareto(regulator, model, katalog_wyniki)
+    if not dane or not dane.get('front'):
+        return []
+
+    front = dane['front']
+    iae = np.array([p['IAE'] for p in front])
+    mp = np.array([p['przeregulowanie'] for p in front])
+    ts = np.array([p['czas_ustalania'] for p in front])
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+    fig.suptitle(f'Front Pareto przeszukiwania siatki - {regulator} na {model}', fontsize=14, fontweight='bold')
+    punkty = ax1.scatter(iae, mp, c=ts, cmap='viridis', edgecolors='k')
+    fig.colorbar(punkty, ax=ax1, label='Czas ustalania [s]')
+    ax1.set_xlabel('IAE')
+    ax1.set_ylabel('Przeregulowanie [%]')
+    ax1.set_title('IAE vs przeregulowanie')
+    ax1.grid(alpha=0.3)
+    punkty = ax2.scatter(iae, ts, c=mp, cmap='plasma', edgecolors='k')
+    fig.colorbar(punkty, ax=ax2, label='Przeregulowanie [%]')
+    ax2.set_xlabel('IAE')
+    ax2.set_ylabel('Czas ustalania [s]')
+    ax2.set_title('IAE vs czas ustalania')
+    ax2.grid(alpha=0.3)
+    plt.tight_layout()
+
+    nazwa_wykresu = f"pareto_{regulator}_{model}.{config_raport['format_wykresow']}"
+    plt.savefig(os.path.join(katalog_wyniki, nazwa_wykresu), dpi=config_raport['dpi'])
+    plt.close()
+    print(f"  [OK] Zapisano front Pareto: {os.path.join(katalog_wyniki, nazwa_wykresu)}")
+
+    html = ["<h2>Front Pareto (przeszukiwanie siatki)</h2>"]
+    html.append("<div class='info-box'>")
+    html.append(f"<strong>{len(front)}</strong> kandydatów niezdominowanych spośród "
+                f"{dane.get('liczba_ocenionych', '-')} ocenionych. Najlepsze nastawy dla dowolnych "
+                f"wag kary (IAE + w_mp·Mp + w_ts·t_s) leżą na tym froncie.")
+    html.append("</div>")
+    html.append(f"<img src='{nazwa_wykresu}' alt='Front Pareto'>")
+    html.append("<table>")
+    html.append("<tr><th>Kp</th><th>Ti</th><th>Td</th><th>IAE</th><th>Przeregulowanie [%]</th><th>Czas ustalania [s]</th></tr>")
+    for punkt in front:
+        params = punkt['parametry']
+        html.append("<tr>")
+        for k in ['Kp', 'Ti', 'Td']:
+            val = params.get(k)
+            html.append(f"<td>{val:.4f}</td>" if val is not None else "<td>-</td>")
+        html.append(f"<td>{punkt['IAE']:.4f}</td><td>{punkt['przeregulowanie']:.4f}</td>"
+                    f"<td>{punkt['czas_ustalania']:.4f}</td>")
+        html.append("</tr>")
+    html.append("</table>")
+    return html
+
+
 def generuj_raport_porownawczy(regulator: str, model: str, katalog_wyniki="wyniki"):
     """
     Generuje raport porównawczy HTML porównujący wszystkie metody strojenia.
@@ -257,6 +318,9 @@ def generuj_raport_porownawczy(regulator: str, model: str, katalog_wyniki="wynik
         html_content.append(f"<img src='porownanie_{regulator}_{model}.{config_raport['format_wykresow']}' alt='Wykresy porównawcze'>")
         print(f"  [OK] Zapisano wykresy: {wykres_path}")
     
+    # === FRONT PARETO ===
+    html_content.extend(_sekcja_pareto(regulator, model, katalog_wyniki, config_raport))
+    
     # === WNIOSKI ===
     if raporty_dostepne:
         html_content.append("<h2> Wnioski</h2>")
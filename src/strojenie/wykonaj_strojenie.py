@@ -5,31 +5,175 @@ Obsługiwane regulatory: regulator_p, regulator_pi, regulator_pd, regulator_pid.
 """
 
 import os
+import sys
 import json
-import importlib
+import hashlib
+import logging
 import numpy as np
 import matplotlib.pyplot as plt
+from dataclasses import asdict, dataclass
 from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional
 
-from src.metryki import oblicz_metryki
+# Dodaj katalog src do PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from konfig import pobierz_konfiguracje
+from src import rejestr
+from src.analiza.odpornosc import marginesy
+from src.analiza.stabilnosc import stabilne
+from src.strojenie.archiwum_kandydatow import MetrykiKandydata, wczytaj_archiwum, zapisz_archiwum
+from src.strojenie.funkcja_kary import FunkcjaKary
+from src.symulacja.silnik import Horyzont, Przerywanie, WczesneZakonczenie, symuluj_petle
+
+
+def _parametry_modelu_strojenia(cfg, ModelClass) -> dict:
+    """
+    Argumenty konstruktora modelu dla strojenia (sekcja 'symulacja' w config.yaml).
+    Dyskretyzacja ZOH i krok dt_strojenia dotyczą tylko modeli liniowych
+    (z metodą model_stanowy), pozostałe modele tworzone są domyślnie.
+    """
+    cfg_sym = cfg.pobierz_config_symulacji()
+
+    if cfg_sym.get('dyskretyzacja', 'euler') != 'zoh' or not hasattr(ModelClass, 'model_stanowy'):
+        return {}
+    parametry_modelu = {'dyskretyzacja': 'zoh'}
+    if cfg_sym.get('dt_strojenia'):
+        parametry_modelu['dt'] = float(cfg_sym['dt_strojenia'])
+    return parametry_modelu
+
+
+class DummyMetryki:
+    """Metryki zastępcze dla symulacji zakończonej błędem (np. niestabilność)."""
+    IAE = 999999
+    przeregulowanie = 999
+    czas_ustalania = 999
+    czas_narastania = 999
+
+
+def _czas_symulacji_strojenia(cfg, model) -> float:
+    """Horyzont strojenia: z dynamiki modelu (symulacja.horyzont) lub stałe 120 s."""
+    horyzont = Horyzont.z_konfiguracji(cfg.pobierz_config_horyzontu())
+    return horyzont.czas(model) if horyzont is not None else 120.0
 
 
 # ------------------------------------------------------------
-# Funkcja pomocnicza - dynamiczny import
+# Kontekst strojenia - wszystko, co nie zależy od kandydata
 # ------------------------------------------------------------
-def _dynamiczny_import(typ: str, nazwa: str):
-    """Dynamicznie importuje klasę modelu lub regulatora."""
-    modul = importlib.import_module(f"src.{typ}.{nazwa}")
-    for attr in dir(modul):
-        if attr.lower() == nazwa.lower():
-            return getattr(modul, attr)
-    return getattr(modul, [a for a in dir(modul) if not a.startswith("_")][0])
+@dataclass(frozen=True)
+class KontekstStrojenia:
+    """
+    Ustawienia symulacji strojenia dla jednego modelu, wyznaczane raz na proces
+    (i na instancję konfiguracji), żeby ocena kandydata była tylko symulacją.
+    """
+    model_nazwa: str
+    model: rejestr.WpisModelu
+    parametry_modelu: dict
+    dt: float  # okres próbkowania regulatora
+    czas_sym: float
+    r_zad: float
+    tryb: str
+    zakonczenie: Optional[WczesneZakonczenie]
+    przerywanie: Optional[Przerywanie]  # bez progu kosztu
+    ograniczenie_kosztu: bool
+    filtr_stabilnosci: bool
+    ms_max: Optional[float]  # próg czułości filtra stabilności (None = bez progu)
+    precyzja: str  # precyzja metryk siatki: symulacja.paczki.precyzja lub float64 bez symulacji wsadowej
+
+    def utworz_model(self):
+        return self.model.utworz(**self.parametry_modelu)
+
+    def odcisk_symulacji(self) -> str:
+        """
+        Odcisk ustawień, od których zależą metryki kandydatów (bez wag kary) -
+        archiwum kandydatów jest aktualne tylko przy tym samym odcisku.
+        Obwiednia rozbieżności i filtr stabilności decydują, którzy kandydaci
+        mają metryki, więc też są częścią odcisku. Ograniczenie kosztu nie -
+        kandydaci archiwum symulowani są zawsze bez niego. Precyzja (float32 /
+        float64 symulacji wsadowej) zmienia wartości metryk.
+        """
+        przerywanie = self.przerywanie
+        opis = {
+            "model": self.model_nazwa,
+            "parametry_modelu": self.parametry_modelu,
+            "dt": self.dt,
+            "czas_sym": self.czas_sym,
+            "r_zad": self.r_zad,
+            "tryb": self.tryb,
+            "zakonczenie": self.zakonczenie,
+            "obwiednia": przerywanie.obwiednia if przerywanie is not None else None,
+            "czas_bloku": przerywanie.czas_bloku if przerywanie is not None else None,
+            "filtr_stabilnosci": self.filtr_stabilnosci,
+            "ms_max": self.ms_max,
+            "precyzja": self.precyzja,
+        }
+        tekst = json.dumps(opis, sort_keys=True, default=repr)
+        return hashlib.sha256(tekst.encode("utf-8")).hexdigest()[:16]
+
+    def przerywanie_z_progiem(self, ograniczenie_kosztu=None) -> Optional[Przerywanie]:
+        """
+        Przerywanie symulacji (sekcja 'symulacja.przerywanie'): obwiednia rozbieżności
+        oraz próg kosztu (najlepsza dotychczasowa kara), jeśli włączony.
+        """
+        if self.przerywanie is None or not self.ograniczenie_kosztu:
+            return self.przerywanie
+        return self.przerywanie.z_progiem(ograniczenie_kosztu)
+
+
+@lru_cache(maxsize=None)
+def _zbuduj_kontekst(cfg, model_nazwa: str) -> KontekstStrojenia:
+    wpis = rejestr.model(model_nazwa)
+    parametry_modelu = _parametry_modelu_strojenia(cfg, wpis.klasa)
+    model = wpis.utworz(**parametry_modelu)
+    wagi = cfg.pobierz_wagi_kary()
+    cfg_przerywania = cfg.pobierz_config_przerywania()
+    # Dolne ograniczenie kary liczone jest z tymi samymi wagami co FunkcjaKary
+    przerywanie = Przerywanie.z_konfiguracji(
+        cfg_przerywania,
+        w_mp=float(wagi.get('przeregulowanie', FunkcjaKary.w_mp)),
+        w_ts=float(wagi.get('czas_ustalania', FunkcjaKary.w_ts)))
+    return KontekstStrojenia(
+        model_nazwa=model_nazwa,
+        model=wpis,
+        parametry_modelu=parametry_modelu,
+        # Okres próbkowania regulatora (domyślnie krok modelu)
+        dt=cfg.pobierz_czas_probkowania(model_nazwa) or model.dt,
+        czas_sym=_czas_symulacji_strojenia(cfg, model),
+        r_zad=0.0 if model_nazwa == "wahadlo_odwrocone" else 1.0,
+        tryb=cfg.pobierz_tryb_symulacji(),
+        zakonczenie=WczesneZakonczenie.z_konfiguracji(cfg.pobierz_wczesne_zakonczenie()),
+        przerywanie=przerywanie,
+        ograniczenie_kosztu=bool(cfg_przerywania.get('ograniczenie_kosztu', False)),
+        filtr_stabilnosci=bool(cfg_przerywania.get('filtr_stabilnosci', False)),
+        ms_max=float(cfg_przerywania['ms_max']) if cfg_przerywania.get('ms_max') else None,
+        precyzja=(str(np.dtype(cfg.pobierz_config_paczek().get('precyzja', 'float64')))
+                  if cfg.czy_symulacja_wsadowa(model_nazwa) else 'float64'),
+    )
+
+
+def _kontekst_strojenia(model_nazwa: str) -> KontekstStrojenia:
+    """Kontekst dla bieżącej konfiguracji (przeładowanie konfiguracji tworzy nowy)."""
+    return _zbuduj_kontekst(pobierz_konfiguracje(), model_nazwa)
+
+
+@lru_cache(maxsize=None)
+def _zbuduj_funkcje_kary(cfg, model_nazwa: str, RegulatorClass) -> FunkcjaKary:
+    return FunkcjaKary.z_konfiguracji(cfg, model_nazwa, RegulatorClass)
+
+
+def _funkcja_kary(RegulatorClass, model_nazwa: str) -> FunkcjaKary:
+    """Funkcja kary dla (model, regulator) z bieżącej konfiguracji - budowana raz."""
+    return _zbuduj_funkcje_kary(pobierz_konfiguracje(), model_nazwa, RegulatorClass)
 
 
 # ------------------------------------------------------------
 # Funkcja pomocnicza - symulacja testowa dla tuningu
 # ------------------------------------------------------------
-def _uruchom_symulacje_testowa(RegulatorClass, parametry: dict, model_nazwa: str, czas_sym=120.0):
+
+
+def _uruchom_symulacje_testowa(RegulatorClass, parametry: dict, model_nazwa: str, czas_sym=None,
+                               ograniczenie_kosztu=None):
     """
     Uruchamia symulację z podanymi parametrami regulatora i modelu.
     Zwraca wyniki metryk (IAE, Mp, ts, tr) oraz funkcję kary.
@@ -38,97 +182,36 @@ def _uruchom_symulacje_testowa(RegulatorClass, parametry: dict, model_nazwa: str
         RegulatorClass: Klasa regulatora (regulator_p, regulator_pi, etc.)
         parametry: dict z parametrami {"Kp": 1.0, "Ti": 10.0, "Td": 3.0, ...}
         model_nazwa: nazwa modelu ("zbiornik_1rz", "dwa_zbiorniki", "wahadlo_odwrocone")
-        czas_sym: czas symulacji w sekundach
+        czas_sym: czas symulacji w sekundach (None = _czas_symulacji_strojenia)
+        ograniczenie_kosztu: najlepsza dotychczasowa kara - symulacja przerywana, gdy
+            kara na pewno ją przekroczy (zwracane jest wtedy dolne ograniczenie kary)
         
     Returns:
         tuple: (wyniki_metryki, funkcja_kary)
     """
     try:
-        # Import modelu
-        ModelClass = _dynamiczny_import("modele", model_nazwa)
-        model = ModelClass()
-        dt = model.dt
-        
-        # Filtruj parametry do sygnatury konstruktora
-        import inspect
-        sig = inspect.signature(RegulatorClass.__init__)
-        parametry_filtr = {k: v for k, v in parametry.items() if k in sig.parameters and v is not None}
-        
-        # Dla strojenia: usuń limity saturacji (umin, umax) żeby regulator mógł swobodnie działać
-        # Model sam zadba o fizyczne ograniczenia
-        # Stwórz regulator z parametrami - UWAGA: Dla przemysłu dodaj realistyczne limity
-        regulator = RegulatorClass(**parametry_filtr, dt=dt, umin=-15.0, umax=15.0)
-        
-        # Symulacja
-        kroki = int(czas_sym / dt)
-        t, r, y, u = [], [], [], []
-        
-        # Wartość zadana zależna od modelu
-        r_zad = 0.0 if model_nazwa == "wahadlo_odwrocone" else 1.0
+        kontekst = _kontekst_strojenia(model_nazwa)
+        model = kontekst.utworz_model()
+        if czas_sym is None:
+            czas_sym = kontekst.czas_sym
         
-        for k in range(kroki):
-            t.append(k * dt)
-            y_k = model.y
-            u_k = regulator.update(r_zad, y_k)
-            y_nowe = model.step(u_k)
-            r.append(r_zad)
-            y.append(y_nowe)
-            u.append(u_k)
+        # Stwórz regulator z parametrami (filtr do sygnatury konstruktora z rejestru)
+        # UWAGA: Dla przemysłu dodaj realistyczne limity
+        regulator = rejestr.regulator_klasy(RegulatorClass).utworz(parametry, dt=kontekst.dt)
         
-        # Oblicz metryki
-        wyniki = oblicz_metryki(t, r, y, u)
+        # Symulacja (tryb silnika z sekcji 'symulacja' w config.yaml)
+        wynik = symuluj_petle(model, regulator, czas_sym, r=kontekst.r_zad,
+                              tryb=kontekst.tryb,
+                              zakonczenie=kontekst.zakonczenie,
+                              przerywanie=kontekst.przerywanie_z_progiem(ograniczenie_kosztu))
+        if wynik.przerwano == "rozbieznosc":
+            return DummyMetryki(), 999999.0
+        if wynik.przerwano == "ograniczenie_kosztu":
+            return DummyMetryki(), float(wynik.koszt_dolny)
+        # Oblicz metryki (z std(u) - archiwum kandydatów przelicza kary bez symulacji)
+        wyniki = MetrykiKandydata(**asdict(wynik.metryki()), odchylenie_u=float(np.std(wynik.u)))
+        kara = _funkcja_kary(RegulatorClass, model_nazwa)(wyniki, parametry, wyniki.odchylenie_u)
 
-        # Wczytaj wagi funkcji kary z konfiguracji
-        try:
-            import sys
-            sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            from konfig import pobierz_konfiguracje
-            cfg = pobierz_konfiguracje()
-            wagi = cfg.pobierz_wagi_kary()
-            zakresy = cfg.pobierz_zakresy_parametrow(model_nazwa)
-            w_mp = float(wagi.get('przeregulowanie', 0.5))
-            w_ts = float(wagi.get('czas_ustalania', 1.0))
-            w_const = float(wagi.get('sterowanie_stale', 1000))
-            w_extreme = float(wagi.get('parametry_ekstremalne', 50))
-        except Exception:
-            w_mp, w_ts, w_const, w_extreme = 0.5, 1.0, 1000.0, 50.0
-            zakresy = {}
-
-        # Funkcja kary (niższa = lepsza)
-        # Priorytet: IAE + kara za przeregulowanie + kara za wolne ustalanie
-        kara = wyniki.IAE + w_mp * wyniki.przeregulowanie + w_ts * wyniki.czas_ustalania
-
-        # Dodatkowa kara za niestabilność (jeśli regulator nie reaguje)
-        if np.std(u) < 1e-4:
-            kara += w_const
-        
-        # Kara za parametry zbliżone do granic zakresu (preferuj wartości środkowe)
-        if zakresy:
-            kp = parametry.get('Kp', 0)
-            ti = parametry.get('Ti', None)
-            td = parametry.get('Td', None)
-            
-            # Penalizuj Kp bliskie GÓRNEJ granicy (>70% zakresu)
-            if 'Kp' in zakresy:
-                kp_min, kp_max = zakresy['Kp']
-                if kp > kp_min + 0.7 * (kp_max - kp_min):
-                    przekroczenie = (kp - (kp_min + 0.7*(kp_max - kp_min))) / (0.3*(kp_max - kp_min))
-                    kara += w_extreme * przekroczenie * przekroczenie  # Kara kwadratowa
-            
-            # Penalizuj Ti bliskie GÓRNEJ granicy (>70% zakresu) 
-            if ti and 'Ti' in zakresy:
-                ti_min, ti_max = zakresy['Ti']
-                if ti > ti_min + 0.7 * (ti_max - ti_min):
-                    przekroczenie = (ti - (ti_min + 0.7*(ti_max - ti_min))) / (0.3*(ti_max - ti_min))
-                    kara += w_extreme * przekroczenie * przekroczenie  # Kara kwadratowa
-            
-            # Penalizuj Td bliskie DOLNEJ granicy (<20% zakresu) - chcemy WYŻSZYCH wartości Td
-            if td and 'Td' in zakresy:
-                td_min, td_max = zakresy['Td']
-                if td < td_min + 0.2 * (td_max - td_min):
-                    przekroczenie = ((td_min + 0.2*(td_max - td_min)) - td) / (0.2*(td_max - td_min))
-                    kara += 2.0 * w_extreme * przekroczenie * przekroczenie  # Podwójna kara za NISKIE Td
-        
         return wyniki, kara
         
     except Exception as e:
@@ -138,14 +221,104 @@ def _uruchom_symulacje_testowa(RegulatorClass, parametry: dict, model_nazwa: str
             logging.exception(f"Błąd symulacji podczas strojenia: {e}")
         except Exception:
             print(f"[UWAGA] Błąd symulacji: {e}")
-        class DummyMetryki:
-            IAE = 999999
-            przeregulowanie = 999
-            czas_ustalania = 999
-            czas_narastania = 999
         return DummyMetryki(), 999999.0
 
 
+# ------------------------------------------------------------
+# Funkcja pomocnicza - symulacja wsadowa dla przeszukiwania siatki
+# ------------------------------------------------------------
+def _uruchom_symulacje_wsadowa(RegulatorClass, lista_parametrow: list, model_nazwa: str,
+                               czas_sym=None, rozmiar_paczki=None, ograniczenie_kosztu=None):
+    """
+    Wsadowy odpowiednik _uruchom_symulacje_testowa: symuluje całą listę
+    kombinacji parametrów jednocześnie (src/symulacja/wsadowa.py).
+
+    Args:
+        RegulatorClass: Klasa regulatora (regulator_p, regulator_pi, etc.)
+        lista_parametrow: lista dict {"Kp": ..., "Ti": ..., "Td": ...}
+        model_nazwa: nazwa modelu
+        czas_sym: czas symulacji w sekundach (None = _czas_symulacji_strojenia)
+        rozmiar_paczki: liczba kandydatów w jednym wsadzie (None = z budżetu pamięci
+            symulacja.paczki.budzet_pamieci_mb)
+        ograniczenie_kosztu: próg kary jak w _uruchom_symulacje_testowa
+
+    Returns:
+        list: [(wyniki_metryki, funkcja_kary), ...] w kolejności lista_parametrow
+    """
+    from src.symulacja.wsadowa import KOLUMNY_PARAMETROW, ocen_wsadowo
+
+    typ = RegulatorClass.__name__.lower()
+    kolumny = KOLUMNY_PARAMETROW[typ]
+    kontekst = _kontekst_strojenia(model_nazwa)
+    cfg = pobierz_konfiguracje()
+    if czas_sym is None:
+        czas_sym = kontekst.czas_sym
+
+    cfg_paczek = cfg.pobierz_config_paczek()
+    dtype = np.dtype(cfg_paczek.get('precyzja', 'float64'))
+    macierz = np.array([[p[k] for k in kolumny] for p in lista_parametrow], dtype=float)
+    ocena = ocen_wsadowo(kontekst.model.klasa, typ, macierz, czas_sym=czas_sym,
+                         budzet_pamieci_mb=float(cfg_paczek.get('budzet_pamieci_mb', 256)),
+                         dtype=dtype, zbior_referencyjny=int(cfg_paczek.get('zbior_referencyjny', 0)),
+                         paczka=rozmiar_paczki, r_zad=kontekst.r_zad,
+                         parametry_modelu=kontekst.parametry_modelu,
+                         zakonczenie=kontekst.zakonczenie,
+                         przerywanie=kontekst.przerywanie_z_progiem(ograniczenie_kosztu),
+                         czas_probkowania=cfg.pobierz_czas_probkowania(model_nazwa))
+    if ocena.odchylka_float32 is not None:
+        logging.info(f"Symulacja wsadowa float32 ({model_nazwa}): maks. względna odchyłka "
+                     f"od float64 {ocena.odchylka_float32}")
+
+    # Kary wszystkich zasymulowanych kandydatów jednym wywołaniem
+    ocenione = [i for i, m in enumerate(ocena.metryki) if m is not None]
+    kary = _funkcja_kary(RegulatorClass, model_nazwa).dla_listy(
+        [ocena.metryki[i] for i in ocenione], [lista_parametrow[i] for i in ocenione],
+        ocena.odchylenie_u[ocenione])
+    kara_kandydata = dict(zip(ocenione, kary.tolist()))
+
+    wyniki = []
+    for i, (metryki, przerwano, koszt_dolny) in enumerate(
+            zip(ocena.metryki, ocena.przerwano, ocena.koszt_dolny)):
+        if przerwano == "ograniczenie_kosztu":
+            wyniki.append((DummyMetryki(), float(koszt_dolny)))
+        elif metryki is None:
+            wyniki.append((DummyMetryki(), 999999.0))
+        else:
+            wyniki.append((MetrykiKandydata(**asdict(metryki), odchylenie_u=float(ocena.odchylenie_u[i])),
+                           kara_kandydata[i]))
+    return wyniki
+
+
+# ------------------------------------------------------------
+# Funkcja pomocnicza - analityczny filtr stabilności kandydatów
+# ------------------------------------------------------------
+def _stabilne_kandydaty(RegulatorClass, lista_parametrow: list, model_nazwa: str) -> np.ndarray:
+    """
+    Maska kandydatów z asymptotycznie stabilną pętlą liniową (bieguny pętli
+    bez saturacji wewnątrz okręgu jednostkowego, src/analiza/stabilnosc.py).
+    Przy progu symulacja.przerywanie.ms_max odrzucani są także kandydaci
+    o zbyt dużej czułości maksymalnej Ms (src/analiza/odpornosc.py).
+    Odrzuconych nie trzeba symulować - dostają karę rozbieżności.
+    """
+    kontekst = _kontekst_strojenia(model_nazwa)
+    calkowanie = RegulatorClass._calkowanie
+    rozniczkowanie = RegulatorClass._rozniczkowanie
+    nastawy = dict(
+        Kp=[p["Kp"] for p in lista_parametrow],
+        Ti=[p.get("Ti") if calkowanie else None for p in lista_parametrow],
+        Td=[(p.get("Td") or 0.0) if rozniczkowanie else 0.0 for p in lista_parametrow],
+        N=[p.get("N") or 10.0 for p in lista_parametrow],
+        czas_probkowania=kontekst.dt,
+    )
+    ms_max = pobierz_konfiguracje().pobierz_config_przerywania().get('ms_max')
+    if not ms_max:
+        return stabilne(kontekst.utworz_model(), **nastawy)
+
+    wynik = marginesy(kontekst.utworz_model(), **nastawy)
+    # Model bez postaci liniowej: Ms = NaN, filtr Ms nie odrzuca kandydatów
+    return wynik.stabilne & ~(wynik.Ms > float(ms_max))
+
+
 # ------------------------------------------------------------
 # Pomocnicze funkcje formatowania i filtrowania
 # ------------------------------------------------------------
@@ -206,9 +379,6 @@ def _zapisz_raport_html(meta, parametry, historia=None, out_dir="wyniki"):
 
         # Czas obliczeń (opcjonalnie)
         try:
-            import sys
-            sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            from konfig import pobierz_konfiguracje
             cfg = pobierz_konfiguracje().pobierz_config_raportowania()
             if cfg.get('pokaz_czas_obliczen') and meta.get('czas_obliczen_s') is not None:
                 f.write(f"<p><strong>Czas obliczeń:</strong> {meta['czas_obliczen_s']:.2f} s</p>")
@@ -236,6 +406,68 @@ def _zapisz_raport_html(meta, parametry, historia=None, out_dir="wyniki"):
 # ------------------------------------------------------------
 # Główna funkcja strojenia
 # ------------------------------------------------------------
+def _zapisz_parametry(regulator_nazwa, metoda, model_nazwa, params, czas_obliczen_s, out_dir) -> str:
+    """Zapisuje parametry_{regulator}_{metoda}_{model}.json dla walidacji i wdrożenia."""
+    # Okres próbkowania, dla którego dobrano nastawy - walidacja i wdrożenie używają tego samego
+    czas_probkowania = _kontekst_strojenia(model_nazwa).dt
+    out = {"regulator": regulator_nazwa, "metoda": metoda, "model": model_nazwa, "parametry": params,
+           "czas_probkowania": czas_probkowania, "czas_obliczen_s": czas_obliczen_s}
+
+    json_path = os.path.join(out_dir, f"parametry_{regulator_nazwa}_{metoda}_{model_nazwa}.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+    print(f" Zapisano parametry: {json_path}")
+    return json_path
+
+
+def przelicz_wagi(model_nazwa="zbiornik_1rz", regulator_nazwa=None, katalog=None,
+                  wagi: Optional[Dict[str, float]] = None, zapisz=False):
+    """
+    Ranking kandydatów siatki przy nowych wagach kary bez ponownej symulacji
+    (metryki z archiwum kandydaci_{regulator}_{model}.json etapu 'siatka').
+
+    Args:
+        regulator_nazwa: None = zmienna środowiskowa REGULATOR
+        katalog: katalog archiwum (None = OUT_DIR lub 'wyniki')
+        wagi: nadpisanie kluczy sekcji 'wagi_kary' (None = wagi z config.yaml)
+        zapisz: nadpisz parametry_{regulator}_siatka_{model}.json najlepszym kandydatem
+
+    Returns:
+        (parametry, kara) najlepszego kandydata lub None, gdy brak aktualnego archiwum
+    """
+    regulator_nazwa = (regulator_nazwa or os.getenv("REGULATOR", "regulator_pid")).lower()
+    katalog = katalog or os.getenv("OUT_DIR", "wyniki")
+    archiwum = wczytaj_archiwum(regulator_nazwa, model_nazwa, katalog)
+    if archiwum is None:
+        return None
+    if archiwum.odcisk != _kontekst_strojenia(model_nazwa).odcisk_symulacji():
+        logging.warning(f"Archiwum kandydatów {regulator_nazwa}/{model_nazwa} policzono dla innych "
+                        f"ustawień symulacji - wymagane ponowne przeszukiwanie siatki")
+        return None
+    bez_metryk = int((~archiwum.ocenione).sum())
+    if bez_metryk:
+        logging.warning(f"Archiwum kandydatów {regulator_nazwa}/{model_nazwa}: {bez_metryk}/{len(archiwum)} "
+                        f"kandydatów bez metryk (rozbieżni lub odrzuceni filtrem stabilności) - "
+                        f"w rankingu traktowani jak nieudani")
+
+    import time
+    start_time = time.time()
+    kara = _funkcja_kary(rejestr.regulator(regulator_nazwa).klasa, model_nazwa)
+    if wagi:
+        kara = kara.z_wagami(wagi)
+    najlepszy = archiwum.najlepszy(kara)
+    if najlepszy is None:
+        return None
+    czas_obliczen_s = time.time() - start_time
+    print(f"[INFO] Przeliczono wagi dla {int(archiwum.ocenione.sum())}/{len(archiwum)} kandydatów "
+          f"{regulator_nazwa}/{model_nazwa} w {1000 * czas_obliczen_s:.1f} ms: "
+          f"{najlepszy[0]} (kara={najlepszy[1]:.2f})")
+    if zapisz:
+        _zapisz_parametry(regulator_nazwa, "siatka", model_nazwa,
+                          _filter_for_regulator(regulator_nazwa, najlepszy[0]), czas_obliczen_s, katalog)
+    return najlepszy
+
+
 def wykonaj_strojenie(metoda="ziegler_nichols", model_nazwa="zbiornik_1rz"):
     """
     Główna funkcja strojenia regulatora z użyciem prawdziwych symulacji.
@@ -257,11 +489,6 @@ def wykonaj_strojenie(metoda="ziegler_nichols", model_nazwa="zbiornik_1rz"):
     print(f"{'='*60}")
     
     # Konfiguruj logowanie
-    import logging
-    import sys
-    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from konfig import pobierz_konfiguracje
-    
     config = pobierz_konfiguracje()
     config_log = config.pobierz_config_logowania()
     
@@ -276,40 +503,71 @@ def wykonaj_strojenie(metoda="ziegler_nichols", model_nazwa="zbiornik_1rz"):
     )
     
     # Import klasy regulatora
-    RegulatorClass = _dynamiczny_import("regulatory", regulator_nazwa)
+    RegulatorClass = rejestr.regulator(regulator_nazwa).klasa
     
     # --- 1) Wyznacz parametry używając prawdziwych symulacji ---
     historia = []
     params_zn = None  # Do przekazania jako punkt startowy dla optymalizacji
+    kontekst = _kontekst_strojenia(model_nazwa)  # model i Ts eksperymentu przekaźnikowego (ZN)
+    # Analityczny test stabilności przed symulacją (symulacja.przerywanie.filtr_stabilnosci)
+    funkcja_stabilnosci = (_stabilne_kandydaty
+                           if config.pobierz_config_przerywania().get('filtr_stabilnosci', False) else None)
     
     import time
     start_time = time.time()
 
     if metoda == "ziegler_nichols":
         from src.strojenie.ziegler_nichols import strojenie_ZN
-        pelne = strojenie_ZN(RegulatorClass, model_nazwa, regulator_nazwa)
+        pelne = strojenie_ZN(RegulatorClass, model_nazwa, regulator_nazwa,
+                             model=kontekst.utworz_model(), czas_probkowania=kontekst.dt)
         params_zn = pelne  # Zapisz dla ewentualnego użycia
 
     elif metoda == "siatka":
         from src.strojenie.przeszukiwanie_siatki import strojenie_siatka
-        pelne = strojenie_siatka(RegulatorClass, model_nazwa, regulator_nazwa, 
-                                _uruchom_symulacje_testowa)
+        funkcja_wsadowa = (_uruchom_symulacje_wsadowa if config.czy_symulacja_wsadowa(model_nazwa)
+                           else None)
+        # Zbieranie kandydatów (kandydaci_siatki.zbieraj) wyłącza ograniczenie kosztu
+        if config.czy_zbierac_kandydatow():
+            pelne, kandydaci = strojenie_siatka(RegulatorClass, model_nazwa, regulator_nazwa,
+                                                _uruchom_symulacje_testowa, funkcja_wsadowa,
+                                                funkcja_stabilnosci=funkcja_stabilnosci,
+                                                zwroc_kandydatow=True)
+            # Front Pareto (IAE, Mp, t_s) z tego samego przebiegu - kompromis dla dowolnych wag kary
+            from src.strojenie.pareto import zapisz_front_pareto
+            pareto_path = zapisz_front_pareto(kandydaci, regulator_nazwa, model_nazwa, out_dir)
+            print(f" Zapisano front Pareto: {pareto_path}")
+            # Metryki wszystkich kandydatów - przelicz_wagi() bez ponownej symulacji
+            archiwum_path = zapisz_archiwum(kandydaci, regulator_nazwa, model_nazwa,
+                                            kontekst.odcisk_symulacji(), out_dir)
+            print(f" Zapisano metryki kandydatów: {archiwum_path}")
+        else:
+            pelne = strojenie_siatka(RegulatorClass, model_nazwa, regulator_nazwa,
+                                     _uruchom_symulacje_testowa, funkcja_wsadowa,
+                                     funkcja_stabilnosci=funkcja_stabilnosci)
 
     elif metoda == "optymalizacja":
         from src.strojenie.optymalizacja_numeryczna import strojenie_optymalizacja
         
-        # Najpierw uruchom ZN aby uzyskać punkt startowy (jeśli skonfigurowane)
-        if config.pobierz_config_optymalizacji()['punkty_startowe']['uzyj_ziegler_nichols']:
+        # Ciepły start z najlepszego kandydata siatki przy bieżących wagach (archiwum
+        # z etapu 'siatka'); bez archiwum - multi-start z punktem ZN
+        przeliczenie = przelicz_wagi(model_nazwa, regulator_nazwa, katalog=out_dir)
+        punkt_startowy = przeliczenie[0] if przeliczenie is not None else None
+        if punkt_startowy is not None:
+            print(f"[INFO] Ciepły start z najlepszego kandydata siatki: {punkt_startowy}")
+        elif config.pobierz_config_optymalizacji()['punkty_startowe']['uzyj_ziegler_nichols']:
             try:
                 from src.strojenie.ziegler_nichols import strojenie_ZN
-                params_zn = strojenie_ZN(RegulatorClass, model_nazwa, regulator_nazwa)
+                params_zn = strojenie_ZN(RegulatorClass, model_nazwa, regulator_nazwa,
+                                         model=kontekst.utworz_model(), czas_probkowania=kontekst.dt)
                 print(f"[INFO] Użyję parametrów ZN jako punktu startowego: {params_zn}")
             except Exception as e:
                 logging.warning(f"Nie udało się uzyskać parametrów ZN: {e}")
                 params_zn = None
         
         pelne, historia = strojenie_optymalizacja(RegulatorClass, model_nazwa, regulator_nazwa,
-                                                  _uruchom_symulacje_testowa, params_zn)
+                                                  _uruchom_symulacje_testowa, params_zn,
+                                                  funkcja_stabilnosci=funkcja_stabilnosci,
+                                                  punkt_startowy=punkt_startowy)
 
     else:
         raise ValueError(f"[X] Nieznana metoda strojenia: {metoda}")
@@ -321,12 +579,7 @@ def wykonaj_strojenie(metoda="ziegler_nichols", model_nazwa="zbiornik_1rz"):
 
     # --- 3) Zapisz JSON + raport HTML ---
     meta = {"regulator": regulator_nazwa, "metoda": metoda, "model": model_nazwa, "czas_obliczen_s": czas_obliczen_s}
-    out = {"regulator": regulator_nazwa, "metoda": metoda, "model": model_nazwa, "parametry": params, "czas_obliczen_s": czas_obliczen_s}
-
-    json_path = os.path.join(out_dir, f"parametry_{regulator_nazwa}_{metoda}_{model_nazwa}.json")
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(out, f, indent=2)
-    print(f" Zapisano parametry: {json_path}")
+    _zapisz_parametry(regulator_nazwa, metoda, model_nazwa, params, czas_obliczen_s, out_dir)
 
     _zapisz_raport_html(meta, params, historia, out_dir)
     return params
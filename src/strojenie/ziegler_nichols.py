@@ -1,15 +1,57 @@
 ﻿# src/strojenie/ziegler_nichols.py
-def strojenie_ZN(RegulatorClass, model_nazwa, typ_regulatora):
-    if model_nazwa == "zbiornik_1rz":
-        Ku, Tu = 10.0, 20.0
-    elif model_nazwa == "dwa_zbiorniki":
-        Ku, Tu = 5.0, 30.0
-    elif model_nazwa == "wahadlo_odwrocone":
-        Ku, Tu = 15.0, 4.0
-    else:
-        Ku, Tu = 8.0, 20.0
+"""
+Strojenie metodą Zieglera-Nicholsa. Wzmocnienie krytyczne Ku i okres
+oscylacji Tu mierzone są eksperymentem przekaźnikowym na modelu
+(eksperyment_przekaznikowy.py, sekcja 'eksperyment_przekaznikowy' w config.yaml).
+"""
+import os
+import sys
+
+# Dodaj katalog src do PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from konfig import pobierz_konfiguracje
+from src import rejestr
+from src.strojenie.eksperyment_przekaznikowy import wyznacz_ku_tu
+
+# Wartości zastępcze, gdy eksperyment nie wytworzy cyklu granicznego albo
+# cykl nie opisuje punktu krytycznego (WynikPrzekaznika.powod_odrzucenia())
+_KU_TU_ZASTEPCZE = {
+    "zbiornik_1rz": (10.0, 20.0),
+    "dwa_zbiorniki": (5.0, 30.0),
+    "wahadlo_odwrocone": (15.0, 4.0),
+}
+
+
+def _ku_tu(model_nazwa, model=None, czas_probkowania=None):
+    """(Ku, Tu) z eksperymentu przekaźnikowego (wynik zapamiętany per odcisk obiektu)."""
+    cfg = dict(pobierz_konfiguracje().pobierz_config_przekaznika())
+    plik = cfg.pop('plik_wynikow', None)
+    if model is None:
+        model = rejestr.model(model_nazwa).utworz()
+    wynik = wyznacz_ku_tu(model, plik=plik, czas_probkowania=czas_probkowania, **cfg)
+    Ku, Tu = _KU_TU_ZASTEPCZE.get(model_nazwa, (8.0, 20.0))
+    if wynik is None:
+        print(f"[ZN] Eksperyment przekaźnikowy bez cyklu granicznego - uzywam Ku={Ku}, Tu={Tu}")
+        return Ku, Tu
+    print(f"[ZN] Przekaźnik: a={wynik.amplituda:.4g}, ε={wynik.histereza:.4g}, "
+          f"faza punktu {wynik.faza:.1f}°")
+    powod = wynik.powod_odrzucenia()
+    if powod is not None:
+        print(f"[ZN] UWAGA: {powod} - wynik przekaźnika pominięty, uzywam Ku={Ku}, Tu={Tu}")
+        return Ku, Tu
+    return wynik.Ku, wynik.Tu
+
+
+def strojenie_ZN(RegulatorClass, model_nazwa, typ_regulatora, model=None, czas_probkowania=None):
+    """
+    Args:
+        model: instancja modelu do eksperymentu (None = domyślna z rejestru)
+        czas_probkowania: okres próbkowania regulatora Ts (None = krok modelu)
+    """
+    Ku, Tu = _ku_tu(model_nazwa, model, czas_probkowania)
     
-    print(f"[ZN] Uzywam Ku={Ku}, Tu={Tu} dla modelu {model_nazwa}")
+    print(f"[ZN] Uzywam Ku={Ku:.4g}, Tu={Tu:.4g} dla modelu {model_nazwa}")
     
     typ = typ_regulatora.lower()
     if typ == "regulator_p":
@@ -0,0 +1,387 @@
+# src/symulacja/silnik.py
+"""
+Wspólny silnik symulacji zamkniętej pętli regulacji (model + regulator).
+
+Jedna implementacja pętli dla strojenia (_uruchom_symulacje_testowa),
+walidacji podstawowej (uruchom_symulacje) i rozszerzonej (walidacja_rozszerzona):
+- trajektorie zapisywane są do prealokowanych buforów float64,
+- wartość zadana, zakłócenie na wejściu procesu i szum pomiarowy
+  podawane są jako tablice (lub stała dla wartości zadanej).
+
+Kolejność w kroku k (jak we wcześniejszych pętlach):
+    u[k] = regulator.update(r[k], y_modelu + szum[k])
+    y[k] = model.step(u[k] + zaklocenie[k])
+
+Wielotaktowość: okres próbkowania regulatora (regulator.dt = Ts) może być
+całkowitą wielokrotnością kroku całkowania modelu (model.dt). Regulator liczony
+jest wtedy co Ts / model.dt kroków, a u trzymane między próbkami (ZOH).
+
+Tryby:
+- "krokowy": zawsze pętla krok po kroku,
+- "zdarzeniowy": propagacja analityczna między zdarzeniami (zdarzeniowa.py),
+  bez szumu pomiarowego; w przeciwnym razie pętla krokowa,
+- "auto": najpierw szybka ścieżka liniowa (uklad_liniowy, lfilter), jeśli
+  model i regulator mają postać liniową, a sterowanie nie wchodzi w saturację;
+  dalej tryb zdarzeniowy, a na końcu pętla krokowa.
+Szybkie ścieżki wymagają Ts == model.dt; w pętli wielotaktowej zawsze krokowo.
+
+Wczesne zakończenie (pętla krokowa i wsadowa): po ostatnim zdarzeniu
+w r/zakłóceniu i bez szumu symulacja kończy się, gdy y i u przez okno
+czasu mieszczą się w paśmie; reszta trajektorii to wartości ustalone.
+
+Horyzont: czas symulacji dobierany z dynamiki obiektu - ostatnie zdarzenie
++ krotnosc * suma stałych czasowych modelu (model.stale_czasowe()).
+
+Przerywanie (strojenie): symulacja jest przerywana, gdy |y| lub |u| wyjdzie
+poza obwiednię (rozbieżność) albo gdy dolne ograniczenie kary z dotychczasowej
+trajektorii przekroczy najlepszy znany koszt (branch-and-bound).
+"""
+from dataclasses import dataclass, replace
+from typing import Optional, Union
+
+import numpy as np
+
+from src.metryki import AkumulatorMetryk, Metryki, oblicz_metryki, przeregulowanie_z_ekstremow
+from src.symulacja.uklad_liniowy import symuluj_liniowo, uklad_zamkniety
+from src.symulacja.zdarzeniowa import symuluj_zdarzeniowo
+
+TRYBY = ("auto", "zdarzeniowy", "krokowy")
+
+
+@dataclass(frozen=True)
+class WczesneZakonczenie:
+    """
+    pasmo: względna szerokość (ptp y i u w oknie względem zakresu sygnału od t=0)
+    okno: czas [s], przez który y i u muszą pozostać w paśmie
+    """
+    pasmo: float = 1e-5
+    okno: float = 5.0
+
+    @classmethod
+    def z_konfiguracji(cls, cfg: Optional[dict]) -> Optional["WczesneZakonczenie"]:
+        """Z sekcji symulacja.wczesne_zakonczenie; None, gdy wyłączone."""
+        if not cfg or not cfg.get('wlaczone', False):
+            return None
+        return cls(pasmo=float(cfg.get('pasmo', 1e-5)), okno=float(cfg.get('okno', 5.0)))
+
+    def kroki_okna(self, dt: float) -> int:
+        return max(2, int(np.ceil(self.okno / dt)))
+
+
+@dataclass(frozen=True)
+class Horyzont:
+    """
+    krotnosc: ile sum stałych czasowych modelu symulować po ostatnim zdarzeniu
+    minimum, maksimum: ograniczenia czasu symulacji [s]
+    """
+    krotnosc: float = 10.0
+    minimum: float = 20.0
+    maksimum: float = 300.0
+
+    @classmethod
+    def z_konfiguracji(cls, cfg: Optional[dict]) -> Optional["Horyzont"]:
+        """Z sekcji symulacja.horyzont; None, gdy automatyczny horyzont jest wyłączony."""
+        if not cfg or not cfg.get('automatyczny', False):
+            return None
+        return cls(krotnosc=float(cfg.get('krotnosc', 10.0)),
+                   minimum=float(cfg.get('minimum', 20.0)),
+                   maksimum=float(cfg.get('maksimum', 300.0)))
+
+    def czas(self, model, czas_zdarzenia: float = 0.0,
+             czas_ustalania_max: Optional[float] = None) -> float:
+        """
+        Czas symulacji [s] dla modelu. Przy bramce czasu ustalania horyzont jest od niej
+        dłuższy o sumę stałych czasowych - nieustalona pętla ma wtedy t_s > progu.
+        """
+        tau = float(sum(model.stale_czasowe()))
+        czas = czas_zdarzenia + self.krotnosc * tau
+        if czas_ustalania_max is not None:
+            czas = max(czas, czas_ustalania_max + tau)
+        return min(max(czas, self.minimum), self.maksimum)
+
+
+def ostatnie_zdarzenie(*sygnaly: Optional[np.ndarray]) -> int:
+    """Indeks pierwszej próbki po ostatniej zmianie któregokolwiek z sygnałów."""
+    k = 0
+    for s in sygnaly:
+        if s is not None and len(s) > 1:
+            zmiany = np.flatnonzero(np.diff(s) != 0)
+            if len(zmiany):
+                k = max(k, int(zmiany[-1]) + 1)
+    return k
+
+
+def czy_ustalony(y: np.ndarray, u: np.ndarray, pasmo: float, zakres_y, zakres_u,
+                 r_koncowe: Optional[float] = None, os_czasu: int = -1) -> np.ndarray:
+    """
+    Czy okno trajektorii (ostatnia oś = czas) jest ustalone: ptp(y), ptp(u) w oknie
+    nie większe niż pasmo * zakres sygnału od początku symulacji. Dla regulatorów
+    z całkowaniem (stan ustalony y = r) podaje się r_koncowe - wtedy także |r - y|
+    musi mieścić się w paśmie, bo wolny zanik członu I daje płaskie okno daleko
+    od stanu ustalonego. Działa dla (T,) i (N, T) / (T, N) (os_czasu);
+    NaN/inf nie są ustalone.
+    """
+    tol_y = pasmo * zakres_y
+    wynik = (np.ptp(y, axis=os_czasu) <= tol_y) & (np.ptp(u, axis=os_czasu) <= pasmo * zakres_u)
+    if r_koncowe is not None:
+        wynik &= np.max(np.abs(r_koncowe - y), axis=os_czasu) <= tol_y
+    return wynik
+
+
+@dataclass(frozen=True)
+class Przerywanie:
+    """
+    obwiednia: |y| lub |u| > obwiednia * max(|r|, |y0|, 1) -> "rozbieznosc" (None = wyłączone)
+    prog_kosztu: dolne ograniczenie kary (IAE + w_mp * przeregulowanie + w_ts * czas ustalania
+                 z dotychczasowej trajektorii) > prog_kosztu -> "ograniczenie_kosztu" (None = wyłączone)
+    pasmo_ustalania: pasmo czasu ustalania jak settle_band w oblicz_metryki
+    czas_bloku: co ile sekund symulacji sprawdzane są warunki
+    """
+    obwiednia: Optional[float] = 100.0
+    prog_kosztu: Optional[float] = None
+    w_mp: float = 0.5
+    w_ts: float = 0.0
+    pasmo_ustalania: float = 0.02
+    czas_bloku: float = 5.0
+
+    @classmethod
+    def z_konfiguracji(cls, cfg: Optional[dict], w_mp: float = 0.5,
+                       w_ts: float = 0.0) -> Optional["Przerywanie"]:
+        """Z sekcji symulacja.przerywanie; None, gdy obie kontrole są wyłączone."""
+        if not cfg:
+            return None
+        obwiednia = cfg.get('obwiednia')
+        if obwiednia is None and not cfg.get('ograniczenie_kosztu', False):
+            return None
+        return cls(obwiednia=float(obwiednia) if obwiednia is not None else None,
+                   w_mp=float(w_mp), w_ts=float(w_ts), czas_bloku=float(cfg.get('czas_bloku', 5.0)))
+
+    def z_progiem(self, prog_kosztu: Optional[float]) -> "Przerywanie":
+        """Kopia z nowym progiem kosztu (np. najlepsza dotychczasowa kara)."""
+        if prog_kosztu is not None and not np.isfinite(prog_kosztu):
+            prog_kosztu = None
+        return replace(self, prog_kosztu=prog_kosztu)
+
+    def kroki_bloku(self, dt: float) -> int:
+        return max(1, int(round(self.czas_bloku / dt)))
+
+    def limit(self, r: np.ndarray, y0) -> Optional[float]:
+        """Granica |y|, |u| dla rozbieżności."""
+        if self.obwiednia is None:
+            return None
+        return self.obwiednia * max(float(np.max(np.abs(r))), float(np.max(np.abs(y0))), 1.0)
+
+    def tolerancja_ustalania(self, y0, r_koncowe: float, r_poczatkowe: float):
+        """
+        Pasmo |y - r_koncowe| czasu ustalania jak w oblicz_metryki, gdy zależy tylko
+        od y[0] i r (skok); inf, gdy pasmo wynika z całej odpowiedzi (r ≈ y0).
+        """
+        step_amp = np.maximum(abs(r_koncowe - r_poczatkowe), np.abs(r_koncowe - np.asarray(y0)))
+        return np.where(step_amp > 1e-9, self.pasmo_ustalania * step_amp, np.inf)
+
+
+def dolne_ograniczenie_kosztu(iae, y0, y_max, y_min, w_mp: float,
+                              r_koncowe: float, r_poczatkowe: float,
+                              czas_ustalania=0.0, w_ts: float = 0.0):
+    """
+    IAE + w_mp * przeregulowanie + w_ts * czas ustalania z początkowego odcinka
+    trajektorii (IAE, ekstrema y i ostatnie wyjście z pasma do chwili bieżącej).
+    Wszystkie trzy mogą tylko rosnąć z dalszą symulacją, a pozostałe składniki
+    kary są nieujemne, więc wynik ogranicza karę całej symulacji od dołu.
+    Działa na skalarach i wektorach (N kandydatów).
+    """
+    mp = przeregulowanie_z_ekstremow(y0, y_max, y_min, r_koncowe, r_poczatkowe)
+    return iae + w_mp * mp + w_ts * czas_ustalania
+
+
+@dataclass(slots=True)
+class WynikSymulacji:
+    """
+    Trajektorie symulacji. Jeśli przerwano ("rozbieznosc" / "ograniczenie_kosztu"),
+    tablice obejmują tylko wykonaną część horyzontu, a koszt_dolny to dolne
+    ograniczenie kary w chwili przerwania.
+    """
+    t: np.ndarray
+    r: np.ndarray
+    y: np.ndarray
+    u: np.ndarray
+    przerwano: Optional[str] = None
+    koszt_dolny: Optional[float] = None
+
+    def metryki(self, settle_band: float = 0.02, hold_time: float = 0.0) -> Metryki:
+        """Metryki jakości regulacji dla tej trajektorii."""
+        return oblicz_metryki(self.t, self.r, self.y, self.u,
+                              settle_band=settle_band, hold_time=hold_time)
+
+
+def _sygnal(wartosc, kroki: int, nazwa: str) -> Optional[np.ndarray]:
+    """Zamienia stałą lub tablicę na wektor float64 długości kroki."""
+    if wartosc is None:
+        return None
+    if np.ndim(wartosc) == 0:
+        return np.full(kroki, float(wartosc))
+    tablica = np.asarray(wartosc, dtype=np.float64)
+    if tablica.shape != (kroki,):
+        raise ValueError(f"Sygnał '{nazwa}' ma długość {tablica.shape}, oczekiwano ({kroki},)")
+    return tablica
+
+
+def _poza_obwiednia(y: np.ndarray, u: np.ndarray, limit: float) -> int:
+    """Indeks pierwszej próbki poza obwiednią (lub nieskończonej), -1 gdy brak."""
+    poza = ~(np.abs(y) <= limit) | ~(np.abs(u) <= limit)
+    return int(np.argmax(poza)) if poza.any() else -1
+
+
+def krok_regulatora(dt_modelu: float, dt_regulatora: float) -> int:
+    """Liczba kroków modelu na jeden okres próbkowania regulatora (Ts / dt)."""
+    m = int(round(dt_regulatora / dt_modelu))
+    if m < 1 or abs(m * dt_modelu - dt_regulatora) > 1e-9 * dt_regulatora:
+        raise ValueError(f"Okres próbkowania regulatora ({dt_regulatora}) musi być "
+                         f"całkowitą wielokrotnością kroku modelu ({dt_modelu})")
+    return m
+
+
+def liczba_krokow(czas_sym: float, dt: float) -> int:
+    """Liczba kroków symulacji dla czasu czas_sym (konwencja int(czas_sym / dt))."""
+    return int(czas_sym / dt)
+
+
+def symuluj_petle(
+    model,
+    regulator,
+    czas_sym: float,
+    r: Union[float, np.ndarray] = 0.0,
+    zaklocenie: Optional[np.ndarray] = None,
+    szum: Optional[np.ndarray] = None,
+    tryb: str = "auto",
+    zakonczenie: Optional[WczesneZakonczenie] = None,
+    przerywanie: Optional[Przerywanie] = None,
+) -> WynikSymulacji:
+    """
+    Symuluje zamkniętą pętlę regulacji.
+
+    Args:
+        model: instancja ModelBazowy (w stanie początkowym)
+        regulator: instancja RegulatorBazowy; regulator.dt to okres próbkowania Ts
+                   (całkowita wielokrotność model.dt)
+        czas_sym: czas symulacji w sekundach
+        r: wartość zadana - stała lub tablica długości liczba_krokow(czas_sym, dt)
+        zaklocenie: opcjonalne zakłócenie dodawane do sterowania na wejściu procesu
+        szum: opcjonalny szum dodawany do pomiaru widzianego przez regulator
+        tryb: "auto", "zdarzeniowy" lub "krokowy" (patrz opis modułu); po ścieżce
+              liniowej (lfilter) stan obiektów model/regulator nie jest aktualizowany,
+              po zdarzeniowej i krokowej obiekty zostają w stanie końcowym
+        zakonczenie: ustawienia wczesnego zakończenia pętli krokowej (None = pełny horyzont)
+        przerywanie: kontrola rozbieżności i progu kosztu (None = bez przerywania);
+                     próg kosztu sprawdzany jest tylko w pętli krokowej
+
+    Returns:
+        WynikSymulacji (t, r, y, u) - u bez zakłócenia, y bez szumu
+    """
+    if tryb not in TRYBY:
+        raise ValueError(f"Nieznany tryb symulacji: {tryb}")
+    dt = model.dt
+    kroki = liczba_krokow(czas_sym, dt)
+    m = krok_regulatora(dt, regulator.dt)
+
+    t = np.arange(kroki) * dt
+    r_arr = _sygnal(r, kroki, "r")
+    d_arr = _sygnal(zaklocenie, kroki, "zaklocenie")
+    n_arr = _sygnal(szum, kroki, "szum")
+    limit = przerywanie.limit(r_arr, model.y) if przerywanie is not None else None
+
+    def _wynik_calosciowy(y_cal, u_cal) -> WynikSymulacji:
+        # Szybkie ścieżki liczą cały horyzont - rozbieżność sprawdzana po fakcie
+        if limit is not None:
+            k = _poza_obwiednia(y_cal, u_cal, limit)
+            if k >= 0:
+                return WynikSymulacji(t=t[:k], r=r_arr[:k], y=y_cal[:k], u=u_cal[:k],
+                                      przerwano="rozbieznosc")
+        return WynikSymulacji(t=t, r=r_arr, y=y_cal, u=u_cal)
+
+    if tryb == "auto" and m == 1:
+        uklad = uklad_zamkniety(model, regulator)
+        if uklad is not None:
+            wynik = symuluj_liniowo(uklad, r_arr, d_arr, n_arr,
+                                    umin=regulator.umin, umax=regulator.umax)
+            if wynik is not None:
+                return _wynik_calosciowy(*wynik)
+
+    if tryb in ("auto", "zdarzeniowy") and n_arr is None and m == 1:
+        wynik = symuluj_zdarzeniowo(model, regulator, r_arr, d_arr)
+        if wynik is not None:
+            return _wynik_calosciowy(*wynik)
+
+    y = np.empty(kroki, dtype=np.float64)
+    u = np.empty(kroki, dtype=np.float64)
+
+    update = regulator.update
+    step = model.step
+    r_l = r_arr.tolist()
+    d_l = d_arr.tolist() if d_arr is not None else [0.0] * kroki
+    n_l = n_arr.tolist() if n_arr is not None else [0.0] * kroki
+
+    # Pętla w blokach - po każdym bloku kontrola przerwania i test stanu ustalonego
+    blok = kroki
+    start_testu = None
+    if zakonczenie is not None and n_arr is None:
+        okno = zakonczenie.kroki_okna(dt)
+        blok = okno
+        start_testu = ostatnie_zdarzenie(r_arr, d_arr) + okno
+        r_koncowe = r_l[-1] if hasattr(regulator, "_ui") else None
+    if przerywanie is not None:
+        blok = min(blok, przerywanie.kroki_bloku(dt))
+        prog = przerywanie.prog_kosztu
+        # IAE, ekstrema y i ostatnie wyjście z pasma ustalania do chwili bieżącej
+        akumulator = AkumulatorMetryk(r_l[-1], przerywanie.pasmo_ustalania)
+
+    k0 = 0
+    while k0 < kroki:
+        k1 = min(kroki, k0 + blok)
+        if m > 1:
+            # Regulator co m kroków modelu, u trzymane między próbkami (ZOH)
+            for k in range(k0, k1):
+                if k % m == 0:
+                    u_k = update(r_l[k], model.y + n_l[k])
+                y[k] = step(u_k + d_l[k])
+                u[k] = u_k
+        elif d_arr is None and n_arr is None:
+            for k in range(k0, k1):
+                u_k = update(r_l[k], model.y)
+                y[k] = step(u_k)
+                u[k] = u_k
+        else:
+            for k in range(k0, k1):
+                u_k = update(r_l[k], model.y + n_l[k])
+                y[k] = step(u_k + d_l[k])
+                u[k] = u_k
+        k_pop, k0 = k0, k1
+
+        if przerywanie is not None:
+            if limit is not None:
+                k = _poza_obwiednia(y[k_pop:k0], u[k_pop:k0], limit)
+                if k >= 0:
+                    k += k_pop
+                    return WynikSymulacji(t=t[:k], r=r_arr[:k], y=y[:k], u=u[:k],
+                                          przerwano="rozbieznosc")
+            if prog is not None and k0 < kroki:
+                akumulator.dodaj(t[k_pop:k0], r_arr[k_pop:k0], y[k_pop:k0])
+                # Czas ustalania nie mniejszy niż chwila po ostatniej próbce poza pasmem
+                # (pasmo zależne od całej odpowiedzi, r ≈ y0: brak ograniczenia)
+                k_zle = akumulator.indeks_poza_pasmem
+                ts_dolny = t[min(k_zle + 1, kroki - 1)] if k_zle >= 0 else 0.0
+                dolne = dolne_ograniczenie_kosztu(akumulator.IAE, y[0], akumulator.y_max,
+                                                  akumulator.y_min, przerywanie.w_mp,
+                                                  r_l[-1], r_l[0], ts_dolny, przerywanie.w_ts)
+                if dolne > prog:
+                    return WynikSymulacji(t=t[:k0], r=r_arr[:k0], y=y[:k0], u=u[:k0],
+                                          przerwano="ograniczenie_kosztu", koszt_dolny=dolne)
+
+        if (start_testu is not None and start_testu <= k0 < kroki
+                and czy_ustalony(y[k0 - okno:k0], u[k0 - okno:k0], zakonczenie.pasmo,
+                                 np.ptp(y[:k0]), np.ptp(u[:k0]), r_koncowe)):
+            y[k0:] = y[k0 - 1]
+            u[k0:] = u[k0 - 1]
+            break
+
+    return WynikSymulacji(t=t, r=r_arr, y=y, u=u)
@@ -0,0 +1,161 @@
+# src/symulacja/uklad_liniowy.py
+"""
+Szybka ścieżka symulacji dla pętli, które nie wchodzą w saturację.
+
+Bez saturacji cała pętla (liniowy model + regulator P/PI/PD/PID) jest
+dyskretnym układem LTI z wejściami w = [r, zakłócenie, szum]:
+    z[k+1] = Acl z[k] + Bcl w[k]
+    [y[k], u[k]] = Ccl z[k] + Dcl w[k]
+gdzie z = [x modelu; stany regulatora]. Odpowiedź liczona jest jako suma
+odpowiedzi na każde wejście (scipy.signal.lfilter na transmitancjach
+z ss2tf) oraz odpowiedzi swobodnej od stanu początkowego.
+
+Wynik jest poprawny tylko, gdy sterowanie przed saturacją mieści się
+w [umin, umax] na całym horyzoncie - sprawdza to symuluj_liniowo(),
+a w przeciwnym razie zwraca None (silnik wraca do pętli krokowej).
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.signal import lfilter, ss2tf
+
+from src.regulatory.regulator_p import regulator_p
+from src.regulatory.regulator_pi import Regulator_PI
+from src.regulatory.regulator_pd import regulator_pd
+from src.regulatory.regulator_pid import Regulator_PID
+
+
+@dataclass
+class UkladZamkniety:
+    A: np.ndarray  # (n, n)
+    B: np.ndarray  # (n, 3) - wejścia [r, zakłócenie, szum]
+    C: np.ndarray  # (2, n) - wyjścia [y, u]
+    D: np.ndarray  # (2, 3)
+    z0: np.ndarray  # (n,) stan początkowy
+    indeks_y_prev: Optional[int] = None  # stan y_prev ustalany pierwszym pomiarem
+
+
+@dataclass
+class RegulatorLiniowy:
+    """
+    Postać stanowa regulatora bez saturacji, wejścia [r, y_pomiar]:
+        c[k+1] = Ac c[k] + Bc [r, y] + g_aw (u[k] - u_raw[k]),   u_raw[k] = Cc c[k] + Dc [r, y]
+    Stany: ui (człon I) oraz vd, y_prev (człon D), tylko jeśli występują.
+    g_aw to wzmocnienie anti-windup (dt/Tt na stanie ui), aktywne tylko w saturacji.
+    """
+    Ac: np.ndarray  # (nc, nc)
+    Bc: np.ndarray  # (nc, 2)
+    Cc: np.ndarray  # (1, nc)
+    Dc: np.ndarray  # (1, 2)
+    g_aw: np.ndarray  # (nc,)
+    c0: np.ndarray  # (nc,)
+    indeks_y_prev: Optional[int] = None  # stan y_prev ustalany pierwszym pomiarem
+
+
+def regulator_liniowy(regulator) -> Optional[RegulatorLiniowy]:
+    """Postać stanowa regulatora P/PI/PD/PID (z jego aktualnym stanem) lub None."""
+    if not isinstance(regulator, (regulator_p, Regulator_PI, regulator_pd, Regulator_PID)):
+        return None
+
+    Ac, Bc, Cc, Dc = regulator.model_stanowy_dyskretny()
+    c0 = regulator.wektor_stanu()
+    indeks_y_prev = None
+    brak = np.flatnonzero(np.isnan(c0))
+    if brak.size:
+        # y_prev przed pierwszym pomiarem - ustalany przez uklad_zamkniety / symulację
+        indeks_y_prev = int(brak[0])
+        c0[indeks_y_prev] = 0.0
+    return RegulatorLiniowy(Ac=Ac, Bc=Bc, Cc=Cc, Dc=Dc, g_aw=regulator.wzmocnienie_antywindup(),
+                            c0=c0, indeks_y_prev=indeks_y_prev)
+
+
+def uklad_zamkniety(model, regulator) -> Optional[UkladZamkniety]:
+    """
+    Składa zamkniętą pętlę (bez saturacji) z aktualnego stanu modelu i regulatora.
+    Zwraca None, gdy model nie ma postaci liniowej lub regulator nie jest obsługiwany.
+    """
+    postac = model.model_dyskretny()
+    reg = regulator_liniowy(regulator)
+    if postac is None or reg is None:
+        return None
+    Ad, Bd, C = postac
+    Ac, Bc, Cc, Dc = reg.Ac, reg.Bc, reg.Cc, reg.Dc
+    nx, nc = Ad.shape[0], Ac.shape[0]
+
+    bcr, bcy = Bc[:, :1], Bc[:, 1:]
+    dr, dy = Dc[0, 0], Dc[0, 1]
+
+    # u = Cc c + dr r + dy (C x + n);  x+ = Ad x + Bd (u + d);  c+ = Ac c + bcr r + bcy (C x + n)
+    A_xx = Ad + dy * (Bd @ C)
+    A = np.block([[A_xx, Bd @ Cc],
+                  [bcy @ C, Ac]])
+    B = np.block([[dr * Bd, Bd, dy * Bd],
+                  [bcr, np.zeros((nc, 1)), bcy]])
+    # y[k] to wyjście modelu po kroku: C x[k+1]
+    C_y = np.hstack([C @ A_xx, C @ Bd @ Cc])
+    C_u = np.hstack([dy * C, Cc])
+    CB = (C @ Bd)[0, 0]
+    D = np.array([[CB * dr, CB, CB * dy],
+                  [dr, 0.0, dy]])
+
+    z0 = np.concatenate([model.wektor_stanu(), reg.c0])
+    indeks_y_prev = reg.indeks_y_prev
+    if indeks_y_prev is not None:
+        indeks_y_prev += nx
+        z0[indeks_y_prev] = (C @ z0[:nx])[0]
+    return UkladZamkniety(A=A, B=B, C=np.vstack([C_y, C_u]), D=D, z0=z0,
+                          indeks_y_prev=indeks_y_prev)
+
+
+def _odpowiedz_swobodna(uklad: UkladZamkniety, z0: np.ndarray, kroki: int) -> np.ndarray:
+    """Odpowiedź (2, kroki) od stanu początkowego z0 przy zerowych wejściach."""
+    wyjscia = np.zeros((2, kroki))
+    if not np.any(z0):
+        return wyjscia
+    # Impuls przez (A, z0, C) daje C A^(k-1) z0 od próbki 1 - stąd kroki + 1 i przesunięcie
+    impuls = np.zeros(kroki + 1)
+    impuls[0] = 1.0
+    num, den = ss2tf(uklad.A, z0[:, None], uklad.C, np.zeros((2, 1)))
+    for j in range(2):
+        wyjscia[j] = lfilter(num[j], den, impuls)[1:]
+    return wyjscia
+
+
+def symuluj_liniowo(
+    uklad: UkladZamkniety,
+    r: np.ndarray,
+    zaklocenie: Optional[np.ndarray] = None,
+    szum: Optional[np.ndarray] = None,
+    umin: Optional[float] = None,
+    umax: Optional[float] = None,
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Odpowiedź pętli metodą superpozycji (lfilter).
+
+    Returns:
+        (y, u) lub None, gdy sterowanie przekracza [umin, umax] albo wynik
+        nie jest skończony - wtedy potrzebna jest pętla krokowa.
+    """
+    kroki = len(r)
+    z0 = uklad.z0.copy()
+    if uklad.indeks_y_prev is not None and szum is not None:
+        # Pierwszy pomiar (z szumem) ustala y_prev regulatora
+        z0[uklad.indeks_y_prev] += szum[0]
+    wyjscia = _odpowiedz_swobodna(uklad, z0, kroki)
+
+    for i, w in enumerate((r, zaklocenie, szum)):
+        if w is None or not np.any(w):
+            continue
+        num, den = ss2tf(uklad.A, uklad.B, uklad.C, uklad.D, input=i)
+        for j in range(2):
+            wyjscia[j] += lfilter(num[j], den, w)
+
+    y, u = wyjscia
+    if not (np.all(np.isfinite(y)) and np.all(np.isfinite(u))):
+        return None
+    if umin is not None and np.min(u) < umin:
+        return None
+    if umax is not None and np.max(u) > umax:
+        return None
+    return y, u
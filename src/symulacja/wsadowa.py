@@ -0,0 +1,386 @@
+# src/symulacja/wsadowa.py
+"""
+Symulacja wsadowa: N zamkniętych pętli regulacji liczonych jednocześnie.
+
+Zamiast osobnej pętli Pythona dla każdego punktu siatki (regulator.update /
+model.step w każdym kroku) stan wszystkich kandydatów trzymany jest w wektorach
+NumPy, a jeden krok czasu liczy cały zbiór naraz.
+
+- Prawa sterowania P/PI/PD/PID liczy BankRegulatorow (src/regulatory), zgodny
+  1:1 z klasami regulatorów (waga b, D na pomiarze z filtrem N, anti-windup
+  back-calculation, saturacja).
+- Modele z src/modele są używane bez zmian: ich równania są zwykłą arytmetyką,
+  więc działają na wektorach (stan z `_pola_stanu` zamieniany jest na tablice).
+- ocen_wsadowo() dzieli kandydatów na paczki według budżetu pamięci i zostawia
+  tylko metryki; opcjonalnie liczy w float32 i raportuje odchyłkę od float64.
+"""
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from src.metryki import Metryki, oblicz_metryki_wsadowo
+from src.regulatory.bank_regulatorow import BankRegulatorow
+from src.symulacja.silnik import (
+    Przerywanie, WczesneZakonczenie, czy_ustalony, dolne_ograniczenie_kosztu, krok_regulatora,
+)
+
+
+# Kolejność kolumn macierzy parametrów (N, n_params) dla każdego typu regulatora
+KOLUMNY_PARAMETROW = {
+    "regulator_p": ("Kp",),
+    "regulator_pi": ("Kp", "Ti"),
+    "regulator_pd": ("Kp", "Td"),
+    "regulator_pid": ("Kp", "Ti", "Td"),
+}
+
+
+# Tablice (T,) w precyzji symulacji na kandydata: Y, U oraz bufory bloku Yb, Ub
+_TABLIC_NA_KANDYDATA = 2.1
+# Tymczasowe tablice (T,) float64 na wiersz przy metrykach paczki: kopia wiersza y,
+# i u, e, |e|, odchyłka, maski w oblicz_metryki_wsadowo (z zapasem)
+_TABLIC_METRYK = 7
+# Część budżetu pamięci na tablice tymczasowe metryk - reszta na trajektorie paczki
+_UDZIAL_METRYK = 0.25
+
+
+@dataclass
+class WynikWsadowy:
+    t: np.ndarray  # (T,)
+    r: np.ndarray  # (T,)
+    y: np.ndarray  # (N, T)
+    u: np.ndarray  # (N, T)
+    przerwano: Optional[np.ndarray] = None  # (N,) "" / "rozbieznosc" / "ograniczenie_kosztu"
+    koszt_dolny: Optional[np.ndarray] = None  # (N,) dolne ograniczenie kary przerwanych (NaN)
+
+
+def _bank_kandydatow(typ_regulatora: str, parametry: np.ndarray, dt: float,
+                     umin=None, umax=None, dtype=np.float64) -> BankRegulatorow:
+    """
+    Bank regulatorów dla N kandydatów: kolumny macierzy parametrów według
+    KOLUMNY_PARAMETROW, b, Kr, N domyślne; Tt = Ti jak w domyślnej konfiguracji klas.
+    """
+    typ = typ_regulatora.lower()
+    if typ not in KOLUMNY_PARAMETROW:
+        raise ValueError(f"Nieznany typ regulatora: {typ_regulatora}")
+    kolumny = KOLUMNY_PARAMETROW[typ]
+    return BankRegulatorow(
+        Kp=parametry[:, 0],
+        Ti=parametry[:, kolumny.index("Ti")] if "Ti" in kolumny else None,
+        Td=parametry[:, kolumny.index("Td")] if "Td" in kolumny else 0.0,
+        dt=dt, umin=umin, umax=umax, dtype=dtype,
+    )
+
+
+def _model_wsadowy(ModelClass, n: int, parametry_modelu: Optional[dict] = None,
+                   dtype=np.float64):
+    """Tworzy model, którego stan (pola z `_pola_stanu`) jest wektorem długości n."""
+    model = ModelClass(**(parametry_modelu or {}))
+    for pole in model._pola_stanu:
+        setattr(model, pole, np.full(n, float(getattr(model, pole)), dtype=dtype))
+    return model
+
+
+def _zawez_model(model, maska: np.ndarray):
+    for pole in model._pola_stanu:
+        setattr(model, pole, getattr(model, pole)[maska])
+
+
+def symuluj_wsadowo(
+    ModelClass,
+    typ_regulatora: str,
+    parametry,
+    czas_sym: float = 120.0,
+    r_zad: float = 1.0,
+    umin: Optional[float] = -15.0,
+    umax: Optional[float] = 15.0,
+    parametry_modelu: Optional[dict] = None,
+    zakonczenie: Optional[WczesneZakonczenie] = None,
+    przerywanie: Optional[Przerywanie] = None,
+    czas_probkowania: Optional[float] = None,
+    dtype=np.float64,
+) -> WynikWsadowy:
+    """
+    Symuluje N zamkniętych pętli (model + regulator) jednocześnie.
+
+    Args:
+        ModelClass: Klasa modelu (Zbiornik_1rz, Dwa_zbiorniki, Wahadlo_odwrocone)
+        typ_regulatora: "regulator_p", "regulator_pi", "regulator_pd", "regulator_pid"
+        parametry: macierz (N, n_params) w kolejności KOLUMNY_PARAMETROW[typ_regulatora]
+        czas_sym: czas symulacji w sekundach
+        r_zad: stała wartość zadana
+        umin, umax: ograniczenia sygnału sterującego
+        parametry_modelu: argumenty konstruktora modelu (np. dt, dyskretyzacja)
+        zakonczenie: wczesne zakończenie - kandydaci ustaleni (lub rozbieżni) wypadają
+                     z obliczeń, a reszta ich horyzontu wypełniana jest wartościami końcowymi
+        przerywanie: rozbieżność (obwiednia) i próg kosztu - przerwani kandydaci wypadają
+                     z obliczeń, reszta ich horyzontu to NaN, powód w WynikWsadowy.przerwano
+        czas_probkowania: okres próbkowania regulatora Ts (wielokrotność kroku modelu,
+                     u trzymane między próbkami); None = krok modelu
+        dtype: precyzja stanu i trajektorii (np.float64 lub np.float32)
+
+    Returns:
+        WynikWsadowy z trajektoriami y, u o kształcie (N, T)
+    """
+    parametry = np.asarray(parametry, dtype=float)
+    if parametry.ndim == 1:
+        parametry = parametry[:, None]
+    n = parametry.shape[0]
+
+    model = _model_wsadowy(ModelClass, n, parametry_modelu, dtype=dtype)
+    dt = model.dt
+    Ts = float(czas_probkowania) if czas_probkowania else dt
+    m = krok_regulatora(dt, Ts)
+    regulator = _bank_kandydatow(typ_regulatora, parametry, Ts, umin=umin, umax=umax, dtype=dtype)
+    calkowanie = "Ti" in KOLUMNY_PARAMETROW[typ_regulatora.lower()]
+
+    kroki = int(czas_sym / dt)
+    t = np.arange(kroki) * dt
+    r = np.full(kroki, float(r_zad))
+    # Bufory (T, N): każdy krok zapisuje ciągły wiersz
+    Y = np.empty((kroki, n), dtype=dtype)
+    U = np.empty((kroki, n), dtype=dtype)
+
+    # Kontrole po każdym bloku: stan ustalony (okno), rozbieżność i próg kosztu
+    blok = kroki
+    if zakonczenie is not None:
+        okno = zakonczenie.kroki_okna(dt)
+        blok = okno
+    if przerywanie is not None:
+        blok = min(blok, przerywanie.kroki_bloku(dt))
+        limit = przerywanie.limit(r, model.y)
+        prog = przerywanie.prog_kosztu
+    kontrola = zakonczenie is not None or przerywanie is not None
+
+    przerwano = np.full(n, "", dtype="<U20")
+    koszt_dolny = np.full(n, np.nan)
+
+    # Kolumny Y/U wciąż symulowane (None = wszystkie) oraz statystyki od t=0
+    aktywne = None
+    y_min = np.full(n, np.inf)
+    y_max = np.full(n, -np.inf)
+    u_min = np.full(n, np.inf)
+    u_max = np.full(n, -np.inf)
+    iae = np.zeros(n)
+    k_zle = np.full(n, -1)
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        k0 = 0
+        while k0 < kroki:
+            k1 = min(kroki, k0 + blok)
+            if aktywne is None:
+                Yb, Ub = Y[k0:k1], U[k0:k1]
+            else:
+                # Bufor bloku tylko dla aktywnych kandydatów, rozpisywany do Y/U raz na blok
+                Yb = np.empty((k1 - k0, len(aktywne)), dtype=dtype)
+                Ub = np.empty((k1 - k0, len(aktywne)), dtype=dtype)
+            if m > 1:
+                # Regulator co m kroków modelu, u trzymane między próbkami (ZOH)
+                for i in range(k1 - k0):
+                    if (k0 + i) % m == 0:
+                        u_k = regulator.update(r_zad, model.y)
+                    Yb[i] = model.step(u_k)
+                    Ub[i] = u_k
+            else:
+                for i in range(k1 - k0):
+                    u_k = regulator.update(r_zad, model.y)
+                    Yb[i] = model.step(u_k)
+                    Ub[i] = u_k
+            if aktywne is not None:
+                Y[k0:k1, aktywne] = Yb
+                U[k0:k1, aktywne] = Ub
+            k_pop, k0 = k0, k1
+            if not kontrola or k0 >= kroki:
+                continue
+
+            kolumny = slice(None) if aktywne is None else aktywne
+            indeksy = np.arange(n) if aktywne is None else aktywne
+            y_min = np.minimum(y_min, Yb.min(axis=0))
+            y_max = np.maximum(y_max, Yb.max(axis=0))
+            u_min = np.minimum(u_min, Ub.min(axis=0))
+            u_max = np.maximum(u_max, Ub.max(axis=0))
+            rozbiezne = ~(np.isfinite(y_max - y_min) & np.isfinite(u_max - u_min))
+
+            # gotowe: reszta horyzontu = wartości końcowe; przerwane: reszta = NaN
+            gotowe = np.zeros(len(indeksy), dtype=bool)
+            przerwane = np.zeros(len(indeksy), dtype=bool)
+            if przerywanie is None:
+                gotowe |= rozbiezne
+            else:
+                if limit is not None:
+                    rozbiezne |= ~((np.maximum(np.abs(y_min), np.abs(y_max)) <= limit)
+                                   & (np.maximum(np.abs(u_min), np.abs(u_max)) <= limit))
+                przerwano[indeksy[rozbiezne]] = "rozbieznosc"
+                przerwane |= rozbiezne
+                if prog is not None:
+                    # IAE przyrostowo (trapezy od ostatniej próbki poprzedniego bloku)
+                    k_iae = max(k_pop - 1, 0)
+                    iae += np.trapz(np.abs(r_zad - Y[k_iae:k0, kolumny]), t[k_iae:k0], axis=0)
+                    # Ostatnia próbka poza pasmem czasu ustalania (dolne ograniczenie t_s)
+                    tol = przerywanie.tolerancja_ustalania(Y[0, kolumny], r_zad, r_zad)
+                    zle = ~(np.abs(Yb - r_zad) <= tol)
+                    ostatnia = len(Yb) - 1 - np.argmax(zle[::-1], axis=0)
+                    k_zle = np.where(zle.any(axis=0), k_pop + ostatnia, k_zle)
+                    ts_dolny = np.where(k_zle >= 0, t[np.minimum(k_zle + 1, kroki - 1)], 0.0)
+                    dolne = dolne_ograniczenie_kosztu(iae, Y[0, kolumny], y_max, y_min,
+                                                      przerywanie.w_mp, r_zad, r_zad,
+                                                      ts_dolny, przerywanie.w_ts)
+                    ponad_prog = ~rozbiezne & (dolne > prog)
+                    przerwano[indeksy[ponad_prog]] = "ograniczenie_kosztu"
+                    koszt_dolny[indeksy[ponad_prog]] = dolne[ponad_prog]
+                    przerwane |= ponad_prog
+            if zakonczenie is not None and k0 >= okno:
+                okno_y, okno_u = Y[k0 - okno:k0, kolumny], U[k0 - okno:k0, kolumny]
+                gotowe |= ~przerwane & czy_ustalony(okno_y, okno_u, zakonczenie.pasmo,
+                                                    y_max - y_min, u_max - u_min,
+                                                    r_zad if calkowanie else None,
+                                                    os_czasu=0)
+            koniec = gotowe | przerwane
+            if not koniec.any():
+                continue
+
+            Y[k0:, indeksy[gotowe]] = Y[k0 - 1, indeksy[gotowe]]
+            U[k0:, indeksy[gotowe]] = U[k0 - 1, indeksy[gotowe]]
+            Y[k0:, indeksy[przerwane]] = np.nan
+            U[k0:, indeksy[przerwane]] = np.nan
+            if koniec.all():
+                break
+            aktywne = indeksy[~koniec]
+            regulator.zawez(~koniec)
+            _zawez_model(model, ~koniec)
+            y_min, y_max = y_min[~koniec], y_max[~koniec]
+            u_min, u_max = u_min[~koniec], u_max[~koniec]
+            iae = iae[~koniec]
+            k_zle = k_zle[~koniec]
+            u_k = u_k[~koniec]
+
+    return WynikWsadowy(t=t, r=r, y=Y.T, u=U.T, przerwano=przerwano, koszt_dolny=koszt_dolny)
+
+
+def metryki_wsadowe(wynik: WynikWsadowy, wiersze: Optional[int] = None) -> List[Optional[Metryki]]:
+    """
+    Metryki dla każdego kandydata (oblicz_metryki_wsadowo po `wiersze` trajektorii
+    naraz - ogranicza tablice tymczasowe float64; None = cała paczka).
+    Dla trajektorii, które się rozbiegły (inf/NaN) lub zostały przerwane, zwraca None.
+    """
+    n = len(wynik.y)
+    wiersze = n if wiersze is None else max(1, int(wiersze))
+    wyniki: List[Optional[Metryki]] = [None] * n
+    for k0 in range(0, n, wiersze):
+        k1 = min(n, k0 + wiersze)
+        y, u = wynik.y[k0:k1], wynik.u[k0:k1]
+        with np.errstate(invalid="ignore"):
+            skonczone = np.all(np.isfinite(y), axis=1) & np.all(np.isfinite(u), axis=1)
+        if not skonczone.any():
+            continue
+        metryki = oblicz_metryki_wsadowo(wynik.t, wynik.r, y[skonczone], u[skonczone])
+        for j, i in enumerate(np.flatnonzero(skonczone)):
+            wyniki[k0 + i] = metryki[j]
+    return wyniki
+
+
+@dataclass
+class OcenaWsadowa:
+    """Wyniki ocen_wsadowo - tylko wielkości na kandydata, bez trajektorii."""
+    metryki: List[Optional[Metryki]]  # None dla rozbieżnych/przerwanych
+    odchylenie_u: np.ndarray  # (N,) std(u) - do kary za stałe sterowanie
+    przerwano: np.ndarray  # (N,) jak WynikWsadowy.przerwano
+    koszt_dolny: np.ndarray  # (N,)
+    odchylka_float32: Optional[dict] = None  # względne odchyłki metryk float32 vs float64
+
+
+def rozmiar_paczki(czas_sym: float, dt: float, budzet_pamieci_mb: float,
+                   dtype=np.float64) -> int:
+    """
+    Liczba kandydatów w paczce, dla której trajektorie mieszczą się w części
+    budżetu pamięci pozostałej po tablicach tymczasowych metryk (wiersze_metryk).
+    """
+    kroki = max(1, int(czas_sym / dt))
+    bajty = _TABLIC_NA_KANDYDATA * kroki * np.dtype(dtype).itemsize
+    return max(1, int((1.0 - _UDZIAL_METRYK) * budzet_pamieci_mb * 2 ** 20 // bajty))
+
+
+def wiersze_metryk(czas_sym: float, dt: float, budzet_pamieci_mb: float) -> int:
+    """
+    Liczba trajektorii liczonych naraz w metryki_wsadowe i std(u): tablice
+    tymczasowe są zawsze float64, niezależnie od precyzji symulacji.
+    """
+    kroki = max(1, int(czas_sym / dt))
+    bajty = _TABLIC_METRYK * kroki * np.dtype(np.float64).itemsize
+    return max(1, int(_UDZIAL_METRYK * budzet_pamieci_mb * 2 ** 20 // bajty))
+
+
+def _odchylka_metryk(metryki: List[Optional[Metryki]],
+                     wzorcowe: List[Optional[Metryki]]) -> dict:
+    """Maksymalne względne odchyłki IAE, Mp i t_s względem obliczeń wzorcowych."""
+    odchylki = {"IAE": 0.0, "przeregulowanie": 0.0, "czas_ustalania": 0.0, "niezgodne": 0}
+    for m, w in zip(metryki, wzorcowe):
+        if (m is None) != (w is None):
+            odchylki["niezgodne"] += 1
+            continue
+        if m is None:
+            continue
+        for pole in ("IAE", "przeregulowanie", "czas_ustalania"):
+            a, b = getattr(m, pole), getattr(w, pole)
+            odchylki[pole] = max(odchylki[pole], abs(a - b) / max(abs(b), 1e-12))
+    return odchylki
+
+
+def ocen_wsadowo(
+    ModelClass,
+    typ_regulatora: str,
+    parametry,
+    czas_sym: float = 120.0,
+    budzet_pamieci_mb: float = 256.0,
+    dtype=np.float64,
+    zbior_referencyjny: int = 0,
+    paczka: Optional[int] = None,
+    **kwargs,
+) -> OcenaWsadowa:
+    """
+    symuluj_wsadowo w paczkach dobranych do budżetu pamięci. Z każdej paczki
+    zostają tylko metryki i std(u), trajektorie są zwalniane przed następną.
+
+    Args:
+        budzet_pamieci_mb: pamięć na trajektorie jednej paczki i tablice tymczasowe
+            jej metryk [MB]
+        dtype: precyzja symulacji; float32 zmniejsza pamięć i przepustowość o połowę
+        zbior_referencyjny: dla float32 - liczba pierwszych kandydatów liczonych
+            dodatkowo w float64; odchyłki metryk trafiają do odchylka_float32
+        paczka: stała liczba kandydatów w paczce (None = z budzet_pamieci_mb)
+        **kwargs: pozostałe argumenty symuluj_wsadowo (r_zad, zakonczenie, ...)
+    """
+    parametry = np.asarray(parametry, dtype=float)
+    if parametry.ndim == 1:
+        parametry = parametry[:, None]
+    n = parametry.shape[0]
+    dt = ModelClass(**(kwargs.get("parametry_modelu") or {})).dt
+    if paczka is None:
+        paczka = rozmiar_paczki(czas_sym, dt, budzet_pamieci_mb, dtype)
+    wiersze = wiersze_metryk(czas_sym, dt, budzet_pamieci_mb)
+
+    metryki: List[Optional[Metryki]] = []
+    odchylenie_u = np.empty(n)
+    przerwano = np.empty(n, dtype="<U20")
+    koszt_dolny = np.empty(n)
+    for start in range(0, n, paczka):
+        stop = min(n, start + paczka)
+        wynik = symuluj_wsadowo(ModelClass, typ_regulatora, parametry[start:stop],
+                                czas_sym=czas_sym, dtype=dtype, **kwargs)
+        metryki.extend(metryki_wsadowe(wynik, wiersze))
+        for k0 in range(start, stop, wiersze):
+            k1 = min(stop, k0 + wiersze)
+            with np.errstate(invalid="ignore"):
+                odchylenie_u[k0:k1] = np.std(wynik.u[k0 - start:k1 - start], axis=1, dtype=np.float64)
+        przerwano[start:stop] = wynik.przerwano
+        koszt_dolny[start:stop] = wynik.koszt_dolny
+        del wynik
+
+    odchylka = None
+    if np.dtype(dtype) != np.float64 and zbior_referencyjny > 0:
+        k = min(n, zbior_referencyjny)
+        wzorzec = symuluj_wsadowo(ModelClass, typ_regulatora, parametry[:k],
+                                  czas_sym=czas_sym, dtype=np.float64, **kwargs)
+        odchylka = _odchylka_metryk(metryki[:k], metryki_wsadowe(wzorzec, wiersze))
+    return OcenaWsadowa(metryki=metryki, odchylenie_u=odchylenie_u, przerwano=przerwano,
+                        koszt_dolny=koszt_dolny, odchylka_float32=odchylka)
@@ -0,0 +1,176 @@
+# src/symulacja/zdarzeniowa.py
+"""
+Symulacja zdarzeniowa: analityczna propagacja pętli między zdarzeniami.
+
+Jedyne nieliniowości i nieciągłości w scenariuszu to saturacja sterowania
+oraz skoki wartości zadanej / zakłócenia. Pomiędzy nimi pętla jest
+dyskretnym układem afinicznym w jednym z trzech trybów:
+    liniowy:           u = u_raw
+    saturacja górna:   u = umax  (anti-windup: ui += dt/Tt (umax - u_raw))
+    saturacja dolna:   u = umin
+z[k+1] = A_tryb z[k] + b_tryb(w). Trajektoria odcinka liczona jest potęgami
+macierzy rozszerzonej [[A, b], [0, 1]] metodą podwajania (log2(L) mnożeń),
+a przejście w inny tryb wykrywane jest na bieżąco z u_raw.
+
+Regulator jest dyskretny, więc odpowiednikiem e^(A t) dla całego przedziału
+jest potęga macierzy przejścia - wynik odpowiada pętli krokowej co do
+zaokrągleń, razem z back-calculation anti-windup.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.symulacja.uklad_liniowy import regulator_liniowy
+
+# Powyżej tej liczby odcinków (np. oscylacje na granicy saturacji) pętla krokowa jest tańsza
+MAKS_ODCINKOW = 200
+
+LINIOWY, GORNA, DOLNA = 0, 1, -1
+
+
+def _tryb(u_raw: np.ndarray, umin, umax) -> np.ndarray:
+    tryb = np.zeros(np.shape(u_raw), dtype=np.int8)
+    if umax is not None:
+        tryb[u_raw > umax] = GORNA
+    if umin is not None:
+        tryb[u_raw < umin] = DOLNA
+    return tryb
+
+
+class _PetlaAfiniczna:
+    """Macierze pętli w postaci z[k+1] = F z + G w + H u + g (u - u_raw), u_raw = Kz z + Kw w."""
+
+    def __init__(self, model, reg):
+        Ad, Bd, C = model.model_dyskretny()
+        nx, nc = Ad.shape[0], reg.Ac.shape[0]
+        bcr, bcy = reg.Bc[:, :1], reg.Bc[:, 1:]
+        dr, dy = reg.Dc[0]
+
+        self.nx = nx
+        self.n = nx + nc
+        self.C = C[0]
+        self.F = np.block([[Ad, np.zeros((nx, nc))],
+                           [bcy @ C, reg.Ac]])
+        # w = [r, zakłócenie]
+        self.G = np.block([[np.zeros((nx, 1)), Bd],
+                           [bcr, np.zeros((nc, 1))]])
+        self.H = np.concatenate([Bd[:, 0], np.zeros(nc)])
+        self.g = np.concatenate([np.zeros(nx), reg.g_aw])
+        self.Kz = np.concatenate([dy * C[0], reg.Cc[0]])
+        self.Kw = np.array([dr, 0.0])
+
+        z0 = np.concatenate([model.wektor_stanu(), reg.c0])
+        if reg.indeks_y_prev is not None:
+            z0[nx + reg.indeks_y_prev] = self.C @ z0[:nx]
+        self.z0 = z0
+
+    def macierz_rozszerzona(self, tryb: int, w: np.ndarray, umin, umax) -> np.ndarray:
+        """Macierz [[A, b], [0, 1]] dla danego trybu i stałego wejścia w."""
+        n = self.n
+        M = np.zeros((n + 1, n + 1))
+        M[n, n] = 1.0
+        if tryb == LINIOWY:
+            M[:n, :n] = self.F + np.outer(self.H, self.Kz)
+            M[:n, n] = self.G @ w + self.H * (self.Kw @ w)
+        else:
+            s = umax if tryb == GORNA else umin
+            M[:n, :n] = self.F - np.outer(self.g, self.Kz)
+            M[:n, n] = self.G @ w - self.g * (self.Kw @ w) + (self.H + self.g) * s
+        return M
+
+
+def _propaguj_odcinek(petla: _PetlaAfiniczna, M: np.ndarray, z: np.ndarray, L: int,
+                      tryb: int, w: np.ndarray, umin, umax) -> Tuple[np.ndarray, int]:
+    """
+    Stany z[0..L] odcinka metodą podwajania: Z[:, m:2m] = M^m Z[:, 0:m].
+    Zatrzymuje się na pierwszym kroku, w którym tryb saturacji się zmienia.
+
+    Returns:
+        (Z (n, j+1), j) - j kroków wykonanych w tym trybie (1 <= j <= L)
+    """
+    n = petla.n
+    Z = np.empty((n + 1, L + 1))
+    Z[:n, 0] = z
+    Z[n, 0] = 1.0
+    u_w = petla.Kw @ w
+    m = 1
+    P = M
+    while m <= L:
+        k = min(m, L + 1 - m)
+        Z[:, m:m + k] = P @ Z[:, :k]
+        # Krokami są kolumny < L (ostatnia kolumna to tylko stan końcowy)
+        koniec = min(m + k, L)
+        if koniec > m:
+            u_raw = petla.Kz @ Z[:n, m:koniec] + u_w
+            zmiana = _tryb(u_raw, umin, umax) != tryb
+            if zmiana.any():
+                j = m + int(np.argmax(zmiana))
+                return Z[:n, :j + 1], j
+        m += k
+        P = P @ P
+    return Z[:n], L
+
+
+def symuluj_zdarzeniowo(
+    model,
+    regulator,
+    r: np.ndarray,
+    zaklocenie: Optional[np.ndarray] = None,
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Symulacja pętli odcinkami między zdarzeniami (skoki r/zakłócenia, wejście
+    i wyjście z saturacji).
+
+    Po udanej symulacji model i regulator pozostają w stanie końcowym
+    (jak po pętli krokowej), więc symulację można kontynuować.
+
+    Returns:
+        (y, u) lub None, gdy model/regulator nie mają postaci liniowej,
+        wynik nie jest skończony albo odcinków jest zbyt wiele.
+    """
+    if model.model_dyskretny() is None:
+        return None
+    reg = regulator_liniowy(regulator)
+    if reg is None:
+        return None
+    petla = _PetlaAfiniczna(model, reg)
+    umin, umax = regulator.umin, regulator.umax
+
+    kroki = len(r)
+    d = zaklocenie if zaklocenie is not None else np.zeros(kroki)
+    zdarzenia = np.flatnonzero((np.diff(r) != 0) | (np.diff(d) != 0)) + 1
+    granice = np.append(zdarzenia, kroki)
+
+    y = np.empty(kroki)
+    u = np.empty(kroki)
+    z = petla.z0
+    k = 0
+    odcinki = 0
+    nx = petla.nx
+    with np.errstate(over="ignore", invalid="ignore"):
+        while k < kroki:
+            odcinki += 1
+            if odcinki > MAKS_ODCINKOW:
+                return None
+            koniec = granice[np.searchsorted(granice, k, side="right")]
+            w = np.array([r[k], d[k]])
+            u_raw = petla.Kz @ z + petla.Kw @ w
+            tryb = int(_tryb(u_raw, umin, umax))
+            M = petla.macierz_rozszerzona(tryb, w, umin, umax)
+
+            Z, j = _propaguj_odcinek(petla, M, z, koniec - k, tryb, w, umin, umax)
+            y[k:k + j] = petla.C @ Z[:nx, 1:]
+            if tryb == LINIOWY:
+                u[k:k + j] = petla.Kz @ Z[:, :j] + petla.Kw @ w
+            else:
+                u[k:k + j] = umax if tryb == GORNA else umin
+            z = Z[:, j]
+            k += j
+
+    if not (np.all(np.isfinite(y)) and np.all(np.isfinite(u))):
+        return None
+    if kroki:
+        model.ustaw_wektor_stanu(z[:nx])
+        regulator.ustaw_wektor_stanu(z[nx:petla.n])
+        regulator.u = float(u[-1])
+    return y, u
@@ -6,12 +6,12 @@ Obsługuje również tryb REGULATOR=all (P, PI, PD, PID).
 
 import os
 import sys
-import importlib
 import json
 import numpy as np
 import matplotlib.pyplot as plt
-from src.metryki import oblicz_metryki
-from src.strojenie.wykonaj_strojenie import wykonaj_strojenie
+from src import rejestr
+from src.symulacja.silnik import Horyzont, WczesneZakonczenie, symuluj_petle
+from src.strojenie.wykonaj_strojenie import przelicz_wagi, wykonaj_strojenie
 
 # Bezpieczna konfiguracja wyjścia konsoli (Windows cp1250 vs emoji)
 try:
@@ -23,16 +23,6 @@ except Exception:
     pass
 
 
-def dynamiczny_import(typ: str, nazwa: str):
-    """Dynamicznie importuje klasę modelu lub regulatora po nazwie."""
-    modul = importlib.import_module(f"src.{typ}.{nazwa}")
-    for attr in dir(modul):
-        if attr.lower() == nazwa.lower():
-            return getattr(modul, attr)
-    # fallback – zwraca pierwszą klasę nieukrytą
-    return getattr(modul, [a for a in dir(modul) if not a.startswith("_")][0])
-
-
 def uruchom_symulacje():
     regulator_env = os.getenv("REGULATOR", "regulator_pid")  # może być 'all'
     czas_sym = float(os.getenv("CZAS_SYM", 120.0))
@@ -93,6 +83,24 @@ def uruchom_symulacje():
         print("[OK] Zakończono strojenie wszystkich regulatorów i metod.")
         return
 
+    # -----------------------------------------------------
+    # [1b] Przeliczenie wag kary (bez symulacji)
+    # -----------------------------------------------------
+    elif tryb == "przeliczenie_wag":
+        print("[STROJENIE] Ranking kandydatów siatki dla bieżących wag_kary (archiwum z etapu strojenia)...")
+        if regulator_env.lower() == "all":
+            regulatory_lista = ["regulator_p", "regulator_pi", "regulator_pd", "regulator_pid"]
+        else:
+            regulatory_lista = [regulator_env]
+
+        for regulator_nazwa in regulatory_lista:
+            for model_nazwa in modele:
+                if przelicz_wagi(model_nazwa, regulator_nazwa, katalog=out_dir, zapisz=True) is None:
+                    print(f"  [UWAGA] Brak aktualnego archiwum kandydatów dla {regulator_nazwa} "
+                          f"na modelu {model_nazwa} - wymagane strojenie (TRYB=strojenie, "
+                          f"kandydaci_siatki.zbieraj: true)")
+        return
+
     # -----------------------------------------------------
     # [2] Tryb walidacji
     # -----------------------------------------------------
@@ -134,31 +142,24 @@ def uruchom_symulacje():
             print(f"\n[SZUKANIE] [{regulator_nazwa} | {metoda}] model {model_nazwa}")
             print(f"📏 Progi: ts ≤ {prog['ts']}s, IAE ≤ {prog['IAE']}, Mp ≤ {prog['Mp']}%")
 
-            Model = dynamiczny_import("modele", model_nazwa)
-            Regulator = dynamiczny_import("regulatory", regulator_nazwa)
-            model = Model()
-            dt = model.dt
-
-            import inspect
-            sig = inspect.signature(Regulator.__init__)
-            parametry_filtr = {k: v for k, v in parametry.items() if k in sig.parameters}
-            # Usuń limity saturacji - model zadba o fizyczne ograniczenia
-            regulator = Regulator(**parametry_filtr, dt=dt, umin=-15.0, umax=15.0)
+            model = rejestr.model(model_nazwa).utworz()
+            # Okres próbkowania regulatora z etapu strojenia (starsze pliki: config / krok modelu)
+            dt = (blob.get("czas_probkowania") or config.pobierz_czas_probkowania(model_nazwa)
+                  or model.dt)
 
-            kroki = int(czas_sym / dt)
-            t, r, y, u = [], [], [], []
+            regulator = rejestr.regulator(regulator_nazwa).utworz(parametry, dt=dt)
 
-            for k in range(kroki):
-                t.append(k * dt)
-                r_zad = 0.0 if model_nazwa == "wahadlo_odwrocone" else 1.0
-                y_k = model.y
-                u_k = regulator.update(r_zad, y_k)
-                y_nowe = model.step(u_k)
-                r.append(r_zad)
-                y.append(y_nowe)
-                u.append(u_k)
+            r_zad = 0.0 if model_nazwa == "wahadlo_odwrocone" else 1.0
+            # Horyzont z dynamiki modelu (jeśli włączony), zawsze dłuższy niż próg t_s
+            horyzont = Horyzont.z_konfiguracji(config.pobierz_config_horyzontu())
+            czas_modelu = horyzont.czas(model, czas_ustalania_max=prog['ts']) if horyzont else czas_sym
+            wynik = symuluj_petle(model, regulator, czas_modelu, r=r_zad,
+                                  tryb=config.pobierz_tryb_symulacji(),
+                                  zakonczenie=WczesneZakonczenie.z_konfiguracji(
+                                      config.pobierz_wczesne_zakonczenie()))
+            t, r, y, u = wynik.t, wynik.r, wynik.y, wynik.u
 
-            wyniki = oblicz_metryki(t, r, y, u)
+            wyniki = wynik.metryki()
 
             pass_gates = True
             powod = []
@@ -269,7 +270,8 @@ def uruchom_symulacje():
                             continue
                 
                 # Uruchom rozszerzoną walidację
-                walidacja_rozszerzona(regulator_nazwa, metoda, model_nazwa, parametry, out_dir)
+                walidacja_rozszerzona(regulator_nazwa, metoda, model_nazwa, parametry, out_dir,
+                                      czas_probkowania=blob.get("czas_probkowania"))
 
         except Exception as e:
             print(f"[UWAGA] Rozszerzona walidacja nie powiodła się: {e}")
@@ -309,7 +311,7 @@ def uruchom_symulacje():
     # [3] Inny tryb (błąd)
     # -----------------------------------------------------
     else:
-        print("[X] Nieznany tryb działania (TRYB=strojenie|walidacja)")
+        print("[X] Nieznany tryb działania (TRYB=strojenie|przeliczenie_wag|walidacja)")
 
 
 if __name__ == "__main__":
@@ -4,130 +4,194 @@ Testuje regulatory w różnych scenariuszach:
 - Różne wielkości skoków wartości zadanej
 - Zakłócenia na wyjściu
 - Szum pomiarowy
+
+Scenariusze symulowane są jako drzewo prefiksów (symuluj_scenariusze):
+wspólny początek sygnałów (np. ta sama wartość zadana do chwili pierwszego
+skoku) liczony jest jednym odcinkiem, a stan pętli zapamiętywany migawką
+i odtwarzany przed każdą gałęzią. W trybie 'auto' wspólny odcinek jest
+tani (silnik zdarzeniowy), więc czas jest praktycznie taki jak osobnych
+symulacji - trajektorie są z nimi zgodne.
 """
 
 import os
 import json
 import numpy as np
 import matplotlib.pyplot as plt
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import sys
 
 # Dodaj katalog src do PYTHONPATH
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from metryki import oblicz_metryki
 from konfig import pobierz_konfiguracje
+from src import rejestr
+from src.symulacja.silnik import (Horyzont, WczesneZakonczenie, WynikSymulacji, krok_regulatora,
+                                  liczba_krokow, symuluj_petle)
 
 
-def dynamiczny_import(typ: str, nazwa: str):
-    """Dynamicznie importuje klasę modelu lub regulatora po nazwie."""
-    import importlib
-    modul = importlib.import_module(f"src.{typ}.{nazwa}")
-    for attr in dir(modul):
-        if attr.lower() == nazwa.lower():
-            return getattr(modul, attr)
-    return getattr(modul, [a for a in dir(modul) if not a.startswith("_")][0])
+def _sygnaly_scenariusza(scenariusz: Dict, t: np.ndarray, r_bazowe: float):
+    """
+    Buduje sygnały wejściowe scenariusza dla siatki czasu t.
+    
+    Returns:
+        (r, zaklocenie, szum) - zaklocenie/szum równe None, jeśli scenariusz ich nie używa
+    """
+    typ_scenariusza = scenariusz['typ']
+    r = np.full(len(t), r_bazowe)
+    zaklocenie = None
+    szum = None
+    
+    if typ_scenariusza == 'setpoint_step':
+        # Skok wartości zadanej
+        czas_skoku = scenariusz.get('czas_skoku', 10.0)
+        wielkosc = scenariusz.get('wielkosc', 10.0)
+        r[t >= czas_skoku] = r_bazowe + wielkosc
+    
+    elif typ_scenariusza == 'output_disturbance':
+        # Zakłócenie jako dodatkowa składowa sterowania
+        czas_zaklocenia = scenariusz.get('czas_zaklócenia', 60.0)
+        wielkosc_zaklocenia = scenariusz.get('wielkosc', -3.0)
+        zaklocenie = np.where(t >= czas_zaklocenia, wielkosc_zaklocenia, 0.0)
+    
+    elif typ_scenariusza == 'measurement_noise':
+        # Szum gaussowski na pomiarze
+        szum_std = scenariusz.get('odchylenie_std', 0.1)
+        szum = np.random.normal(0, szum_std, len(t))
+    
+    return r, zaklocenie, szum
 
 
-def symuluj_scenariusz(
-    ModelClass, 
-    RegulatorClass, 
-    parametry: Dict, 
-    scenariusz: Dict,
-    czas_sym: float = 180.0
-) -> Dict[str, Any]:
+def _czas_zdarzenia_scenariusza(scenariusz: Dict) -> float:
+    """Chwila ostatniego zdarzenia scenariusza [s] (0 dla szumu - działa od początku)."""
+    typ_scenariusza = scenariusz['typ']
+    if typ_scenariusza == 'setpoint_step':
+        return float(scenariusz.get('czas_skoku', 10.0))
+    if typ_scenariusza == 'output_disturbance':
+        return float(scenariusz.get('czas_zaklócenia', 60.0))
+    return 0.0
+
+
+def _odcinek(sygnal: Optional[np.ndarray], k0: int, k1: int) -> Optional[np.ndarray]:
+    """Fragment [k0, k1) sygnału; None, gdy sygnału brak lub fragment jest zerowy."""
+    if sygnal is None:
+        return None
+    fragment = sygnal[k0:k1]
+    return fragment if fragment.any() else None
+
+
+def symuluj_scenariusze(
+    ModelClass,
+    RegulatorClass,
+    parametry: Dict,
+    sygnaly: List[tuple],
+    tryb: str = "auto",
+    zakonczenie: Optional[WczesneZakonczenie] = None,
+    czas_probkowania: Optional[float] = None
+) -> List[WynikSymulacji]:
     """
-    Wykonuje symulację w danym scenariuszu.
+    Symuluje scenariusze jako drzewo prefiksów wspólnych początków sygnałów.
+    
+    Scenariusze tworzą drzewo prefiksów: grupa o identycznych (r, zakłócenie,
+    szum) do próbki L symuluje odcinek [k0, L) raz, po czym stan modelu
+    i regulatora zapamiętywany jest migawką (snapshot) i odtwarzany (restore)
+    przed kontynuacją każdej podgrupy. Wspólne odcinki liczone są silnikiem
+    zdarzeniowym (lub krokowym), bo oba zostawiają obiekty w stanie końcowym;
+    ostatni odcinek scenariusza - w trybie `tryb`, z wczesnym zakończeniem.
+    Trajektorie odpowiadają osobnym symulacjom co do zaokrągleń (test
+    ustalenia przy wczesnym zakończeniu obejmuje tylko ostatni odcinek).
     
     Args:
-        ModelClass: Klasa modelu
-        RegulatorClass: Klasa regulatora
-        parametry: Parametry regulatora
-        scenariusz: Słownik opisujący scenariusz testowy
-        czas_sym: Czas symulacji w sekundach
+        ModelClass: klasa modelu
+        RegulatorClass: klasa regulatora
+        parametry: parametry regulatora
+        sygnaly: lista (r, zaklocenie, szum) kolejnych scenariuszy na siatkach
+                 czasu od 0 z krokiem modelu (długości mogą się różnić,
+                 zaklocenie/szum mogą być None)
+        tryb: tryb silnika symulacji ostatnich odcinków (auto | zdarzeniowy | krokowy)
+        zakonczenie: wczesne zakończenie po ustaleniu (None = pełny horyzont)
+        czas_probkowania: okres próbkowania regulatora Ts (None = krok modelu)
     
     Returns:
-        Dict z wynikami: t, r, y, u, metryki
+        WynikSymulacji dla każdego scenariusza (w kolejności `sygnaly`)
     """
     model = ModelClass()
     dt = model.dt
-    
-    # Filtruj parametry do sygnatury konstruktora
-    import inspect
-    sig = inspect.signature(RegulatorClass.__init__)
-    parametry_filtr = {k: v for k, v in parametry.items() if k in sig.parameters and v is not None}
-    regulator = RegulatorClass(**parametry_filtr, dt=dt, umin=-15.0, umax=15.0)
-    
-    kroki = int(czas_sym / dt)
-    t, r, y, u = [], [], [], []
-    
-    typ_scenariusza = scenariusz['typ']
-    
-    # Określ wartość zadaną bazową
-    model_nazwa = ModelClass.__name__.lower()
-    r_bazowe = 0.0 if 'wahadlo' in model_nazwa else 1.0
-    
-    for k in range(kroki):
-        czas_k = k * dt
-        t.append(czas_k)
-        
-        # === Wartość zadana ===
-        if typ_scenariusza == 'setpoint_step':
-            # Skok wartości zadanej
-            czas_skoku = scenariusz.get('czas_skoku', 10.0)
-            wielkosc = scenariusz.get('wielkosc', 10.0)
-            
-            if czas_k < czas_skoku:
-                r_k = r_bazowe
-            else:
-                r_k = r_bazowe + wielkosc
-        else:
-            # Domyślna wartość zadana
-            r_k = r_bazowe
+    regulator = rejestr.regulator_klasy(RegulatorClass).utworz(parametry, dt=czas_probkowania or dt)
+    # Gałęzie zaczynają się na próbce regulatora (zachowana faza ZOH przy Ts > dt)
+    m = krok_regulatora(dt, regulator.dt)
+    tryb_wspolny = "krokowy" if tryb == "krokowy" else "zdarzeniowy"
+    
+    kroki = [len(r) for r, _, _ in sygnaly]
+    pelne = [tuple(np.zeros(n) if s is None else np.asarray(s, dtype=float) for s in syg)
+             for syg, n in zip(sygnaly, kroki)]
+    odcinki_y = [[] for _ in sygnaly]
+    odcinki_u = [[] for _ in sygnaly]
+    
+    def symuluj_odcinek(i: int, k0: int, k1: int, tryb_odcinka: str, zakonczenie_odcinka):
+        r, d, n = sygnaly[i]
+        # Pół kroku zapasu: liczba_krokow() zaokrągla w dół
+        wynik = symuluj_petle(model, regulator, (k1 - k0 + 0.5) * dt, r=np.asarray(r)[k0:k1],
+                              zaklocenie=_odcinek(d, k0, k1), szum=_odcinek(n, k0, k1),
+                              tryb=tryb_odcinka, zakonczenie=zakonczenie_odcinka)
+        return wynik.y, wynik.u
+    
+    def galaz(indeksy: List[int], k0: int):
+        # Koniec wspólnego odcinka: pierwsza różnica sygnałów lub koniec najkrótszego scenariusza
+        L = min(kroki[i] for i in indeksy)
+        wzor = pelne[indeksy[0]]
+        for i in indeksy[1:]:
+            for a, b in zip(wzor, pelne[i]):
+                rozne = np.flatnonzero(a[k0:L] != b[k0:L])
+                if rozne.size:
+                    L = k0 + int(rozne[0])
+        L -= (L - k0) % m
         
-        r.append(r_k)
-        
-        # === Pomiar (z możliwym szumem) ===
-        y_k = model.y
-        
-        if typ_scenariusza == 'measurement_noise':
-            # Dodaj szum gaussowski do pomiaru
-            szum_std = scenariusz.get('odchylenie_std', 0.1)
-            y_k_zaszumiony = y_k + np.random.normal(0, szum_std)
+        if len(indeksy) > 1 and L > k0:
+            y, u = symuluj_odcinek(indeksy[0], k0, L, tryb_wspolny, None)
+            for i in indeksy:
+                odcinki_y[i].append(y)
+                odcinki_u[i].append(u)
         else:
-            y_k_zaszumiony = y_k
+            L = k0
         
-        # === Sterowanie ===
-        u_k = regulator.update(r_k, y_k_zaszumiony)
+        # Podgrupy o tych samych wartościach sygnałów w chwili L (kolejność zachowana)
+        podgrupy: Dict[tuple, List[int]] = {}
+        for i in indeksy:
+            if kroki[i] > L:
+                podgrupy.setdefault(tuple(float(s[L]) for s in pelne[i]), []).append(i)
+        migawka = (model.snapshot(), regulator.snapshot())
+        if len(indeksy) > 1 and (L > k0 or len(podgrupy) > 1):
+            for grupa in podgrupy.values():
+                model.restore(migawka[0])
+                regulator.restore(migawka[1])
+                galaz(grupa, L)
+            return
         
-        # === Zakłócenie na wyjściu ===
-        if typ_scenariusza == 'output_disturbance':
-            czas_zaklocenia = scenariusz.get('czas_zaklócenia', 60.0)
-            wielkosc_zaklocenia = scenariusz.get('wielkosc', -3.0)
-            
-            if czas_k >= czas_zaklocenia:
-                # Zakłócenie jako dodatkowa składowa sterowania
-                u_k_z_zaklóceniem = u_k + wielkosc_zaklocenia
-            else:
-                u_k_z_zaklóceniem = u_k
-            
-            y_nowe = model.step(u_k_z_zaklóceniem)
-        else:
-            y_nowe = model.step(u_k)
-        
-        y.append(y_nowe)
-        u.append(u_k)
-    
-    # Oblicz metryki - dla szumu użyj większego pasma tolerancji
-    settle_band = 0.05 if typ_scenariusza == 'measurement_noise' else 0.02
-    metryki = oblicz_metryki(t, r, y, u, settle_band=settle_band)
+        # Liście: ostatni odcinek każdego scenariusza od wspólnego stanu
+        for i in indeksy:
+            model.restore(migawka[0])
+            regulator.restore(migawka[1])
+            y, u = symuluj_odcinek(i, k0, kroki[i], tryb, zakonczenie)
+            odcinki_y[i].append(y)
+            odcinki_u[i].append(u)
+    
+    galaz(list(range(len(sygnaly))), 0)
+    
+    return [WynikSymulacji(t=np.arange(kroki[i]) * dt, r=pelne[i][0],
+                           y=np.concatenate(odcinki_y[i]), u=np.concatenate(odcinki_u[i]))
+            for i in range(len(sygnaly))]
+
+
+def _wynik_scenariusza(wynik: WynikSymulacji, scenariusz: Dict) -> Dict[str, Any]:
+    """Trajektorie i metryki scenariusza (dla szumu większe pasmo tolerancji)."""
+    settle_band = 0.05 if scenariusz['typ'] == 'measurement_noise' else 0.02
+    metryki = wynik.metryki(settle_band=settle_band)
     
     return {
-        't': t,
-        'r': r,
-        'y': y,
-        'u': u,
+        't': wynik.t,
+        'r': wynik.r,
+        'y': wynik.y,
+        'u': wynik.u,
         'metryki': metryki.__dict__
     }
 
@@ -137,10 +201,13 @@ def walidacja_rozszerzona(
     metoda: str,
     model_nazwa: str,
     parametry: Dict,
-    katalog_wyniki: str = "wyniki"
+    katalog_wyniki: str = "wyniki",
+    czas_probkowania: Optional[float] = None
 ) -> Dict[str, Any]:
     """
     Przeprowadza rozszerzoną walidację regulatora w wielu scenariuszach.
+    czas_probkowania: okres próbkowania regulatora z etapu strojenia
+    (None = z konfiguracji, a w jej braku krok modelu).
     
     Returns:
         Dict z wynikami dla wszystkich scenariuszy
@@ -154,23 +221,56 @@ def walidacja_rozszerzona(
     
     print(f"   📏 Progi dla {model_nazwa}: IAE≤{progi['IAE_max']}, Mp≤{progi['przeregulowanie_max']}%, ts≤{progi['czas_ustalania_max']}s")
     
-    # Import klas
-    ModelClass = dynamiczny_import("modele", model_nazwa)
-    RegulatorClass = dynamiczny_import("regulatory", regulator_nazwa)
+    if czas_probkowania is None:
+        czas_probkowania = config.pobierz_czas_probkowania(model_nazwa)
+    
+    # Klasy z rejestru
+    ModelClass = rejestr.model(model_nazwa).klasa
+    RegulatorClass = rejestr.regulator(regulator_nazwa).klasa
     
     wyniki_wszystkie_scenariusze = []
     pass_count = 0
+    horyzont = Horyzont.z_konfiguracji(config.pobierz_config_horyzontu())
+    
+    dt = ModelClass().dt
+    r_bazowe = 0.0 if 'wahadlo' in model_nazwa.lower() else 1.0
+    
+    # Sygnały wszystkich scenariuszy (w kolejności - szum losowany jak przy osobnych symulacjach)
+    sygnaly = []
+    for scenariusz in scenariusze:
+        # Zwiększ czas symulacji dla scenariusza z szumem (potrzebuje więcej czasu na stabilizację)
+        czas_sym = 220.0 if scenariusz['typ'] == 'measurement_noise' else 180.0
+        if horyzont is not None:
+            # Z dynamiki modelu: ostatnie zdarzenie + k·τ, ale dłużej niż próg czasu ustalania
+            czas_sym = horyzont.czas(ModelClass(), _czas_zdarzenia_scenariusza(scenariusz),
+                                     czas_ustalania_max=progi['czas_ustalania_max'])
+        t = np.arange(liczba_krokow(czas_sym, dt)) * dt
+        sygnaly.append(_sygnaly_scenariusza(scenariusz, t, r_bazowe))
+    
+    # Wykonaj symulacje (drzewo prefiksów wspólnych początków scenariuszy)
+    ustawienia = dict(tryb=config.pobierz_tryb_symulacji(),
+                      zakonczenie=WczesneZakonczenie.z_konfiguracji(config.pobierz_wczesne_zakonczenie()),
+                      czas_probkowania=czas_probkowania)
+    try:
+        symulacje = symuluj_scenariusze(ModelClass, RegulatorClass, parametry, sygnaly, **ustawienia)
+    except Exception:
+        # Osobno dla każdego scenariusza - błąd dotyczy tylko scenariusza, w którym wystąpił
+        symulacje = []
+        for syg in sygnaly:
+            try:
+                symulacje.extend(symuluj_scenariusze(ModelClass, RegulatorClass, parametry, [syg],
+                                                     **ustawienia))
+            except Exception as e:
+                symulacje.append(e)
     
     for idx, scenariusz in enumerate(scenariusze):
         nazwa_scenariusza = scenariusz['nazwa']
         print(f"\n  📋 Scenariusz {idx+1}/{len(scenariusze)}: {nazwa_scenariusza}")
         
-        # Zwiększ czas symulacji dla scenariusza z szumem (potrzebuje więcej czasu na stabilizację)
-        czas_sym = 220.0 if scenariusz['typ'] == 'measurement_noise' else 180.0
-        
-        # Wykonaj symulację
         try:
-            wynik = symuluj_scenariusz(ModelClass, RegulatorClass, parametry, scenariusz, czas_sym=czas_sym)
+            if isinstance(symulacje[idx], Exception):
+                raise symulacje[idx]
+            wynik = _wynik_scenariusza(symulacje[idx], scenariusz)
             
             # Sprawdź progi
             metryki = wynik['metryki']
@@ -250,7 +350,7 @@ def walidacja_rozszerzona(
     
     # Konwertuj numpy arrays na listy dla JSON
     for scen in raport['scenariusze']:
-        if scen.get('t'):
+        if scen.get('t') is not None:
             scen['t'] = [float(x) for x in scen['t'][:100]]  # Ogranicz do 100 punktów
             scen['r'] = [float(x) for x in scen['r'][:100]]
             scen['y'] = [float(x) for x in scen['y'][:100]]